@@ -0,0 +1,64 @@
+"""
+Throughput benchmark for building characters with dnd_character.
+Prints one JSON object per class and level:
+
+    {"bench": "throughput", "class": ..., "level": ..., "chars_per_sec", "best_us"}
+
+The SRD and the class templates are warmed first, so this measures steady-state
+construction rather than the cold start measured by startup.py.
+
+    python benchmarks/characters.py [-c CLASS ...] [-l LEVEL ...] [-s SECONDS]
+"""
+import argparse
+import json
+import sys
+import time
+from os import path
+
+PACKAGE_ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+LEVELS = [1, 20]
+
+
+def throughput(classs: str, level: int, seconds: float) -> dict:
+    from dnd_character.character import Character
+    from dnd_character.classes import CLASSES
+
+    data = CLASSES[classs]
+    count = 0
+    best = float("inf")
+    start = now = time.perf_counter()
+    while now - start < seconds:
+        Character(classs=data, level=level)
+        built = time.perf_counter()
+        best = min(best, built - now)
+        now = built
+        count += 1
+    return {
+        "bench": "throughput",
+        "class": classs,
+        "level": level,
+        "chars_per_sec": round(count / (now - start)),
+        "best_us": round(best * 1_000_000, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-c", "--classes", nargs="+", help="default: every class")
+    parser.add_argument("-l", "--levels", nargs="+", type=int, default=LEVELS)
+    parser.add_argument("-s", "--seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    sys.path.insert(0, PACKAGE_ROOT)
+    from dnd_character.SRD import warm
+    from dnd_character.classes import CLASSES
+
+    warm()
+    for classs in args.classes or list(CLASSES):
+        for level in args.levels:
+            result = throughput(classs, level, args.seconds)
+            print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Measures cold-import time of dnd_character modules.
+Each import runs in a fresh interpreter so nothing is shared between samples.
+
+    python benchmarks/import_time.py [-n REPEAT] [module ...]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from os import path
+
+PACKAGE_ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+DEFAULT_MODULES = ["dnd_character.SRD", "dnd_character"]
+
+SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+
+def cold_import(module: str) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", SNIPPET.format(module=module)],
+        cwd=PACKAGE_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        samples = [cold_import(module) for _ in range(args.repeat)]
+        print(
+            f"{module:<32} min {min(samples) * 1000:8.1f} ms"
+            f"   median {statistics.median(samples) * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Cold-start benchmark suite for dnd_character.
+Prints one JSON object per measurement:
+
+    {"bench": "import", "module": ..., "wall_ms", "rss_kb", "alloc_blocks", "alloc_peak_kb"}
+    {"bench": "build", "class": ..., "level": ..., "first_ms", "median_ms", ...}
+
+Every measurement runs in a fresh interpreter, so every import is cold.
+Wall time and RSS come from a run without tracemalloc; allocations are
+counted in a separate run so tracing doesn't distort the timings.
+
+    python benchmarks/startup.py [--builds-only | --imports-only] [-n REPEAT]
+"""
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from os import path
+
+PACKAGE_ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+
+# Submodules in dependency order, so each import only pays for its own work
+MODULES = [
+    "dnd_character.SRD",
+    "dnd_character.equipment",
+    "dnd_character.experience",
+    "dnd_character.templates",
+    "dnd_character.character",
+    "dnd_character.classes",
+    "dnd_character.spellcasting",
+    "dnd_character.monsters",
+]
+CLASSES = [
+    "barbarian",
+    "bard",
+    "cleric",
+    "druid",
+    "fighter",
+    "monk",
+    "paladin",
+    "ranger",
+    "rogue",
+    "sorcerer",
+    "warlock",
+    "wizard",
+]
+LEVELS = [1, 10, 20]
+
+
+def rss_kb() -> int:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class Measure:
+    """Context manager recording wall time, peak RSS and optionally allocations"""
+
+    def __init__(self, trace: bool):
+        self.trace = trace
+        self.result: dict = {}
+
+    def __enter__(self) -> "Measure":
+        if self.trace:
+            tracemalloc.start()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.result["wall_ms"] = (time.perf_counter() - self.start) * 1000
+        self.result["rss_kb"] = rss_kb()
+        if self.trace:
+            snapshot = tracemalloc.take_snapshot()
+            self.result["alloc_blocks"] = sum(
+                stat.count for stat in snapshot.statistics("filename")
+            )
+            self.result["alloc_peak_kb"] = tracemalloc.get_traced_memory()[1] // 1024
+            tracemalloc.stop()
+
+
+def skip_package_init() -> None:
+    """
+    Register the dnd_character package without running its __init__, which
+    imports everything; submodules can then be imported one at a time.
+    """
+    import importlib.util
+    import types
+
+    spec = importlib.util.find_spec("dnd_character")
+    package = types.ModuleType("dnd_character")
+    package.__path__ = list(spec.submodule_search_locations)
+    package.__spec__ = spec
+    sys.modules["dnd_character"] = package
+
+
+def child_import(module: str, trace: bool) -> dict:
+    import importlib
+
+    if module != "dnd_character":
+        skip_package_init()
+        for dependency in MODULES[: MODULES.index(module)]:
+            importlib.import_module(dependency)
+    with Measure(trace) as measure:
+        importlib.import_module(module)
+    return {"bench": "import", "module": module, **measure.result}
+
+
+def child_build(classs: str, level: int, repeat: int, trace: bool) -> dict:
+    from dnd_character.character import Character
+    from dnd_character.classes import CLASSES as ALL_CLASSES
+
+    data = ALL_CLASSES[classs]
+    start = time.perf_counter()
+    Character(classs=data, level=level)
+    first_ms = (time.perf_counter() - start) * 1000
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        Character(classs=data, level=level)
+        samples.append((time.perf_counter() - start) * 1000)
+    with Measure(trace) as measure:
+        # keep the character alive so its blocks are counted
+        character = Character(classs=data, level=level)  # noqa: F841
+    result = {
+        "bench": "build",
+        "class": classs,
+        "level": level,
+        "first_ms": first_ms,
+        "median_ms": statistics.median(samples),
+        "rss_kb": measure.result["rss_kb"],
+    }
+    if trace:
+        result["alloc_blocks"] = measure.result["alloc_blocks"]
+        result["alloc_peak_kb"] = measure.result["alloc_peak_kb"]
+    return result
+
+
+def run_child(*args: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, path.abspath(__file__), "--child", *args],
+        cwd=PACKAGE_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure_twice(*args: str) -> dict:
+    """Timed run merged with the allocation counts of a traced run"""
+    result = run_child(*args)
+    traced = run_child(*args, "--trace")
+    result["alloc_blocks"] = traced["alloc_blocks"]
+    result["alloc_peak_kb"] = traced["alloc_peak_kb"]
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    only = parser.add_mutually_exclusive_group()
+    only.add_argument("--imports-only", action="store_true")
+    only.add_argument("--builds-only", action="store_true")
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    parser.add_argument("--child", nargs="+", help=argparse.SUPPRESS)
+    args, extra = parser.parse_known_args()
+
+    if args.child:
+        sys.path.insert(0, PACKAGE_ROOT)
+        trace = "--trace" in extra
+        if args.child[0] == "import":
+            result = child_import(args.child[1], trace)
+        else:
+            __, classs, level, repeat = args.child
+            result = child_build(classs, int(level), int(repeat), trace)
+        print(json.dumps(result))
+        return
+
+    if not args.builds_only:
+        for module in ["dnd_character", *MODULES]:
+            print(json.dumps(measure_twice("import", module)), flush=True)
+    if not args.imports_only:
+        for classs in CLASSES:
+            for level in LEVELS:
+                result = measure_twice("build", classs, str(level), str(args.repeat))
+                print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,38 @@
 """
 A cached function that gets SRD data from a DND 5e REST API
 """
+import atexit
 import json
-from os import environ, walk, path, remove, mkdir
+from os import environ, path, pathsep, remove, mkdir
 import logging
-from typing import Callable, TypeAlias, Union
+from collections.abc import Mapping
+from functools import partial
+from typing import (
+    Any,
+    Callable,
+    Hashable,
+    Iterator,
+    Optional,
+    TypeAlias,
+    Union,
+    TYPE_CHECKING,
+)
+from .cache import CacheStats, UnboundedCache, endpoint, make_cache
+from .snapshot import (
+    SNAPSHOT_FILENAME,
+    Snapshot,
+    iter_json_cache,
+    open_snapshot,
+    uri_to_filename,
+)
+from .manifest import MANIFEST_FILENAME, Manifest, load_manifest
+from .interning import Interner
+from .writer import JsonWriter, write_json_atomic
+from .database import DATABASE_FILENAME, SRDDatabase, open_database
+from .homebrew import Overlay, load_overlay
+
+if TYPE_CHECKING:
+    import requests
 
 LOG = logging.getLogger(__package__)
 LOG.setLevel(logging.DEBUG)
@@ -17,76 +45,335 @@ try:
 except Exception as e:
     LOG.error(f"Entire JSON cache failed to load: {str(e)}")
 
+SRD_API = environ.get("SRD_API", "http://dnd5eapi.co")
+SRD_CACHE = environ.get("SRD_CACHE", "unbounded")
+# How many times a request is retried after a connection error or a 429 or 5xx
+SRD_RETRIES = int(environ.get("SRD_RETRIES", "3"))
+# Seconds to wait for the API to connect or send data before giving up (or retrying)
+SRD_TIMEOUT = float(environ.get("SRD_TIMEOUT", "10"))
+SRD_MANIFEST = environ.get("SRD_MANIFEST", f"{JSON_CACHE}/{MANIFEST_FILENAME}")
+# Frozen means the SRD never makes live requests; missing entries raise an error
+SRD_FROZEN = environ.get("SRD_FROZEN", "") not in ("", "0")
+# Share repeated strings and small dicts between documents to save memory
+SRD_INTERN = environ.get("SRD_INTERN", "1") not in ("", "0")
+SRD_SNAPSHOT = environ.get("SRD_SNAPSHOT", f"{JSON_CACHE}/{SNAPSHOT_FILENAME}")
+SRD_DATABASE = environ.get("SRD_DATABASE", f"{JSON_CACHE}/{DATABASE_FILENAME}")
+# Directories of homebrew documents layered over the SRD; later ones win
+SRD_HOMEBREW = environ.get(
+    "SRD_HOMEBREW", f"{path.dirname(path.abspath(__file__))}/homebrew"
+).split(pathsep)
+
+# Optional SQLite store with indexed spell, monster and equipment columns
+SRD_db: Optional[SRDDatabase] = open_database(SRD_DATABASE)
+
 
 # Json Data is unstructured and could be recursively nested
 JsonValues: TypeAlias = Union[str, int, list["JsonValues"], dict[str, "JsonValues"]]
 JsonData: TypeAlias = dict[str, JsonValues]
 
 
+class SRDUnavailableError(Exception):
+    pass
+
+
 class DecoratedAPICallable:
     """
     Instantiated by the @cached_json decorator to wrap API calls.
+    `index` maps each URI to the JSON file holding it; files are only parsed
+    into `cache` the first time their URI is requested.
     """
 
-    def __init__(self, func: Callable[[str], JsonData]):
+    def __init__(
+        self,
+        func: Callable[[str], JsonData],
+        cache_dir: str = JSON_CACHE,
+        cache: Optional[dict[str, JsonData]] = None,
+    ):
         self.func = func
-        self.cache: dict[str, JsonData] = {}
+        self.cache_dir = cache_dir
+        self.cache: dict[str, JsonData] = UnboundedCache() if cache is None else cache
+        self.index: dict[str, str] = {}
+        self.stores: list[Union[SRDDatabase, Snapshot]] = []
+        self.overlay: Optional[Overlay] = None
+        self.writer: Optional[JsonWriter] = None
+        self.manifest: Optional[Manifest] = None
+        self.frozen = False
+        self.interner: Optional[Interner] = None
+        self.stats = CacheStats()
 
     def __call__(self, uri: str) -> JsonData:
-        return self.func(uri)
+        self.stats.requests_by_endpoint[endpoint(uri)] += 1
+        try:
+            result = self.cache[uri]
+            self.stats.hits += 1
+            return result
+        except KeyError:
+            self.stats.misses += 1
+        result = self.load(uri)
+        if result is not None:
+            self.stats.disk_loads += 1
+            return result
+        if self.frozen:
+            raise SRDUnavailableError(f"{uri} is not cached and the SRD is frozen")
+        LOG.debug(f"Uncached URI: {uri}")
+        self.stats.live_fetches += 1
+        return self.save(uri, self.func(uri))
+
+    def is_cached(self, uri: str) -> bool:
+        return (
+            uri in self.cache
+            or (self.overlay is not None and uri in self.overlay)
+            or uri in self.index
+            or any(self.in_store(store, uri) for store in self.stores)
+        )
+
+    def in_store(self, store: Union[SRDDatabase, Snapshot], uri: str) -> bool:
+        """
+        Whether `store` has `uri` as the manifest last recorded it. Stores built
+        before an entry was revalidated or refetched are ignored for that entry.
+        """
+        digest = store.digests.get(uri)
+        if digest is None:
+            return False
+        entry = None if self.manifest is None else self.manifest.get(uri)
+        return entry is None or entry["sha256"] == digest
+
+    def load(self, uri: str) -> Optional[JsonData]:
+        """
+        Read `uri` from the homebrew overlay if it has it, else from the SRD's
+        stores or cached JSON files, and put it in the memory cache.
+        """
+        if self.overlay is not None and uri in self.overlay:
+            return self.remember(uri, self.overlay.get(uri, self.read))
+        data = self.read(uri)
+        return None if data is None else self.remember(uri, data)
+
+    def read(self, uri: str) -> Optional[JsonData]:
+        """
+        Read `uri` from the first store that has it as the manifest recorded it,
+        else parse its cached JSON file.
+        """
+        for store in self.stores:
+            if self.in_store(store, uri):
+                return store.get(uri)
+        return self.read_file(uri)
+
+    def read_file(self, uri: str) -> Optional[JsonData]:
+        """
+        Parse the cached JSON file of `uri`, or the data waiting to be written to it.
+        Corrupt files are deleted so the URI gets fetched again.
+        """
+        fp = self.index.get(uri)
+        if fp is None:
+            return None
+        if self.writer is not None and fp in self.writer.pending:
+            data = self.writer.pending.get(fp)
+            if data is not None:
+                return data
+        try:
+            with open(fp, "r") as f:
+                data = json.load(f)
+        except json.decoder.JSONDecodeError as e:
+            LOG.error(f"{path.basename(fp)} failed to load: {str(e)}")
+            del self.index[uri]
+            remove(fp)
+            return None
+        return data
+
+    def remember(self, uri: str, data: JsonData) -> JsonData:
+        """Put `data` in the memory cache, sharing repeated objects if interning"""
+        if self.interner is not None:
+            data = self.interner(data)
+        self.cache[uri] = data
+        return data
+
+    def set_cache(self, cache: dict[str, JsonData]) -> None:
+        """Switch to a different cache policy, keeping what is already cached"""
+        cache.update(self.cache)
+        self.cache = cache
+
+    def stats_dict(self) -> dict[str, Any]:
+        """Usage counters since the process started"""
+        stats = {
+            "policy": type(self.cache).__name__,
+            "entries": len(self.cache),
+            **self.stats.as_dict(evictions=self.cache.evictions),
+        }
+        if self.interner is not None:
+            stats["interned"] = self.interner.stats_dict(list(self.cache.values()))
+        return stats
+
+    def stats_report(self) -> str:
+        """Human readable version of `stats_dict`"""
+        stats = self.stats_dict()
+        endpoints = stats.pop("requests_by_endpoint")
+        lines = [f"{key}: {value}" for key, value in stats.items()]
+        lines.append("requests by endpoint:")
+        lines.extend(f"  {uri}: {count}" for uri, count in endpoints.items())
+        return "\n".join(lines)
+
+    def save(
+        self,
+        uri: str,
+        data: JsonData,
+        *,
+        etag: Optional[str] = None,
+        overwrite: bool = False,
+    ) -> JsonData:
+        """
+        Add `data` to the memory cache, the manifest and the JSON cache.
+        With a `writer`, the file is written in the background; otherwise it
+        is written now. Existing files are only replaced if `overwrite` is set.
+        Returns the copy of `data` held in the memory cache.
+        """
+        cached = self.remember(uri, data)
+        fp = f"{self.cache_dir}/{uri_to_filename(uri)}"
+        self.index[uri] = fp
+        if self.manifest is not None:
+            self.manifest.record(uri, data, etag=etag)
+        if self.writer is None:
+            write_json_atomic(fp, data, overwrite=overwrite)
+        else:
+            self.writer.put(fp, data, overwrite=overwrite)
+        return cached
+
+    def flush(self) -> None:
+        """Write every queued JSON file, then save the manifest"""
+        if self.writer is not None:
+            self.writer.flush()
+        if self.manifest is not None:
+            self.manifest.save()
+
+    def check_integrity(self, quick: bool = True) -> list[str]:
+        """
+        Compare cached files against the manifest. Damaged entries are dropped
+        from the index, so they are fetched again (or raise, if frozen).
+        Returns the URIs of damaged entries.
+        """
+        if self.manifest is None:
+            return []
+        damaged = self.manifest.check(self.cache_dir, quick=quick)
+        for uri in damaged:
+            self.index.pop(uri, None)
+            self.cache.pop(uri, None)
+        return damaged
+
+
+class LazyMapping(Mapping[Hashable, Any]):
+    """
+    A read-only dict-like table whose values are only loaded when first accessed.
+    `loaders` is called once, on first use, to get a loader function for each key.
+    """
+
+    def __init__(self, loaders: Callable[[], dict[Hashable, Callable[[], Any]]]):
+        self._get_loaders = loaders
+        self._loaders: Optional[dict[Hashable, Callable[[], Any]]] = None
+        self._data: dict[Hashable, Any] = {}
+
+    @property
+    def loaders(self) -> dict[Hashable, Callable[[], Any]]:
+        if self._loaders is None:
+            self._loaders = self._get_loaders()
+        return self._loaders
+
+    def __getitem__(self, key: Hashable) -> Any:
+        try:
+            return self._data[key]
+        except KeyError:
+            self._data[key] = value = self.loaders[key]()
+            return value
+
+    def __contains__(self, key: object) -> bool:
+        return key in self.loaders
+
+    def __iter__(self) -> Iterator[Hashable]:
+        return iter(self.loaders)
+
+    def __len__(self) -> int:
+        return len(self.loaders)
 
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self.loaders)})"
 
-def cached_json(func: Callable[[str], JsonData]) -> Callable[[str], JsonData]:
+    def warm(self) -> None:
+        """Load every value, including values of nested LazyMappings"""
+        for key in self:
+            value = self[key]
+            if isinstance(value, LazyMapping):
+                value.warm()
+
+
+def cached_json(func: Callable[[str], JsonData]) -> DecoratedAPICallable:
     """
     This decorator returns a DecoratedAPICallable, which will return cached data
     if it exists. If it does not exist, then it will send a GET request to the API
     and try to save the response to a local JSON file to prevent future requests.
+
+    Only the names of the cached files are read here; the JSON is parsed lazily.
+    In frozen mode the files are checked against the manifest first.
+    If a SQLite database or packed snapshot exists, records are read from those
+    before the JSON files. Homebrew layers take precedence over all of them.
+    """
+    func = DecoratedAPICallable(func, cache=make_cache(SRD_CACHE))
+    func.writer = JsonWriter()
+    func.manifest = load_manifest(SRD_MANIFEST)
+    atexit.register(func.flush)
+    func.frozen = SRD_FROZEN
+    if SRD_INTERN:
+        func.interner = Interner()
+    snapshot = open_snapshot(SRD_SNAPSHOT, JSON_CACHE)
+    func.stores = [store for store in (SRD_db, snapshot) if store is not None]
+    func.overlay = load_overlay(SRD_HOMEBREW)
+    for uri, fp in iter_json_cache(JSON_CACHE):
+        func.index[uri] = fp
+    if func.frozen:
+        damaged = func.check_integrity()
+        if damaged:
+            LOG.error(f"{len(damaged)} damaged SRD cache entries: {', '.join(damaged)}")
+    return func
+
+
+_sessions: dict[int, "requests.Session"] = {}
+
+
+def http_session(pool_size: int = 10) -> "requests.Session":
     """
-    func = DecoratedAPICallable(func)
-    for dirname, __, files in walk(JSON_CACHE):
-        for fp in files:
-            if path.splitext(fp)[1] != ".json":
-                continue
-            try:
-                with open(f"{dirname}/{fp}", "r") as f:
-                    data = json.load(f)
-                func.cache[f"/{fp.replace('_', '/')[:-5]}"] = data
-            except json.decoder.JSONDecodeError as e:
-                LOG.error(f"{fp} failed to load: {str(e)}")
-                remove(f"{dirname}/{fp}")
-
-    def outer_wrapper(
-        func: DecoratedAPICallable,
-    ) -> Callable[[str], JsonData]:
-        def inner_wrapper(uri: str) -> JsonData:
-            try:
-                return func.cache[uri]
-            except KeyError:
-                LOG.debug(f"Uncached URI: {uri}")
-                func.cache[uri] = result = func(uri)
-                fp = f"{JSON_CACHE}/{uri[1:].replace('/', '_')}.json"
-                with open(fp, "w") as f:
-                    f.write(json.dumps(result))
-                return result
-
-        return inner_wrapper
-
-    return outer_wrapper(func)
-
-
-def __SRD_API_CALL() -> Callable[[str], JsonData]:
+    Returns a requests.Session which keeps up to `pool_size` connections
+    to the API open, so repeated requests skip the TCP/TLS handshake.
+    Failed requests are retried SRD_RETRIES times, backing off exponentially.
+    Pass `timeout=SRD_TIMEOUT` to each request; sessions have no default.
+    Sessions are reused for each pool size.
+    """
+    import requests
+    from urllib3.util.retry import Retry
+
+    if pool_size not in _sessions:
+        session = requests.Session()
+        retry = Retry(
+            total=SRD_RETRIES,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",),
+        )
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, max_retries=retry
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _sessions[pool_size] = session
+    return _sessions[pool_size]
+
+
+def __SRD_API_CALL() -> DecoratedAPICallable:
     """
     Closure for API calls
     """
-    SRD_API = environ.get("SRD_API", "http://dnd5eapi.co")
 
     @cached_json
     def get_from_SRD(uri: str) -> JsonData:
-        import requests
-
         LOG.warning(f"Live API request! {str(uri)}")
 
-        return requests.get(f"{SRD_API}{uri}").json()
+        return http_session().get(f"{SRD_API}{uri}", timeout=SRD_TIMEOUT).json()
 
     return get_from_SRD
 
@@ -94,17 +381,58 @@ def __SRD_API_CALL() -> Callable[[str], JsonData]:
 SRD = __SRD_API_CALL()
 
 SRD_endpoints = SRD("/api/")
-SRD_classes = {}
-SRD_class_levels = {}
 
-for result in SRD(SRD_endpoints["classes"])["results"]:
-    SRD_classes[result["index"]] = SRD(result["url"])
-    SRD_class_levels[result["index"]] = SRD(result["url"] + "/levels")
 
-SRD_rules = {
-    category["name"]: {
-        subsection["name"]: SRD(subsection["url"])["desc"]
-        for subsection in SRD(category["url"])["subsections"]
+def __classes() -> dict[str, Callable[[], JsonData]]:
+    return {
+        result["index"]: partial(SRD, result["url"])
+        for result in SRD(SRD_endpoints["classes"])["results"]
     }
-    for category in SRD(SRD_endpoints["rules"])["results"]
-}
+
+
+def __class_levels() -> dict[str, Callable[[], JsonData]]:
+    return {
+        result["index"]: partial(SRD, result["url"] + "/levels")
+        for result in SRD(SRD_endpoints["classes"])["results"]
+    }
+
+
+def __rules() -> dict[str, Callable[[], LazyMapping]]:
+    def subsections(url: str) -> LazyMapping:
+        return LazyMapping(
+            lambda: {
+                subsection["name"]: lambda url=subsection["url"]: SRD(url)["desc"]
+                for subsection in SRD(url)["subsections"]
+            }
+        )
+
+    return {
+        category["name"]: partial(subsections, category["url"])
+        for category in SRD(SRD_endpoints["rules"])["results"]
+    }
+
+
+SRD_classes = LazyMapping(__classes)
+SRD_class_levels = LazyMapping(__class_levels)
+SRD_rules = LazyMapping(__rules)
+
+
+def warm() -> None:
+    """
+    Load every lazy SRD table now instead of on first access.
+    Useful for long-running processes that will need all of it anyway.
+    """
+    from .classes import CLASSES
+    from .spellcasting import SPELLS
+    from .templates import CLASS_TEMPLATES
+
+    tables = (
+        SRD_classes,
+        SRD_class_levels,
+        SRD_rules,
+        CLASSES,
+        SPELLS,
+        CLASS_TEMPLATES,
+    )
+    for table in tables:
+        table.warm()
@@ -1,12 +1,24 @@
 import argparse
-import json
-from pprint import pprint
-from dnd_character.character import Character
+import random
+import sys
+from dnd_character.batch import FORMATS, generate
 from dnd_character.classes import CLASSES
+from dnd_character.SRD import SRD
 
 CLASS_NAMES = list(CLASSES.keys())
 
 
+def positive_int(value: str) -> int:
+    """argparse type for counts, which must be at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {value!r}")
+    return number
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         prog="dnd-character",
@@ -39,31 +51,59 @@ def main() -> None:
         "--format",
         help="output format",
         default="text",
-        choices=["text", "dict", "json"],
+        choices=list(FORMATS),
+    )
+    parser.add_argument(
+        "-n",
+        "--count",
+        help="number of characters to generate",
+        type=positive_int,
+        default=1,
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="worker processes for generating characters",
+        type=positive_int,
+        default=1,
+    )
+    parser.add_argument(
+        "--srd-stats",
+        help="print SRD cache statistics to stderr",
+        default=False,
+        action="store_true",
     )
     args = parser.parse_args()
-    char = None
+    classes = None
 
     if args.random:
-        import random
-
-        classs = random.choice(CLASS_NAMES)
-        char = Character(classs=CLASSES[classs], level=int(args.level))
+        # a random class for each character
+        classes = [random.choice(CLASS_NAMES) for _ in range(args.count)]
 
     # do gymnastics because class is a four letter word
     if args.__dict__["class"]:
-        classs = args.__dict__["class"][0]
-        char = Character(classs=CLASSES[classs], level=int(args.level))
+        classes = args.__dict__["class"] * args.count
 
-    if char:
-        if args.format == "text":
-            print(char)
-        elif args.format == "dict":
-            pprint(dict(char))
-        elif args.format == "json":
-            print(json.dumps(dict(char), indent=2))
+    if classes:
+        characters = generate(classes, int(args.level), args.format, args.jobs)
+        # several JSON characters are written as one JSON list
+        as_list = args.format == "json" and args.count > 1
+        if as_list:
+            print("[")
+        for i, character in enumerate(characters):
+            if i and args.format == "text":
+                print()
+            if as_list:
+                character += "," if i < len(classes) - 1 else ""
+            print(character, flush=True)
+        if as_list:
+            print("]")
     else:
         parser.print_help()
 
+    if args.srd_stats:
+        print(SRD.stats_report(), file=sys.stderr)
+
 
-main()
+if __name__ == "__main__":
+    main()
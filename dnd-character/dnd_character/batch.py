@@ -0,0 +1,49 @@
+"""
+Generates many characters at once for the command line tool, optionally on a
+pool of worker processes which each warm the SRD once, when they start.
+Characters are rendered to text in the workers and yielded in order.
+"""
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pprint import pformat
+from typing import Callable, Iterator, Optional
+
+from .character import Character
+from .classes import CLASSES
+from .SRD import warm
+
+FORMATS: dict[str, Callable[[Character], str]] = {
+    "text": str,
+    "dict": lambda char: pformat(dict(char)),
+    "json": lambda char: json.dumps(dict(char), indent=2),
+    "jsonl": lambda char: json.dumps(dict(char)),
+}
+
+
+def render(job: tuple[str, int, str]) -> str:
+    """Builds a character of class `classs` at `level` and renders it"""
+    classs, level, output_format = job
+    return FORMATS[output_format](Character(classs=CLASSES[classs], level=level))
+
+
+def generate(
+    classes: list[str],
+    level: int,
+    output_format: str,
+    jobs: int = 1,
+    chunksize: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    Yields one rendered character for each class in `classes`, in order.
+    With more than one job, characters are built on a process pool.
+    """
+    work = [(classs, level, output_format) for classs in classes]
+    if jobs <= 1 or len(work) <= 1:
+        yield from map(render, work)
+        return
+    if chunksize is None:
+        # big enough to keep the overhead of each task small, but small enough
+        # that the first characters come out quickly and every worker gets some
+        chunksize = max(1, min(64, len(work) // (jobs * 4)))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=warm) as pool:
+        yield from pool.map(render, work, chunksize=chunksize)
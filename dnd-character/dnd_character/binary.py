@@ -0,0 +1,178 @@
+"""
+Encodes JSON-like values (None, bool, int, float, str, bytes, lists and dicts)
+in the MessagePack format, so other MessagePack readers can decode them.
+Only what this package saves is supported: no extension types or timestamps.
+"""
+import struct
+from typing import Any
+
+# (largest value, type byte, struct format) of the formats which follow the
+# type byte with a value or length, smallest first
+UINTS = (
+    (0xFF, 0xCC, ">B"),
+    (0xFFFF, 0xCD, ">H"),
+    (0xFFFFFFFF, 0xCE, ">I"),
+    (0xFFFFFFFFFFFFFFFF, 0xCF, ">Q"),
+)
+LENGTHS = {
+    str: ((0xFF, 0xD9, ">B"), (0xFFFF, 0xDA, ">H"), (0xFFFFFFFF, 0xDB, ">I")),
+    bytes: ((0xFF, 0xC4, ">B"), (0xFFFF, 0xC5, ">H"), (0xFFFFFFFF, 0xC6, ">I")),
+    list: ((0xFFFF, 0xDC, ">H"), (0xFFFFFFFF, 0xDD, ">I")),
+    dict: ((0xFFFF, 0xDE, ">H"), (0xFFFFFFFF, 0xDF, ">I")),
+}
+# (smallest value, type byte, struct format) for negative integers
+INTS = (
+    (-0x80, 0xD0, ">b"),
+    (-0x8000, 0xD1, ">h"),
+    (-0x80000000, 0xD2, ">i"),
+    (-0x8000000000000000, 0xD3, ">q"),
+)
+# the fix formats, which keep a small length in the type byte itself
+FIX = {str: (0xA0, 32), list: (0x90, 16), dict: (0x80, 16)}
+
+# type byte -> (struct format, kind) for the formats read by Unpacker
+FORMATS = {
+    code: (fmt, kind)
+    for kind, formats in (("int", UINTS), ("int", INTS), *LENGTHS.items())
+    for __, code, fmt in formats
+}
+FORMATS[0xCA] = (">f", "float")
+FORMATS[0xCB] = (">d", "float")
+CONSTANTS = {0xC0: None, 0xC2: False, 0xC3: True}
+
+
+def _header(out: bytearray, kind: type, length: int) -> None:
+    fix = FIX.get(kind)
+    if fix is not None and length < fix[1]:
+        out.append(fix[0] | length)
+        return
+    for limit, code, fmt in LENGTHS[kind]:
+        if length <= limit:
+            out.append(code)
+            out += struct.pack(fmt, length)
+            return
+    raise ValueError(f"{kind.__name__} of length {length} is too long to encode")
+
+
+def _pack(value: Any, out: bytearray) -> None:
+    if value is None:
+        out.append(0xC0)
+    elif value is True:
+        out.append(0xC3)
+    elif value is False:
+        out.append(0xC2)
+    elif isinstance(value, int):
+        if -0x20 <= value < 0x80:
+            out.append(value & 0xFF)
+            return
+        formats = UINTS if value > 0 else INTS
+        for limit, code, fmt in formats:
+            if (value <= limit) if value > 0 else (value >= limit):
+                out.append(code)
+                out += struct.pack(fmt, value)
+                return
+        raise ValueError(f"{value} is too large to encode")
+    elif isinstance(value, float):
+        out.append(0xCB)
+        out += struct.pack(">d", value)
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        _header(out, str, len(data))
+        out += data
+    elif isinstance(value, (bytes, bytearray)):
+        _header(out, bytes, len(value))
+        out += value
+    elif isinstance(value, (list, tuple)):
+        _header(out, list, len(value))
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, dict):
+        _header(out, dict, len(value))
+        for key, item in value.items():
+            _pack(key, out)
+            _pack(item, out)
+    else:
+        raise TypeError(f"Can't encode {type(value).__name__}")
+
+
+def packb(value: Any) -> bytes:
+    out = bytearray()
+    _pack(value, out)
+    return bytes(out)
+
+
+class Unpacker:
+    def __init__(self, data: bytes):
+        self.data = bytes(data)
+        self.position = 0
+
+    def take(self, n: int) -> bytes:
+        start = self.position
+        end = self.position = start + n
+        if end > len(self.data):
+            raise ValueError("Truncated MessagePack data")
+        return self.data[start:end]
+
+    def unpack(self) -> Any:
+        data = self.data
+        try:
+            code = data[self.position]
+        except IndexError:
+            raise ValueError("Truncated MessagePack data")
+        self.position += 1
+        if code < 0x80:
+            return code
+        if code >= 0xE0:
+            return code - 0x100
+        if code < 0x90:
+            return self.map(code & 0x0F)
+        if code < 0xA0:
+            return self.array(code & 0x0F)
+        if code < 0xC0:
+            return self.take(code & 0x1F).decode("utf-8")
+        if code in CONSTANTS:
+            return CONSTANTS[code]
+        try:
+            fmt, kind = FORMATS[code]
+        except KeyError:
+            raise ValueError(f"Unsupported MessagePack type byte {code:#x}")
+        (value,) = struct.unpack(fmt, self.take(struct.calcsize(fmt)))
+        if kind in ("int", "float"):
+            return value
+        if kind is str:
+            return self.take(value).decode("utf-8")
+        if kind is bytes:
+            return self.take(value)
+        if kind is list:
+            return self.array(value)
+        return self.map(value)
+
+    def array(self, length: int) -> list:
+        unpack = self.unpack
+        return [unpack() for _ in range(length)]
+
+    def map(self, length: int) -> dict:
+        unpack = self.unpack
+        result = {}
+        for _ in range(length):
+            key = unpack()
+            result[key] = unpack()
+        return result
+
+
+def unpackb(data: bytes) -> Any:
+    unpacker = Unpacker(data)
+    value = unpacker.unpack()
+    if unpacker.position != len(unpacker.data):
+        raise ValueError("Extra data after MessagePack value")
+    return value
+
+
+# kept when msgpack's replace them below
+pure_packb, pure_unpackb = packb, unpackb
+
+try:
+    # msgpack's C extension reads and writes the same format, much faster
+    from msgpack import packb, unpackb  # type: ignore # noqa: F811
+except ImportError:
+    pass
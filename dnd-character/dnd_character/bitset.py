@@ -0,0 +1,167 @@
+"""
+Inverted indexes over SRD documents, for composable queries such as:
+
+    index.where(level__lte=3, ritual=True)
+
+Every document has a position in the index. Each indexed value maps to an
+int used as a bitset of the documents having that value, so a query is a
+handful of bitwise ANDs and ORs no matter how many documents there are.
+See `dnd_character.spell_index` and `dnd_character.monsters`.
+"""
+from collections import defaultdict
+from typing import Any, Callable, Iterable, Iterator, Mapping
+
+COMPARISONS: dict[str, Callable[[Any, Any], bool]] = {
+    "lt": lambda value, bound: value < bound,
+    "lte": lambda value, bound: value <= bound,
+    "gt": lambda value, bound: value > bound,
+    "gte": lambda value, bound: value >= bound,
+    "in": lambda value, bound: value in bound,
+    "ne": lambda value, bound: value != bound,
+}
+
+
+class BitsetIndex:
+    """
+    Built on first use from `documents()`, a mapping of SRD documents by
+    index. `objects` maps the same indexes to the objects results yield.
+
+    Subclasses say what to index by setting `fields` and `values`, which
+    returns the values of each field for one document.
+    """
+
+    noun = "documents"
+    fields: tuple[str, ...] = ()
+
+    @staticmethod
+    def values(document: dict) -> dict[str, Iterable[Any]]:
+        raise NotImplementedError
+
+    def __init__(
+        self,
+        documents: Callable[[], Mapping[str, dict]],
+        objects: Mapping[str, Any],
+    ):
+        self._documents = documents
+        self.objects = objects
+        self.names: list[str] = []
+        self.positions: dict[str, int] = {}
+        self.postings: dict[str, dict[Any, int]] = {}
+        self.built = False
+
+    def build(self) -> None:
+        postings: dict[str, dict[Any, int]] = {
+            field: defaultdict(int) for field in self.fields
+        }
+        names = []
+        for position, (name, document) in enumerate(self._documents().items()):
+            names.append(name)
+            bit = 1 << position
+            for field, values in self.values(document).items():
+                for value in values:
+                    postings[field][value] |= bit
+        self.names = names
+        self.positions = {name: position for position, name in enumerate(names)}
+        self.postings = {field: dict(values) for field, values in postings.items()}
+        self.built = True
+
+    @property
+    def everything(self) -> int:
+        if not self.built:
+            self.build()
+        return (1 << len(self.names)) - 1
+
+    def mask(self, field: str, op: str, bound: Any) -> int:
+        """Bitset of documents whose `field` satisfies `op` against `bound`"""
+        if not self.built:
+            self.build()
+        try:
+            postings = self.postings[field]
+        except KeyError:
+            raise ValueError(
+                f"Can't query {self.noun} by {field}; "
+                f"choose from {', '.join(self.fields)}"
+            )
+        if op == "eq":
+            return postings.get(bound, 0)
+        try:
+            compare = COMPARISONS[op]
+        except KeyError:
+            raise ValueError(f"Unknown comparison {op}")
+        result = 0
+        for value, bits in postings.items():
+            if compare(value, bound):
+                result |= bits
+        return result
+
+    def get(self, name: str) -> Any:
+        """The object a query yields for the document called `name`"""
+        return self.objects[name]
+
+    def where(self, **conditions: Any) -> "BitSet":
+        """
+        Documents matching every condition. Keywords are field names, optionally
+        followed by __lt, __lte, __gt, __gte, __ne or __in.
+        """
+        return BitSet(self, self.everything).where(**conditions)
+
+    def __len__(self) -> int:
+        return self.everything.bit_count()
+
+
+class BitSet:
+    """
+    The result of a query. Combine sets with &, | and -, or narrow one
+    further with `where`. Iterating yields the index's objects.
+    """
+
+    def __init__(self, index: BitsetIndex, bits: int):
+        self.index = index
+        self.bits = bits
+
+    def where(self, **conditions: Any) -> "BitSet":
+        bits = self.bits
+        for key, bound in conditions.items():
+            field, __, op = key.partition("__")
+            bits &= self.index.mask(field, op or "eq", bound)
+        return BitSet(self.index, bits)
+
+    def names(self) -> list[str]:
+        bits, names, result = self.bits, self.index.names, []
+        while bits:
+            low = bits & -bits
+            result.append(names[low.bit_length() - 1])
+            bits ^= low
+        return result
+
+    def __iter__(self) -> Iterator[Any]:
+        return (self.index.get(name) for name in self.names())
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
+
+    def __bool__(self) -> bool:
+        return bool(self.bits)
+
+    def __contains__(self, name: object) -> bool:
+        position = self.index.positions.get(name)
+        if position is None:
+            return False
+        return bool(self.bits >> position & 1)
+
+    def __and__(self, other: "BitSet") -> "BitSet":
+        return BitSet(self.index, self.bits & other.bits)
+
+    def __or__(self, other: "BitSet") -> "BitSet":
+        return BitSet(self.index, self.bits | other.bits)
+
+    def __sub__(self, other: "BitSet") -> "BitSet":
+        return BitSet(self.index, self.bits & ~other.bits)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, BitSet):
+            return self.bits == other.bits
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.names()})"
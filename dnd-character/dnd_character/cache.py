@@ -0,0 +1,121 @@
+"""
+In-memory cache policies and usage counters for the SRD.
+Choose a policy with the SRD_CACHE environment variable:
+    unbounded       (default) keep every document
+    lru:N           keep the N most recently used documents
+    bytes:N         keep recently used documents up to roughly N bytes of JSON
+"""
+import json
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Hashable
+
+
+class UnboundedCache(dict):
+    """Keeps every document for the life of the process"""
+
+    evictions = 0
+
+
+class LRUCache(OrderedDict):
+    """Keeps the `maxsize` most recently used documents"""
+
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self.maxsize = maxsize
+        self.evictions = 0
+
+    def __getitem__(self, key: Hashable) -> Any:
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while self.over_limit():
+            self.popitem(last=False)
+            self.evictions += 1
+
+    def over_limit(self) -> bool:
+        return len(self) > self.maxsize
+
+
+class SizeBoundedCache(LRUCache):
+    """
+    Keeps recently used documents until their total size passes `max_bytes`.
+    A document's size is the length of its JSON encoding, which is a cheap
+    estimate of how much memory it holds relative to other documents.
+    """
+
+    def __init__(self, max_bytes: int):
+        super().__init__(maxsize=0)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.sizes: dict[Hashable, int] = {}
+
+    def __setitem__(self, key: Hashable, value: Any) -> None:
+        self.total_bytes -= self.sizes.pop(key, 0)
+        self.sizes[key] = len(json.dumps(value))
+        self.total_bytes += self.sizes[key]
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: Hashable) -> None:
+        super().__delitem__(key)
+        self.total_bytes -= self.sizes.pop(key)
+
+    def popitem(self, last: bool = True) -> tuple[Hashable, Any]:
+        key, value = super().popitem(last=last)
+        self.total_bytes -= self.sizes.pop(key)
+        return key, value
+
+    def pop(self, key: Hashable, *default: Any) -> Any:
+        # OrderedDict.pop doesn't go through __delitem__
+        if key in self.sizes:
+            self.total_bytes -= self.sizes.pop(key)
+        return super().pop(key, *default)
+
+    def clear(self) -> None:
+        super().clear()
+        self.sizes.clear()
+        self.total_bytes = 0
+
+    def over_limit(self) -> bool:
+        # never evict the document that was just added
+        return self.total_bytes > self.max_bytes and len(self) > 1
+
+
+def make_cache(spec: str) -> dict:
+    """Create a cache from a string such as `lru:2000` or `bytes:50000000`"""
+    kind, __, limit = spec.partition(":")
+    if kind == "unbounded":
+        return UnboundedCache()
+    if kind == "lru":
+        return LRUCache(int(limit))
+    if kind == "bytes":
+        return SizeBoundedCache(int(limit))
+    raise ValueError(f"Unknown SRD cache policy: {spec}")
+
+
+def endpoint(uri: str) -> str:
+    """The endpoint a URI belongs to, e.g. /api/spells for /api/spells/fireball"""
+    return "/".join(uri.split("/")[:3])
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    disk_loads: int = 0
+    live_fetches: int = 0
+    requests_by_endpoint: Counter = field(default_factory=Counter)
+
+    def as_dict(self, evictions: int = 0) -> dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": evictions,
+            "disk_loads": self.disk_loads,
+            "live_fetches": self.live_fetches,
+            "requests_by_endpoint": dict(self.requests_by_endpoint.most_common()),
+        }
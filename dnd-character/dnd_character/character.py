@@ -1,4 +1,5 @@
-from typing import Optional, Union, Iterator, TYPE_CHECKING
+from functools import partial
+from typing import Any, Optional, Union, Iterator, TYPE_CHECKING
 from uuid import uuid4, UUID
 import logging
 
@@ -6,16 +7,43 @@ if TYPE_CHECKING:
     from .classes import _CLASS
     from .spellcasting import _SPELL
 
-from .SRD import SRD, SRD_class_levels
+from .templates import LEVEL_TEMPLATES, class_template
 from .equipment import _Item, Item
+from .inventory import Inventory, is_armor, is_shield
 from .experience import Experience, experience_at_level, level_at_experience
 from .dice import sum_rolls
+from .tracking import TRACKED_TYPES, content_hash, property_names, track
+from .derived import dependents, derived
+from .interning import FrozenDict
 
 
 LOG = logging.getLogger(__package__)
 
 coin_value = {"pp": 10, "gp": 1, "ep": 0.5, "sp": 0.1, "cp": 0.01}
 
+# private attributes which hold the value of a field, for change tracking
+FIELD_ATTRIBUTES = {
+    "_level": "level",
+    "_experience": "experience",
+    "_death_saves": "death_saves",
+    "_death_fails": "death_fails",
+    "_dexterity": "dexterity",
+    "_dead": "dead",
+    "_current_hp": "current_hp",
+    "_inventory": "inventory",
+    "_armor_class": "armor_class",
+    "_max_hp": "max_hp",
+    "_cantrips_known": "cantrips_known",
+    "_spells_known": "spells_known",
+    "_spells_prepared": "spells_prepared",
+}
+
+ABILITIES = ("strength", "dexterity", "constitution", "wisdom", "intelligence", "charisma")
+# abilities by the index used in `spellcasting_stat` and the SRD's saving throws
+ABILITY_INDEXES = {ability[:3]: ability for ability in ABILITIES}
+# abilities which have skills, each in a `skills_<ability>` dict
+SKILL_ABILITIES = ("strength", "dexterity", "wisdom", "intelligence", "charisma")
+
 
 class InvalidParameterError(Exception):
     pass
@@ -107,6 +135,15 @@ class Character:
                 charisma     (int):  character's starting charisma
         """
 
+        # Change tracking, see `dnd_character.tracking`
+        self._dirty: set[str] = set()
+        # fields whose part of the fingerprint is out of date
+        self._stale: set[str] = set()
+        self._field_hashes: dict[str, int] = {}
+        self._fingerprint = 0
+        # cached derived stats, see `dnd_character.derived`
+        self._derived: dict[str, Any] = {}
+
         # Decorative attrs that don't affect program logic
         self.uid: UUID = (
             uuid4() if uid is None else uid if isinstance(uid, UUID) else UUID(uid)
@@ -135,9 +172,11 @@ class Character:
         # DND Class
         self.class_name = class_name
         self.class_index = class_index
-        self._class_levels = (
-            [] if class_index not in SRD_class_levels else SRD_class_levels[class_index]
+        self._level_templates = (
+            () if class_index not in LEVEL_TEMPLATES else LEVEL_TEMPLATES[class_index]
         )
+        # the level whose template was last applied, so level changes apply the difference
+        self._applied_level: Optional[int] = None
         self.prof_bonus = prof_bonus
         self.ability_score_bonus = ability_score_bonus
         self.class_features = class_features if class_features is not None else {}
@@ -157,14 +196,17 @@ class Character:
         self.hd = 8 if hd is None else hd
         self.max_hd = 1 if max_hd is None else max_hd
         self.current_hd = 1 if current_hd is None else current_hd
-        self.max_hp = (
-            Character.get_maximum_hp(
+        # worked out from hit dice, level and constitution unless it's set
+        self._max_hp: Optional[int] = max_hp
+        self._current_hp = (
+            current_hp
+            if current_hp is not None
+            else Character.get_maximum_hp(
                 self.hd, 1 if level is None else int(level), self.constitution
             )
             if max_hp is None
-            else max_hp
+            else int(max_hp)
         )
-        self._current_hp = current_hp if current_hp is not None else int(self.max_hp)
         self.temp_hp = 0 if temp_hp is None else int(temp_hp)
 
         # Spells, Skills, Proficiencies
@@ -269,7 +311,9 @@ class Character:
         self.wealth = final_wealth
 
         # Inventory. Deserialize items and give them one by one
-        self._inventory: list[_Item] = []
+        # armor class is worked out from the equipped armor unless it's set
+        self._armor_class: Optional[int] = None
+        self._inventory = Inventory(changed=self._inventory_changed)
         if inventory is not None:
             for item in inventory:
                 self.give_item(_Item(**item))
@@ -278,11 +322,8 @@ class Character:
         # setting the self.classs attr applies "class features" appropriate to character's level
         self.classs = classs
 
-        # base armor class is 10 + DEX; will be affected by inventory
         if armor_class is not None:
             self.armor_class = armor_class
-        elif not hasattr(self, "armor_class"):
-            self.armor_class = self.base_armor_class
         self._dead = dead
         self._death_saves = death_saves
         self._death_fails = death_fails
@@ -322,6 +363,9 @@ class Character:
                 for k in all_conditions
             }
 
+        # a new character has no changes yet
+        self._start_tracking()
+
     def __str__(self) -> str:
         return (
             f"Name: {self.name}\n"
@@ -357,6 +401,8 @@ class Character:
                     "dexterity",
                     "dead",
                     "current_hp",
+                    "max_hp",
+                    "armor_class",
                     "inventory",
                     "cantrips_known",
                     "spells_known",
@@ -379,6 +425,8 @@ class Character:
                     self._dexterity,
                     self._dead,
                     self._current_hp,
+                    self.max_hp,
+                    self.armor_class,
                     [dict(item) for item in self._inventory],
                     [dict(spell) for spell in self._cantrips_known],
                     [dict(spell) for spell in self._spells_known],
@@ -395,19 +443,152 @@ class Character:
         kwargs = [f"{key}={quote(value)}{value}{quote(value)}" for key, value in self]
         return f"{type(self).__name__}({', '.join(kwargs)})"
 
+    def to_dict(self) -> dict:
+        """
+        A dict with a fixed schema, which refers to SRD spells, items and class
+        features by index. See `dnd_character.serialization`
+        """
+        from .serialization import character_to_dict
+
+        return character_to_dict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Character":
+        from .serialization import character_from_dict
+
+        return character_from_dict(data, cls)
+
+    def to_bytes(self) -> bytes:
+        """`self.to_dict()` encoded as MessagePack"""
+        from .serialization import character_to_bytes
+
+        return character_to_bytes(self)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Character":
+        from .serialization import character_from_bytes
+
+        return character_from_bytes(data, cls)
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        cls._attribute_fields = {}
+
+    # attribute name -> the field it holds, or None if it isn't tracked
+    _attribute_fields: dict[str, Optional[str]] = {}
+    # changes are only tracked once __init__ is done
+    _tracking = False
+
+    def _field(self, name: str) -> Optional[str]:
+        try:
+            return self._attribute_fields[name]
+        except KeyError:
+            field = FIELD_ATTRIBUTES.get(name, name)
+            if field.startswith("_") or name in property_names(type(self)):
+                # properties set the attributes which hold their values
+                field = None
+            self._attribute_fields[name] = field
+            return field
+
+    def _start_tracking(self) -> None:
+        for name, value in list(self.__dict__.items()):
+            field = self._field(name)
+            if field is None:
+                continue
+            if type(value) in TRACKED_TYPES:
+                value = track(value, partial(self.mark_dirty, field))
+                object.__setattr__(self, name, value)
+            self._stale.add(field)
+        self._dirty.clear()
+        self._derived.clear()
+        self._tracking = True
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if self._tracking:
+            field = self._field(name)
+            if field is not None:
+                if type(value) in TRACKED_TYPES:
+                    # copied, so that changes to them are seen too
+                    value = track(value, partial(self.mark_dirty, field))
+                self._dirty.add(field)
+                self._stale.add(field)
+                self._invalidate(field)
+        object.__setattr__(self, name, value)
+
+    def _invalidate(self, field: str) -> None:
+        """Forgets the derived stats worked out from `field`"""
+        for stat in dependents(type(self)).get(field, ()):
+            self._derived.pop(stat.name, None)
+            if stat.settable:
+                # the stat is a field too
+                self._stale.add(stat.name)
+
+    def mark_dirty(self, *fields: str) -> None:
+        """
+        Records that `fields` changed. Called whenever a field is assigned or a
+        dict or list field is changed in place; call it after changing anything
+        inside those, e.g. an item's quantity: `character.mark_dirty("inventory")`
+        """
+        self._dirty.update(fields)
+        self._stale.update(fields)
+        for field in fields:
+            self._invalidate(field)
+
+    def mark_clean(self) -> None:
+        """Forget the changes made so far, e.g. after saving this character"""
+        self._dirty.clear()
+
+    @property
+    def dirty_fields(self) -> frozenset[str]:
+        """Fields changed since this character was created, loaded or marked clean"""
+        return frozenset(self._dirty)
+
+    @property
+    def is_dirty(self) -> bool:
+        return bool(self._dirty)
+
+    @property
+    def fingerprint(self) -> int:
+        """
+        A hash of this character's content. Only the parts of fields which
+        changed since the last time it was read are hashed again.
+        """
+        if self._stale:
+            fingerprint = self._fingerprint
+            hashes = self._field_hashes
+            for field in self._stale:
+                fingerprint ^= hashes.pop(field, 0)
+                try:
+                    value = getattr(self, field)
+                except AttributeError:
+                    continue
+                hashes[field] = field_hash = hash((field, content_hash(value)))
+                fingerprint ^= field_hash
+            self._stale.clear()
+            self._fingerprint = fingerprint
+        return self._fingerprint
+
     def __eq__(self, other) -> bool:
         """
         Check if `other` is an identical character to `self`
         Or if `other` is a dict that would construct an identical character
+
+        Characters with different fingerprints are unequal. Fingerprints are
+        built from `hash`, which collides for values as close as -1 and -2, so
+        when they match the fields' values are compared too. That stops at the
+        first difference and needs no serialization, unlike comparing `dict`s.
         """
         if type(other) is dict:
             other = Character(**other)
         if not isinstance(other, type(self)):
             return False
-        for pair1, pair2 in zip(self, other):
-            if pair1 != pair2:
-                return False
-        return True
+        if self.fingerprint != other.fingerprint:
+            return False
+        if self._field_hashes.keys() != other._field_hashes.keys():
+            return False
+        return all(
+            getattr(self, field) == getattr(other, field) for field in self._field_hashes
+        )
 
     @property
     def cantrips_known(self) -> list["_SPELL"]:
@@ -434,9 +615,23 @@ class Character:
         self._spells_prepared = new_val
 
     @property
-    def inventory(self) -> list[_Item]:
+    def inventory(self) -> Inventory:
         return self._inventory
 
+    def _inventory_changed(self, slots: bool) -> None:
+        self.mark_dirty("inventory")
+        if slots:
+            self.reset_armor_class()
+
+    @derived("dexterity", "inventory", settable=True)
+    def armor_class(self) -> int:
+        """Worked out from the equipped armor and shield, unless it was set"""
+        return self._inventory.armor_class(self.dexterity_modifier)
+
+    def reset_armor_class(self) -> None:
+        """Works out armor class again, e.g. after changing an equipped item"""
+        del self.armor_class
+
     @property
     def dead(self) -> bool:
         return self._dead
@@ -477,6 +672,11 @@ class Character:
         else:
             self._death_fails = new_value
 
+    @derived("hd", "level", "constitution", settable=True)
+    def max_hp(self) -> int:
+        """Worked out from hit dice, level and constitution, unless it was set"""
+        return Character.get_maximum_hp(self.hd, self.level, self.constitution)
+
     @property
     def current_hp(self) -> int:
         return self._current_hp
@@ -496,9 +696,75 @@ class Character:
     @dexterity.setter
     def dexterity(self, new_value: int) -> None:
         self._dexterity = new_value
-        self.armor_class = self.base_armor_class
-        for item in self.inventory:
-            self.apply_armor_class(item)
+        self.reset_armor_class()
+
+    @derived("strength")
+    def strength_modifier(self) -> int:
+        return Character.get_ability_modifier(self.strength)
+
+    @derived("dexterity")
+    def dexterity_modifier(self) -> int:
+        return Character.get_ability_modifier(self.dexterity)
+
+    @derived("constitution")
+    def constitution_modifier(self) -> int:
+        return Character.get_ability_modifier(self.constitution)
+
+    @derived("wisdom")
+    def wisdom_modifier(self) -> int:
+        return Character.get_ability_modifier(self.wisdom)
+
+    @derived("intelligence")
+    def intelligence_modifier(self) -> int:
+        return Character.get_ability_modifier(self.intelligence)
+
+    @derived("charisma")
+    def charisma_modifier(self) -> int:
+        return Character.get_ability_modifier(self.charisma)
+
+    def ability_modifier(self, ability: str) -> int:
+        """The modifier of an ability, by name ("wisdom") or index ("wis")"""
+        return getattr(self, f"{ABILITY_INDEXES.get(ability, ability)}_modifier")
+
+    @derived(
+        "prof_bonus",
+        *SKILL_ABILITIES,
+        *(f"skills_{ability}" for ability in SKILL_ABILITIES),
+    )
+    def skill_bonuses(self) -> FrozenDict:
+        """
+        The bonus to each skill check: the ability's modifier, plus the
+        proficiency bonus for skills the character is proficient in
+        """
+        bonuses = {}
+        for ability in SKILL_ABILITIES:
+            modifier = self.ability_modifier(ability)
+            for skill, proficient in getattr(self, f"skills_{ability}").items():
+                bonuses[skill] = modifier + (self.prof_bonus if proficient else 0)
+        return FrozenDict(bonuses)
+
+    @derived("prof_bonus", "saving_throws", *ABILITIES)
+    def saving_throw_bonuses(self) -> FrozenDict:
+        """The bonus to each ability's saving throws, e.g. `["wisdom"]`"""
+        proficient = {name.lower() for name in self.saving_throws}
+        return FrozenDict(
+            {
+                ability: self.ability_modifier(ability)
+                + (self.prof_bonus if index in proficient else 0)
+                for index, ability in ABILITY_INDEXES.items()
+            }
+        )
+
+    @derived("prof_bonus", "wisdom", "skills_wisdom")
+    def passive_perception(self) -> int:
+        return 10 + self.skill_bonuses.get("perception", self.wisdom_modifier)
+
+    @derived("prof_bonus", "spellcasting_stat", *ABILITIES)
+    def spell_save_dc(self) -> Optional[int]:
+        """8 + proficiency bonus + spellcasting ability modifier, or None if not a spellcaster"""
+        if self.spellcasting_stat is None:
+            return None
+        return 8 + self.prof_bonus + self.ability_modifier(self.spellcasting_stat)
 
     @property
     def experience(self) -> Experience:
@@ -534,6 +800,8 @@ class Character:
         if new_class is None:
             return
 
+        template = class_template(new_class)
+
         def set_class() -> None:
             """
             Set miscellaneous class-related properties such as:
@@ -543,7 +811,8 @@ class Character:
             self.class_name = new_class.name
             self.class_index = new_class.index
             self.hd = new_class.hit_die
-            self._class_levels = SRD_class_levels[self.class_index]
+            self._level_templates = template.levels
+            self._applied_level = None
             if new_class.spellcasting:
                 self.spellcasting_stat = new_class.spellcasting["spellcasting_ability"][
                     "index"
@@ -553,77 +822,23 @@ class Character:
             self.apply_class_level()
 
             # create dict such as { "all-armor": {"name": "All armor", "type": "Armor"} }
-            for proficiency in new_class.proficiencies:
-                data = SRD(proficiency["url"])
-                self.proficiencies[proficiency["index"]] = {
-                    "name": data["name"],
-                    "type": data["type"],
-                }
-
-            self.saving_throws = [
-                saving_throw["name"] for saving_throw in new_class.saving_throws
-            ]
+            for index, proficiency in template.proficiencies:
+                self.proficiencies[index] = dict(proficiency)
+
+            self.saving_throws = list(template.saving_throws)
 
         def set_starting_equipment() -> None:
             """
             Sets `player_options["starting_equipment"]` to a list of strings
             """
-            for starting_equipment in new_class.starting_equipment:
-                new_item = Item(starting_equipment["equipment"]["index"])
-                new_item.quantity = starting_equipment["quantity"]
+            for index, quantity in template.starting_equipment:
+                new_item = Item(index)
+                new_item.quantity = quantity
                 self.give_item(new_item)
 
-            self.player_options["starting_equipment"] = []
-
-            def add_to_starting_options(choice: str) -> None:
-                self.player_options["starting_equipment"].append(choice)
-
-            def fetch_choices_string(option: dict[str, dict[str, str]]) -> str:
-                choices = SRD(option["equipment_category"]["url"])["equipment"]
-                choices_names = [c["name"] for c in choices]
-                return "{} (choice from {})".format(
-                    option["equipment_category"]["name"], ", ".join(choices_names)
-                )
-
-            for item_option in new_class.starting_equipment_options:
-                options = []
-                opts = item_option["from"]
-                if "options" not in opts.keys():
-                    choices = fetch_choices_string(opts)
-                    add_to_starting_options(choices)
-
-                else:
-                    for opt in opts["options"]:
-                        opt_type = opt["option_type"]
-                        if opt_type == "counted_reference":
-                            options.append(
-                                "{} x {}".format(opt["count"], opt["of"]["name"])
-                            )
-                        elif opt_type == "choice":
-                            how_many = opt["choice"]["choose"]
-                            choices = fetch_choices_string(opt["choice"]["from"])
-                            options.append("{} x {}".format(how_many, choices))
-                        elif opt_type == "multiple":
-                            try:
-                                combo = [
-                                    str(c["count"]) + " " + c["of"]["name"]
-                                    for c in opt["items"]
-                                ]
-                                add_to_starting_options("{}".format(", ".join(combo)))
-                            except KeyError:
-                                # shield or martial weapon
-                                martial_weapons = fetch_choices_string(
-                                    opt["items"][0]["choice"]["from"]
-                                )
-                                shield = opt["items"][1]["of"]["name"]
-                                add_to_starting_options(
-                                    "choose 1 from {} or a {}".format(
-                                        martial_weapons, shield
-                                    )
-                                )
-                                continue
-
-                    add_to_starting_options("choose from {}".format(", ".join(options)))
+            self.player_options["starting_equipment"] = list(
+                template.starting_equipment_options
+            )
 
         set_class()
         set_starting_equipment()
@@ -633,24 +848,50 @@ class Character:
         Applies changes based on the character's class and level
         e.g., adds new class features, spell slots
         Called by `level.setter` and `classs.setter`
+
+        Only the class features gained or lost since the last level applied are
+        added or removed; the first time, every feature up to this level is added.
         """
-        if self.level > 20:
+        templates = self._level_templates
+        if not 0 < self.level <= 20 or not templates:
             return
-        for data in self._class_levels:
-            if data["level"] > self.level:
-                break
-            self.ability_score_bonus = data.get(
-                "ability_score_bonuses", self.ability_score_bonus
-            )
-            self.prof_bonus = data.get("prof_bonus", self.prof_bonus)
-            for feat in data["features"]:
-                self.class_features[feat["index"]] = SRD(feat["url"])
-            while len(self.class_features_enabled) < len(self.class_features):
-                self.class_features_enabled.append(True)
-
-            # Fetch new spell slots
-            spell_slots = data.get("spellcasting", self.spell_slots)
-            self.set_spell_slots(spell_slots)
+        template = templates[self.level]
+        if template.ability_score_bonus is not None:
+            self.ability_score_bonus = template.ability_score_bonus
+        if template.prof_bonus is not None:
+            self.prof_bonus = template.prof_bonus
+
+        # each level's features start with the previous level's
+        features = template.features
+        if self._applied_level is not None:
+            applied = templates[self._applied_level].features
+            if len(applied) > len(features):
+                self.remove_class_features(
+                    [index for index, __ in applied[len(features) :]]
+                )
+            features = features[len(applied) :]
+        if features:
+            self.class_features.update(features)
+        missing = len(self.class_features) - len(self.class_features_enabled)
+        if missing > 0:
+            self.class_features_enabled.extend([True] * missing)
+        self._applied_level = self.level
+
+        # Fetch new spell slots
+        spell_slots = template.spell_slots
+        self.set_spell_slots(spell_slots if spell_slots is not None else self.spell_slots)
+
+    def remove_class_features(self, indexes: list[str]) -> None:
+        """Removes class features, and whether each is enabled, e.g. when levelling down"""
+        lost = set(indexes)
+        enabled = self.class_features_enabled
+        self.class_features_enabled = [
+            is_enabled
+            for index, is_enabled in zip(self.class_features, enabled)
+            if index not in lost
+        ] + enabled[len(self.class_features) :]
+        for index in lost:
+            self.class_features.pop(index, None)
 
     def set_spell_slots(self, new_spell_slots: dict[str, int]) -> dict[str, int]:
         default_spell_slots = {
@@ -666,10 +907,12 @@ class Character:
             "spell_slots_level_8": 0,
             "spell_slots_level_9": 0,
         }
-        self.spell_slots = new_spell_slots if new_spell_slots is not None else {}
+        # copy, because the SRD's spell slots are shared between characters
+        spell_slots = dict(new_spell_slots) if new_spell_slots is not None else {}
         for key in default_spell_slots:
-            if key not in self.spell_slots:
-                self.spell_slots[key] = default_spell_slots[key]
+            if key not in spell_slots:
+                spell_slots[key] = default_spell_slots[key]
+        self.spell_slots = spell_slots
 
     @property
     def level(self) -> int:
@@ -677,12 +920,13 @@ class Character:
 
     @level.setter
     def level(self, new_level: int) -> None:
-        self._level = new_level
         if self.current_hp == self.max_hp:
+            # limited to the maximum hit points before this level
             self.current_hp = Character.get_maximum_hp(
                 self.hd, new_level, self.constitution
             )
-        self.max_hp = Character.get_maximum_hp(self.hd, new_level, self.constitution)
+        self._level = new_level
+        del self.max_hp
         if self.current_hd == self.max_hd:
             self.current_hd = new_level
         self.max_hd = new_level
@@ -690,76 +934,45 @@ class Character:
             self.current_hd = self.max_hd
         self.apply_class_level()
 
-    def remove_shields(self) -> None:
+    def remove_shields(self, keep: Optional[_Item] = None) -> None:
         """Removes all shields from self._inventory. Used by self.give_item when equipping shield"""
-        for i, item in enumerate(self._inventory):
-            if (
-                item.equipment_category["index"] == "armor"
-                and item.armor_category == "Shield"
-            ):
-                self._inventory.pop(i)
-
-    def remove_armor(self) -> None:
+        for item in self._inventory.category("armor"):
+            if is_shield(item) and item is not keep:
+                self._inventory.remove(item)
+
+    def remove_armor(self, keep: Optional[_Item] = None) -> None:
         """Removes all armor from self._inventory. Used by self.give_item when equipping armor"""
-        for i, item in enumerate(self._inventory):
-            if (
-                item.equipment_category["index"] == "armor"
-                and item.armor_category != "Shield"
-            ):
-                self._inventory.pop(i)
+        for item in self._inventory.category("armor"):
+            if is_armor(item) and item is not keep:
+                self._inventory.remove(item)
 
     def apply_armor_class(self, item: _Item) -> None:
-        if item.equipment_category["index"] == "armor":
-            if item.armor_category == "Shield":
-                self.remove_shields()
-                try:
-                    self.armor_class += item.armor_class["base"] # type: ignore
-                except AttributeError:
-                    # shield during __init__ without armor
-                    self.armor_class = (
-                        10
-                        + item.armor_class["base"]
-                        + Character.get_ability_modifier(self.dexterity)
-                    )
-            else:
-                self.remove_armor()
-                self.armor_class = item.armor_class["base"] + (
-                    0
-                    if not item.armor_class["dex_bonus"]
-                    else Character.get_ability_modifier(self.dexterity)
-                )
+        """Equips armor or a shield in place of any others, which are removed"""
+        if is_shield(item):
+            self.remove_shields(keep=item)
+            self._inventory.equip(item)
+        elif is_armor(item):
+            self.remove_armor(keep=item)
+            self._inventory.equip(item)
 
     @property
     def base_armor_class(self) -> int:
-        return 10 + Character.get_ability_modifier(self.dexterity)
+        return 10 + self.dexterity_modifier
 
-    def give_item(self, item: _Item) -> None:
+    def give_item(self, item: _Item, stack: bool = False) -> _Item:
         """
-        Adds an item to the Character's inventory list.
-        If the item is armor or a shield, the armor_class attribute will be set
+        Adds an item to the Character's inventory.
+        If the item is armor or a shield, it is equipped, setting armor_class,
         and any other armor/shields in the inventory will be removed.
+        With `stack`, an unchanged SRD item already in the inventory has its
+        quantity increased instead; the item kept is returned.
         """
-        self.apply_armor_class(item)
-        self.inventory.append(item)
-
-    def remove_item(self, item: _Item) -> None:
         if item.equipment_category["index"] == "armor":
-            if item.armor_category == "Shield":
-                self.armor_class -= item.armor_class["base"]
-            else:
-                extra_ac_bonus = 0
-                shield = [
-                    item
-                    for item in self._inventory
-                    if item.equipment_category["index"] == "armor"
-                    and item.armor_category == "Shield"
-                ]
-                if shield:
-                    extra_ac_bonus = shield[0].armor_class["base"]
-                self.armor_class = (
-                    10 + extra_ac_bonus + Character.get_ability_modifier(self.dexterity)
-                )
+            self.apply_armor_class(item)
+            return item
+        return self._inventory.add(item, stack)
 
+    def remove_item(self, item: _Item) -> None:
         self._inventory.remove(item)
 
     def change_wealth(
@@ -1,6 +1,6 @@
 from typing import Optional
 from dataclasses import dataclass
-from .SRD import SRD_classes
+from .SRD import LazyMapping, SRD_classes
 from .character import Character
 
 
@@ -22,9 +22,12 @@ class _CLASS:
     spells: Optional[str] = None
 
 
-CLASSES = {
-    class_index: _CLASS(**class_data) for class_index, class_data in SRD_classes.items()
-}
+CLASSES = LazyMapping(
+    lambda: {
+        class_index: lambda class_index=class_index: _CLASS(**SRD_classes[class_index])
+        for class_index in SRD_classes
+    }
+)
 
 
 def Barbarian(**kwargs) -> Character:
@@ -0,0 +1,179 @@
+"""
+Columnar views of SRD documents as NumPy arrays, for vectorized filtering
+and aggregation over a whole catalog instead of loops over objects:
+
+    from dnd_character.monsters import monster_table
+    table = monster_table()
+    undead = table["type"] == table.code("type", "undead")
+    table["hit_points"][undead].mean()
+
+Text columns are categorical: each value is stored as a small integer code,
+and -1 means the document has no value. Tables are saved as .npz files in
+the JSON cache and rebuilt when the documents they came from change.
+
+numpy is an optional dependency of this package: `pip install numpy`
+"""
+import hashlib
+import logging
+from os import path, remove, replace
+from typing import TYPE_CHECKING, Any, Callable, Mapping, Optional
+
+from .SRD import JSON_CACHE, SRD
+from .manifest import content_hash, encode
+
+if TYPE_CHECKING:
+    import numpy
+
+LOG = logging.getLogger(__package__)
+
+COLUMNS_VERSION = 1
+
+# column name -> (kind, getter); kind is a NumPy dtype such as "int16" or
+# "str", or "category"
+Columns = dict[str, tuple[str, Callable[[dict], Any]]]
+
+
+class ColumnTable:
+    """
+    One row per document, in the order of `index`. `categories[column]`
+    lists the value of each code in a categorical column.
+    """
+
+    def __init__(
+        self,
+        columns: dict[str, "numpy.ndarray"],
+        categories: dict[str, list[str]],
+    ):
+        self.columns = columns
+        self.categories = categories
+
+    @property
+    def index(self) -> "numpy.ndarray":
+        return self.columns["index"]
+
+    def __getitem__(self, column: str) -> "numpy.ndarray":
+        return self.columns[column]
+
+    def __contains__(self, column: str) -> bool:
+        return column in self.columns
+
+    def __len__(self) -> int:
+        return len(self.columns["index"])
+
+    def code(self, column: str, value: str) -> int:
+        """The code of `value` in a categorical column, or -1 if no row has it"""
+        try:
+            return self.categories[column].index(value)
+        except ValueError:
+            return -1
+
+    def decode(self, column: str) -> list[Optional[str]]:
+        """The values of a categorical column"""
+        labels = self.categories[column]
+        return [None if code < 0 else labels[code] for code in self.columns[column]]
+
+    def rows(self, mask: "numpy.ndarray") -> list[str]:
+        """Indexes of the documents selected by a boolean `mask`"""
+        return self.index[mask].tolist()
+
+    def save(self, filepath: str, fingerprint: str) -> None:
+        import numpy
+
+        arrays = {f"column_{name}": values for name, values in self.columns.items()}
+        for name, labels in self.categories.items():
+            arrays[f"category_{name}"] = numpy.array(labels, dtype=str)
+        arrays["fingerprint"] = numpy.array(fingerprint)
+        # numpy adds .npz unless the name already ends with it
+        tmp = f"{filepath}.tmp.npz"
+        try:
+            numpy.savez(tmp, **arrays)
+            replace(tmp, filepath)
+        finally:
+            if path.exists(tmp):
+                remove(tmp)
+
+    @classmethod
+    def load(cls, filepath: str, fingerprint: str) -> Optional["ColumnTable"]:
+        """Returns the saved table, or None if it is missing or out of date"""
+        import numpy
+
+        if not path.exists(filepath):
+            return None
+        try:
+            with numpy.load(filepath, allow_pickle=False) as data:
+                if str(data["fingerprint"]) != fingerprint:
+                    return None
+                columns, categories = {}, {}
+                for key in data.files:
+                    kind, __, name = key.partition("_")
+                    if kind == "column":
+                        columns[name] = data[key]
+                    elif kind == "category":
+                        categories[name] = data[key].tolist()
+        except (OSError, ValueError, KeyError) as e:
+            LOG.error(f"Ignoring column cache {filepath}: {str(e)}")
+            return None
+        return cls(columns, categories)
+
+
+def fingerprint(documents: Mapping[str, dict], spec: Columns) -> str:
+    """
+    Identifies the documents' content and the columns made from them. Uses
+    the manifest's hash of each document if it has one, else hashes it here.
+    """
+    digest = hashlib.sha256(f"{COLUMNS_VERSION} {' '.join(spec)}".encode())
+    manifest = SRD.manifest
+    for index, document in documents.items():
+        entry = None if manifest is None else manifest.get(document["url"])
+        digest.update(index.encode())
+        if entry is None:
+            digest.update(content_hash(encode(document)).encode())
+        else:
+            digest.update(entry["sha256"].encode())
+    return digest.hexdigest()
+
+
+def build_table(documents: Mapping[str, dict], spec: Columns) -> ColumnTable:
+    import numpy
+
+    columns: dict[str, "numpy.ndarray"] = {
+        "index": numpy.array(list(documents), dtype=str)
+    }
+    categories: dict[str, list[str]] = {}
+    for name, (kind, get) in spec.items():
+        values = [get(document) for document in documents.values()]
+        if kind != "category":
+            columns[name] = numpy.array(values, dtype=kind)
+            continue
+        labels = sorted({value for value in values if value is not None})
+        codes = {label: code for code, label in enumerate(labels)}
+        dtype = numpy.int8 if len(labels) < 128 else numpy.int16
+        columns[name] = numpy.array(
+            [-1 if value is None else codes[value] for value in values], dtype=dtype
+        )
+        categories[name] = labels
+    return ColumnTable(columns, categories)
+
+
+def cached_table(name: str, documents: Mapping[str, dict], spec: Columns) -> ColumnTable:
+    """The table saved as `name`.npz in the JSON cache, rebuilt if it is stale"""
+    filepath = f"{JSON_CACHE}/{name}.npz"
+    key = fingerprint(documents, spec)
+    table = ColumnTable.load(filepath, key)
+    if table is None:
+        table = build_table(documents, spec)
+        try:
+            table.save(filepath, key)
+        except OSError as e:
+            LOG.error(f"Couldn't save column cache {filepath}: {str(e)}")
+    return table
+
+
+def feet(distance: Optional[str]) -> int:
+    """30 from "30 ft.", or 0"""
+    if not distance:
+        return 0
+    try:
+        return int(distance.split()[0])
+    except ValueError:
+        return 0
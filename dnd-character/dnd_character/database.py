@@ -0,0 +1,261 @@
+"""
+An optional SQLite store for the SRD. Raw documents are kept alongside
+indexed columns for the spell, monster and equipment fields we filter on,
+so those questions can be answered without loading every document.
+
+Build with `python -m dnd_character.pack build --format sqlite`
+The file is opened read-only, so any number of processes can share it.
+"""
+import json
+import logging
+import sqlite3
+import threading
+from os import path, remove, replace
+from typing import Iterator, Optional
+
+from .snapshot import iter_json_cache
+
+LOG = logging.getLogger(__package__)
+
+DATABASE_FILENAME = "srd.sqlite3"
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE documents (
+    uri TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    sha256 TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE spells (
+    "index" TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    school TEXT NOT NULL,
+    ritual INTEGER NOT NULL,
+    concentration INTEGER NOT NULL
+);
+CREATE TABLE spell_classes (
+    spell TEXT NOT NULL REFERENCES spells("index"),
+    class TEXT NOT NULL,
+    PRIMARY KEY (class, spell)
+) WITHOUT ROWID;
+CREATE TABLE monsters (
+    "index" TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    challenge_rating REAL NOT NULL,
+    type TEXT NOT NULL,
+    size TEXT NOT NULL
+);
+CREATE TABLE equipment (
+    "index" TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    equipment_category TEXT NOT NULL
+);
+CREATE INDEX spells_level ON spells (level);
+CREATE INDEX spells_school ON spells (school);
+CREATE INDEX spells_ritual ON spells (ritual);
+CREATE INDEX spells_concentration ON spells (concentration);
+CREATE INDEX monsters_challenge_rating ON monsters (challenge_rating);
+CREATE INDEX monsters_type ON monsters (type);
+CREATE INDEX monsters_size ON monsters (size);
+CREATE INDEX equipment_category ON equipment (equipment_category);
+"""
+
+
+class DatabaseError(Exception):
+    pass
+
+
+def _insert_columns(db: sqlite3.Connection, uri: str, data: dict) -> None:
+    if uri.startswith("/api/spells/"):
+        db.execute(
+            "INSERT INTO spells VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                data["index"],
+                data["name"],
+                data["level"],
+                data["school"]["index"],
+                data["ritual"],
+                data["concentration"],
+            ),
+        )
+        db.executemany(
+            "INSERT INTO spell_classes VALUES (?, ?)",
+            [(data["index"], classs["index"]) for classs in data["classes"]],
+        )
+    elif uri.startswith("/api/monsters/"):
+        db.execute(
+            "INSERT INTO monsters VALUES (?, ?, ?, ?, ?)",
+            (
+                data["index"],
+                data["name"],
+                data["challenge_rating"],
+                data["type"],
+                data["size"],
+            ),
+        )
+    elif uri.startswith("/api/equipment/"):
+        db.execute(
+            "INSERT INTO equipment VALUES (?, ?, ?)",
+            (data["index"], data["name"], data["equipment_category"]["index"]),
+        )
+
+
+def build_database(cache_dir: str, output: str, version: str = "") -> int:
+    """
+    Writes every JSON document in `cache_dir` into a SQLite database at `output`.
+    The file is written next to `output` first and renamed into place.
+    Returns the number of documents written.
+    """
+    from .manifest import content_hash, encode
+
+    tmp = f"{output}.tmp"
+    if path.exists(tmp):
+        remove(tmp)
+    count = 0
+    try:
+        db = sqlite3.connect(tmp)
+        with db:
+            db.executescript(SCHEMA)
+            db.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [("schema_version", str(SCHEMA_VERSION)), ("version", version)],
+            )
+            for uri, fp in sorted(iter_json_cache(cache_dir)):
+                with open(fp, "r") as f:
+                    text = f.read()
+                data = json.loads(text)
+                db.execute(
+                    "INSERT INTO documents VALUES (?, ?, ?)",
+                    (uri, text, content_hash(encode(data))),
+                )
+                _insert_columns(db, uri, data)
+                count += 1
+        db.execute("VACUUM")
+        db.close()
+        replace(tmp, output)
+    finally:
+        if path.exists(tmp):
+            remove(tmp)
+    return count
+
+
+class SRDDatabase:
+    """
+    Read-only connection to a database made by `build_database`.
+    Query methods return lists of indexes, sorted by name.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            f"file:{filepath}?mode=ro&immutable=1", uri=True, check_same_thread=False
+        )
+        try:
+            meta = dict(self._db.execute("SELECT key, value FROM meta"))
+        except sqlite3.DatabaseError as e:
+            self.close()
+            raise DatabaseError(f"{filepath} is not an SRD database") from e
+        if meta.get("schema_version") != str(SCHEMA_VERSION):
+            self.close()
+            raise DatabaseError(
+                f"{filepath} has schema version {meta.get('schema_version')}, expected {SCHEMA_VERSION}"
+            )
+        self.version: str = meta.get("version", "")
+        # the manifest's hash of each document's content when this was built
+        self.digests: dict[str, str] = dict(
+            self._query("SELECT uri, sha256 FROM documents")
+        )
+
+    def _query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def __contains__(self, uri: str) -> bool:
+        return bool(self._query("SELECT 1 FROM documents WHERE uri = ?", (uri,)))
+
+    def __len__(self) -> int:
+        return self._query("SELECT COUNT(*) FROM documents")[0][0]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([row[0] for row in self._query("SELECT uri FROM documents")])
+
+    def get(self, uri: str) -> Optional[dict]:
+        rows = self._query("SELECT data FROM documents WHERE uri = ?", (uri,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def _select(self, table: str, where: list[str], params: list) -> list[str]:
+        sql = f'SELECT {table}."index" FROM {table}'
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return [row[0] for row in self._query(sql + " ORDER BY name", tuple(params))]
+
+    def spells(
+        self,
+        *,
+        classs: Optional[str] = None,
+        level: Optional[int] = None,
+        school: Optional[str] = None,
+        ritual: Optional[bool] = None,
+        concentration: Optional[bool] = None,
+    ) -> list[str]:
+        where, params = [], []
+        if classs is not None:
+            where.append(
+                'spells."index" IN (SELECT spell FROM spell_classes WHERE class = ?)'
+            )
+            params.append(classs)
+        for column, value in (
+            ("level", level),
+            ("school", school),
+            ("ritual", ritual),
+            ("concentration", concentration),
+        ):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        return self._select("spells", where, params)
+
+    def monsters(
+        self,
+        *,
+        min_cr: Optional[float] = None,
+        max_cr: Optional[float] = None,
+        type: Optional[str] = None,
+        size: Optional[str] = None,
+    ) -> list[str]:
+        where, params = [], []
+        if min_cr is not None:
+            where.append("challenge_rating >= ?")
+            params.append(min_cr)
+        if max_cr is not None:
+            where.append("challenge_rating <= ?")
+            params.append(max_cr)
+        if type is not None:
+            where.append("type = ?")
+            params.append(type)
+        if size is not None:
+            where.append("size = ?")
+            params.append(size)
+        return self._select("monsters", where, params)
+
+    def equipment(self, *, category: Optional[str] = None) -> list[str]:
+        if category is None:
+            return self._select("equipment", [], [])
+        return self._select("equipment", ["equipment_category = ?"], [category])
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def open_database(filepath: str) -> Optional[SRDDatabase]:
+    """Returns an SRDDatabase, or None if the file is missing or unusable"""
+    if not path.exists(filepath):
+        return None
+    try:
+        return SRDDatabase(filepath)
+    except DatabaseError as e:
+        LOG.error(f"Ignoring SRD database: {str(e)}")
+        return None
@@ -0,0 +1,87 @@
+"""
+Derived statistics for Character: values worked out from its fields, such as
+ability modifiers and skill bonuses. Each declares the fields it's worked out
+from, and is cached until one of those changes.
+
+    @derived("strength")
+    def strength_modifier(self) -> int: ...
+
+Changes are seen the same way as by change tracking (see
+`dnd_character.tracking`), so values are only cached once a character is
+fully built.
+"""
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+
+class DerivedStat(property):
+    """
+    A read-only property whose value is cached in the instance's `_derived`
+    dict. A `settable` stat can also be set, overriding the worked out value
+    until it's deleted; the value set is kept in the attribute `_<name>`.
+    """
+
+    def __init__(
+        self, function: Callable[[Any], Any], inputs: tuple[str, ...], settable: bool
+    ):
+        super().__init__(
+            function,
+            self._set if settable else None,
+            self._reset if settable else None,
+            function.__doc__,
+        )
+        self.name = function.__name__
+        self.inputs = inputs
+        self.settable = settable
+        self.attribute = f"_{self.name}"
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+        if self.settable:
+            value = instance.__dict__.get(self.attribute)
+            if value is not None:
+                return value
+        cache = instance._derived
+        try:
+            return cache[self.name]
+        except KeyError:
+            pass
+        value = self.fget(instance)
+        if instance._tracking:
+            cache[self.name] = value
+        return value
+
+    def _set(self, instance: Any, value: Any) -> None:
+        setattr(instance, self.attribute, value)
+
+    def _reset(self, instance: Any) -> None:
+        setattr(instance, self.attribute, None)
+
+
+def derived(
+    *inputs: str, settable: bool = False
+) -> Callable[[Callable[[Any], Any]], DerivedStat]:
+    """Makes a method into a DerivedStat worked out from the fields `inputs`"""
+
+    def decorator(function: Callable[[Any], Any]) -> DerivedStat:
+        return DerivedStat(function, inputs, settable)
+
+    return decorator
+
+
+@lru_cache(maxsize=None)
+def dependents(cls: type) -> dict[str, tuple[DerivedStat, ...]]:
+    """The derived stats of `cls` worked out from each field"""
+    stats: dict[str, list[DerivedStat]] = {}
+    seen = set()
+    for klass in cls.__mro__:
+        for name, value in vars(klass).items():
+            if name in seen:
+                # overridden in a subclass
+                continue
+            seen.add(name)
+            if isinstance(value, DerivedStat):
+                for field in value.inputs:
+                    stats.setdefault(field, []).append(value)
+    return {field: tuple(found) for field, found in stats.items()}
@@ -0,0 +1,244 @@
+"""
+Encounter building from the Dungeon Master's Guide: XP thresholds for a
+party, adjusted XP for a group of monsters, and a search for groups of SRD
+monsters which make an encounter of the wanted difficulty.
+
+    python -m dnd_character.encounters 3 3 4 5 --difficulty hard --type undead
+"""
+import argparse
+import random
+from bisect import bisect_left
+from itertools import accumulate
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from .monsters import SRD_monsters, monsters
+from .bitset import BitSet
+
+DIFFICULTIES = ("easy", "medium", "hard", "deadly")
+
+# XP threshold per character for each difficulty, by character level
+XP_THRESHOLDS = {
+    1: (25, 50, 75, 100),
+    2: (50, 100, 150, 200),
+    3: (75, 150, 225, 400),
+    4: (125, 250, 375, 500),
+    5: (250, 500, 750, 1100),
+    6: (300, 600, 900, 1400),
+    7: (350, 750, 1100, 1700),
+    8: (450, 900, 1400, 2100),
+    9: (550, 1100, 1600, 2400),
+    10: (600, 1200, 1900, 2800),
+    11: (800, 1600, 2400, 3600),
+    12: (1000, 2000, 3000, 4500),
+    13: (1100, 2200, 3400, 5100),
+    14: (1250, 2500, 3800, 5700),
+    15: (1400, 2800, 4300, 6400),
+    16: (1600, 3200, 4800, 7200),
+    17: (2000, 3900, 5900, 8800),
+    18: (2100, 4200, 6300, 9500),
+    19: (2400, 4900, 7300, 10900),
+    20: (2800, 5700, 8500, 12700),
+}
+
+MULTIPLIERS = (0.5, 1, 1.5, 2, 2.5, 3, 4, 5)
+# the smallest number of monsters for each multiplier from 1 to 4
+MULTIPLIER_COUNTS = (1, 2, 3, 7, 11, 15)
+
+# a deadly encounter is one worth up to this many times the deadly threshold
+DEADLY_CEILING = 2
+
+
+def party_thresholds(levels: Iterable[int]) -> dict[str, int]:
+    """The party's XP threshold for each difficulty"""
+    totals = [0, 0, 0, 0]
+    for level in levels:
+        for i, xp in enumerate(XP_THRESHOLDS[level]):
+            totals[i] += xp
+    return dict(zip(DIFFICULTIES, totals))
+
+
+def encounter_multiplier(monster_count: int, party_size: int = 4) -> float:
+    """
+    Multiplier applied to the monsters' total XP, which is larger for more
+    monsters and adjusted for parties of fewer than 3 or more than 5
+    """
+    if monster_count < 1:
+        return 0
+    step = bisect_left(MULTIPLIER_COUNTS, monster_count + 1)
+    if party_size < 3:
+        step += 1
+    elif party_size > 5:
+        step -= 1
+    return MULTIPLIERS[step]
+
+
+def adjusted_xp(monster_xps: Iterable[int], party_size: int = 4) -> int:
+    """Total XP of the monsters times the encounter multiplier"""
+    monster_xps = list(monster_xps)
+    return int(sum(monster_xps) * encounter_multiplier(len(monster_xps), party_size))
+
+
+def encounter_difficulty(encounter_xp: int, levels: Iterable[int]) -> Optional[str]:
+    """The hardest difficulty whose threshold `encounter_xp` reaches, if any"""
+    result = None
+    for name, threshold in party_thresholds(levels).items():
+        if encounter_xp >= threshold:
+            result = name
+    return result
+
+
+@dataclass(frozen=True)
+class Encounter:
+    # monster index -> how many of that monster
+    monsters: dict[str, int]
+    xp: int
+    adjusted_xp: int
+    difficulty: str
+
+
+def build_encounters(
+    levels: list[int],
+    difficulty: str = "medium",
+    candidates: Optional[Iterable[str]] = None,
+    max_monsters: int = 8,
+    max_kinds: int = 2,
+    limit: int = 24,
+    seed: Optional[int] = None,
+) -> list[Encounter]:
+    """
+    Up to `limit` random encounters for a party of `levels` whose adjusted XP
+    lands between the threshold of `difficulty` and the next one. Each uses
+    one or two kinds of monster from `candidates` (monster indexes, such as
+    a `monsters.where(...)` query; all monsters by default), up to
+    `max_monsters` in total.
+
+    Rather than trying every combination, the candidates are sorted by XP
+    once. For each split of the monster count, the XP a monster must be
+    worth to fit the budget is a contiguous slice of that list, found with
+    a binary search, so all valid encounters are counted without being
+    built and then sampled evenly.
+    """
+    if difficulty not in DIFFICULTIES:
+        raise ValueError(f"difficulty must be one of {', '.join(DIFFICULTIES)}")
+    if not 1 <= max_kinds <= 2:
+        raise ValueError("max_kinds must be 1 or 2")
+    if candidates is None:
+        candidates = monsters.where()
+    if isinstance(candidates, BitSet):
+        candidates = candidates.names()
+
+    pool = sorted(
+        (SRD_monsters[name]["xp"], name)
+        for name in candidates
+        if SRD_monsters[name]["xp"] > 0
+    )
+    xps = [xp for xp, __ in pool]
+    names = [name for __, name in pool]
+
+    thresholds = party_thresholds(levels)
+    step = DIFFICULTIES.index(difficulty)
+    low = thresholds[difficulty]
+    high = (
+        thresholds[DIFFICULTIES[step + 1]]
+        if step + 1 < len(DIFFICULTIES)
+        else low * DEADLY_CEILING
+    )
+    party_size = len(levels)
+
+    # each slab is (first monster, its count, start, end, second count): every
+    # monster from start to end can be paired with the first one
+    slabs: list[tuple[int, int, int, int, int]] = []
+    for total in range(1, max_monsters + 1):
+        multiplier = encounter_multiplier(total, party_size)
+        # unadjusted XP must be in [floor, ceiling)
+        floor = -(-low // multiplier)
+        ceiling = -(-high // multiplier)
+        # one kind of monster
+        start = bisect_left(xps, floor / total)
+        end = bisect_left(xps, ceiling / total)
+        if start < end:
+            slabs.append((-1, 0, start, end, total))
+        if max_kinds < 2:
+            continue
+        for count in range(1, total):
+            other = total - count
+            for first, xp in enumerate(xps):
+                spent = xp * count
+                if spent >= ceiling:
+                    break
+                start = max(first + 1, bisect_left(xps, (floor - spent) / other))
+                end = bisect_left(xps, (ceiling - spent) / other)
+                if start < end:
+                    slabs.append((first, count, start, end, other))
+
+    if not slabs:
+        return []
+    totals = list(accumulate(end - start for __, __, start, end, __ in slabs))
+    rng = random.Random(seed)
+    picked: set[tuple[int, int, int, int]] = set()
+    encounters = []
+    for __ in range(min(limit, totals[-1]) * 4):
+        if len(encounters) == limit:
+            break
+        first, count, start, end, other = rng.choices(slabs, cum_weights=totals)[0]
+        second = rng.randrange(start, end)
+        key = (first, count, second, other)
+        if key in picked:
+            continue
+        picked.add(key)
+        group = {names[second]: other}
+        xp = xps[second] * other
+        if first >= 0:
+            group = {names[first]: count, **group}
+            xp += xps[first] * count
+        encounters.append(
+            Encounter(
+                monsters=group,
+                xp=xp,
+                adjusted_xp=int(xp * encounter_multiplier(count + other, party_size)),
+                difficulty=difficulty,
+            )
+        )
+    return encounters
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m dnd_character.encounters",
+        description="build random encounters from the SRD monsters",
+    )
+    parser.add_argument("levels", nargs="+", type=int, help="level of each character")
+    parser.add_argument("-d", "--difficulty", choices=DIFFICULTIES, default="medium")
+    parser.add_argument("-n", "--count", type=int, default=12)
+    parser.add_argument("--max-monsters", type=int, default=8)
+    parser.add_argument("--type", help="only use monsters of this type")
+    parser.add_argument("--cr-min", type=float)
+    parser.add_argument("--cr-max", type=float)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    conditions = {}
+    if args.type:
+        conditions["type"] = args.type
+    if args.cr_min is not None:
+        conditions["cr__gte"] = args.cr_min
+    if args.cr_max is not None:
+        conditions["cr__lte"] = args.cr_max
+
+    thresholds = party_thresholds(args.levels)
+    print(", ".join(f"{name} {xp} XP" for name, xp in thresholds.items()))
+    for encounter in build_encounters(
+        args.levels,
+        args.difficulty,
+        candidates=monsters.where(**conditions),
+        max_monsters=args.max_monsters,
+        limit=args.count,
+        seed=args.seed,
+    ):
+        group = " + ".join(f"{n} {name}" for name, n in encounter.monsters.items())
+        print(f"{encounter.adjusted_xp:>6} XP  {group}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
-from typing import Union, Optional
-from dataclasses import dataclass, asdict
-from uuid import uuid4
+from functools import lru_cache
+from typing import TYPE_CHECKING, Union, Optional
 from .SRD import SRD_endpoints, SRD
+from .columns import Columns, cached_table, feet
+from .flyweight import SRDObject
+
+if TYPE_CHECKING:
+    from .columns import ColumnTable
 
 
 SRD_equipment = {
@@ -10,9 +14,16 @@ SRD_equipment = {
 }
 
 
-@dataclass(kw_only=True)
-class _Item:
-    uid: str = uuid4().hex
+class _Item(SRDObject):
+    """
+    Items made by `Item(index)` share the SRD's document;
+    each only stores its own uid and quantity.
+    """
+
+    __slots__ = ("quantity",)
+    documents = SRD_equipment
+
+    uid: str
     contents: list[dict[str, Union[int, dict[str, str]]]]
     cost: dict[str, Union[str, int]]
     desc: list[str]
@@ -22,7 +33,7 @@ class _Item:
     special: list
     url: str
     weight: int = 0
-    quantity: int = 1
+    quantity: int
     stealth_disadvantage: bool = False
     str_minimum: int = 0
 
@@ -54,11 +65,50 @@ class _Item:
     capacity: Optional[str] = None
     speed: Optional[dict[str, Union[str, int]]] = None
 
-    def __iter__(self):
-        me = asdict(self)
-        for k, v in me.items():
-            yield k, v
+    def __init__(self, srd=None, /, *, quantity: Optional[int] = None, **fields):
+        super().__init__(srd, **fields)
+        self.quantity = self._srd.get("quantity", 1) if quantity is None else quantity
 
 
 def Item(index: str) -> _Item:
-    return _Item(**SRD_equipment[index])
+    return _Item(SRD_equipment[index])
+
+
+CP_PER_UNIT = {"cp": 1, "sp": 10, "ep": 50, "gp": 100, "pp": 1000}
+
+
+def _damage_type(item: dict) -> Optional[str]:
+    damage = item.get("damage")
+    if damage is None or "damage_type" not in damage:
+        return None
+    return damage["damage_type"]["index"]
+
+
+EQUIPMENT_COLUMNS: Columns = {
+    "name": ("str", lambda i: i["name"]),
+    "equipment_category": ("category", lambda i: i["equipment_category"]["index"]),
+    "cost_cp": (
+        "int32",
+        lambda i: i["cost"]["quantity"] * CP_PER_UNIT[i["cost"]["unit"]],
+    ),
+    "weight": ("float32", lambda i: i.get("weight", 0)),
+    "armor_category": ("category", lambda i: i.get("armor_category")),
+    "armor_class_base": ("int8", lambda i: (i.get("armor_class") or {}).get("base", 0)),
+    "dex_bonus": ("bool", lambda i: (i.get("armor_class") or {}).get("dex_bonus", False)),
+    "str_minimum": ("int8", lambda i: i.get("str_minimum", 0)),
+    "stealth_disadvantage": ("bool", lambda i: i.get("stealth_disadvantage", False)),
+    "weapon_category": ("category", lambda i: i.get("weapon_category")),
+    "weapon_range": ("category", lambda i: i.get("weapon_range")),
+    "damage_dice": ("category", lambda i: (i.get("damage") or {}).get("damage_dice")),
+    "damage_type": ("category", _damage_type),
+    "range_normal": ("int16", lambda i: (i.get("range") or {}).get("normal", 0)),
+}
+
+
+@lru_cache(maxsize=None)
+def equipment_table() -> "ColumnTable":
+    """
+    The SRD equipment as NumPy arrays, one column per field in
+    EQUIPMENT_COLUMNS. Needs numpy.
+    """
+    return cached_table("equipment", SRD_equipment, EQUIPMENT_COLUMNS)
@@ -33,6 +33,7 @@ class Experience:
         self.update_level()
 
     def update_level(self) -> None:
+        self.character.mark_dirty("experience")
         self.character.level = level_at_experience(self._experience)
 
     def __eq__(self, other: object) -> bool:
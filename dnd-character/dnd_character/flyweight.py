@@ -0,0 +1,150 @@
+"""
+Base class for objects made from SRD documents, such as monsters and items,
+which are cheap to create many of: instances made from the same document
+share it instead of each holding a copy.
+"""
+from copy import deepcopy
+from typing import Any, ClassVar, Iterator, Mapping, Optional
+from uuid import uuid4
+
+
+class SRDObject:
+    """
+    Subclasses declare their SRD fields as annotations, with defaults for
+    fields some documents leave out, and list what each instance can change
+    independently (like a monster's current hit points) in `__slots__`.
+
+    Reading a field looks in the instance's own values, then the shared
+    document, then the defaults. Setting a field only changes this instance.
+    Shared values must not be changed in place: assign a new value instead.
+    """
+
+    __slots__ = ("_srd", "_own", "_uid")
+
+    # documents to share, by index; set by subclasses
+    documents: ClassVar[Mapping[str, Mapping[str, Any]]] = {}
+    fields: ClassVar[tuple[str, ...]] = ()
+    defaults: ClassVar[dict[str, Any]] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        annotations = {
+            name: hint
+            for name, hint in cls.__dict__.get("__annotations__", {}).items()
+            if getattr(hint, "__origin__", None) is not ClassVar
+        }
+        cls.fields = tuple(annotations)
+        # move defaults off the class, so that they don't hide shared values
+        cls.defaults = {}
+        slots = cls.__dict__.get("__slots__", ())
+        for name in annotations:
+            if name in cls.__dict__ and name not in slots:
+                cls.defaults[name] = cls.__dict__[name]
+                delattr(cls, name)
+
+    def __init__(
+        self,
+        srd: Optional[Mapping[str, Any]] = None,
+        /,
+        uid: Optional[str] = None,
+        **fields: Any,
+    ):
+        """
+        `srd` is a document to share. Without it, `fields` are compared with
+        the document of the same index, and only the differences are kept.
+        """
+        self._uid = uid
+        self._own: Optional[dict[str, Any]] = None
+        if srd is not None:
+            self._srd = srd
+            if fields:
+                self._own = fields
+            return
+
+        srd = self.documents.get(fields.get("index"))
+        if srd is None:
+            self._srd = fields
+            return
+        self._srd = srd
+        own = {
+            name: value
+            for name, value in fields.items()
+            if srd.get(name, self.defaults.get(name)) != value
+        }
+        if own:
+            self._own = own
+
+    @property
+    def uid(self) -> str:
+        # generated on first use, so that spawning many instances stays cheap
+        if self._uid is None:
+            self._uid = uuid4().hex
+        return self._uid
+
+    @uid.setter
+    def uid(self, new_uid: str) -> None:
+        self._uid = new_uid
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for fields which aren't slots
+        if name.startswith("_"):
+            raise AttributeError(name)
+        own = self._own
+        if own is not None and name in own:
+            return own[name]
+        try:
+            return self._srd[name]
+        except KeyError:
+            pass
+        try:
+            return self.defaults[name]
+        except KeyError:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            )
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name in self.fields and name != "uid" and name not in self.__slots__:
+            # copy on write
+            if self._own is None:
+                self._own = {}
+            self._own[name] = value
+        else:
+            object.__setattr__(self, name, value)
+
+    def own_fields(self) -> Optional[dict[str, Any]]:
+        """
+        The fields this instance changed from its SRD document, or None if it
+        wasn't made from one of `documents`
+        """
+        if self.documents.get(self._srd.get("index")) is not self._srd:
+            return None
+        return {} if self._own is None else dict(self._own)
+
+    def copy(self) -> "SRDObject":
+        """A new instance sharing the same document, with a new uid"""
+        new = object.__new__(type(self))
+        new._srd = self._srd
+        new._own = None if self._own is None else dict(self._own)
+        new._uid = None
+        for cls in type(self).__mro__[:-2]:
+            for name in cls.__slots__:
+                object.__setattr__(new, name, deepcopy(getattr(self, name)))
+        return new
+
+    def __iter__(self) -> Iterator[tuple[str, Any]]:
+        for name in self.fields:
+            yield name, deepcopy(getattr(self, name))
+
+    def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.fields)
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.fields)
+        return f"{type(self).__name__}({values})"
@@ -0,0 +1,94 @@
+"""
+Homebrew and Unearthed Arcana documents layered over the SRD.
+
+A layer is a directory of JSON documents named like the files in the JSON
+cache, e.g. `api_classes_artificer.json` for /api/classes/artificer and
+`api_classes_artificer_levels.json` for its levels. Layers are listed in
+SRD_HOMEBREW, separated by os.pathsep. Precedence, from highest to lowest:
+
+1. the last layer listed
+2. ...earlier layers
+3. the SRD
+
+A document replaces the same URI in every layer below it. List documents
+such as /api/classes are not replaced, but extended: each /api/<endpoint>/<index>
+document adds an entry to /api/<endpoint>, replacing one with the same index.
+A layer may also provide the list document itself, which replaces it outright.
+
+Layers are read and merged once, when the SRD is first imported.
+"""
+import json
+import logging
+from os import path
+from typing import Any, Callable, Iterable, Optional
+
+from .snapshot import iter_json_cache
+
+LOG = logging.getLogger(__package__)
+
+
+class Overlay:
+    """
+    `documents` holds the winning document for each URI. `additions` holds
+    the entries to add to each list document, by index.
+    """
+
+    def __init__(self, layers: list[str]):
+        self.layers = layers
+        self.documents: dict[str, Any] = {}
+        self.additions: dict[str, dict[str, dict[str, str]]] = {}
+        # which layer each document came from
+        self.sources: dict[str, str] = {}
+
+    def __contains__(self, uri: str) -> bool:
+        return uri in self.documents or uri in self.additions
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def add_layer(self, directory: str) -> None:
+        for uri, fp in iter_json_cache(directory):
+            try:
+                with open(fp) as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                LOG.error(f"Homebrew document {fp} failed to load: {str(e)}")
+                continue
+            self.documents[uri] = data
+            self.sources[uri] = directory
+            parts = uri.strip("/").split("/")
+            if len(parts) == 3 and parts[0] == "api" and isinstance(data, dict):
+                index = data.get("index", parts[2])
+                self.additions.setdefault(f"/api/{parts[1]}", {})[index] = {
+                    "index": index,
+                    "name": data.get("name", index),
+                    "url": uri,
+                }
+
+    def get(self, uri: str, base: Callable[[str], Optional[Any]]) -> Any:
+        """
+        The document for `uri`. `base` reads the SRD's own copy, which is only
+        needed the first time a list document is extended.
+        """
+        try:
+            return self.documents[uri]
+        except KeyError:
+            pass
+        srd = base(uri) or {}
+        results = {result["index"]: result for result in srd.get("results", [])}
+        results.update(self.additions[uri])
+        merged = {**srd, "count": len(results), "results": list(results.values())}
+        self.documents[uri] = merged
+        return merged
+
+
+def load_overlay(layers: Iterable[str]) -> Optional[Overlay]:
+    """An Overlay of every existing directory in `layers`, or None if there are none"""
+    layers = [layer for layer in layers if layer and path.isdir(layer)]
+    if not layers:
+        return None
+    overlay = Overlay(layers)
+    for layer in layers:
+        overlay.add_layer(layer)
+    LOG.info(f"{len(overlay)} homebrew documents from {', '.join(layers)}")
+    return overlay
@@ -0,0 +1,91 @@
+"""
+Shares repeated data between SRD documents to reduce resident memory.
+SRD documents repeat the same strings and small reference dicts, such as
+{"index": ..., "name": ..., "url": ...}, thousands of times.
+"""
+import sys
+from typing import Any, Iterable, NoReturn
+from weakref import WeakValueDictionary
+
+
+class FrozenDict(dict):
+    """A dict which can't be changed, so one instance can be shared safely"""
+
+    def _readonly(self, *args, **kwargs) -> NoReturn:
+        raise TypeError(f"{type(self).__name__} is read-only; copy it with dict()")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __reduce__(self) -> tuple:
+        return (type(self), (dict(self),))
+
+    def __copy__(self) -> "FrozenDict":
+        return self
+
+    def __deepcopy__(self, memo: dict) -> "FrozenDict":
+        return self
+
+
+SCALARS = (str, int, float, bool, type(None))
+
+
+class Interner:
+    """
+    Rebuilds JSON documents so that equal strings are one object and dicts
+    holding only scalars are replaced by one shared FrozenDict per distinct value.
+    Strings go through `sys.intern` and shared dicts are held by weak reference,
+    so nothing is kept alive once the documents using it are evicted.
+    """
+
+    def __init__(self):
+        self.leaves: WeakValueDictionary[tuple, FrozenDict] = WeakValueDictionary()
+
+    def __call__(self, data: Any) -> Any:
+        if isinstance(data, str):
+            return sys.intern(data)
+        if isinstance(data, list):
+            return [self(value) for value in data]
+        if not isinstance(data, dict) or isinstance(data, FrozenDict):
+            return data
+
+        new = {sys.intern(key): self(value) for key, value in data.items()}
+        if not all(isinstance(value, SCALARS) for value in new.values()):
+            return new
+        # include types so that e.g. True and 1 are not treated as equal
+        key = tuple((k, type(v), v) for k, v in new.items())
+        shared = self.leaves.get(key)
+        if shared is None:
+            self.leaves[key] = shared = FrozenDict(new)
+        return shared
+
+    @staticmethod
+    def stats_dict(documents: Iterable[Any]) -> dict[str, int]:
+        """
+        Counts the strings and dicts shared between `documents`, each distinct
+        object once, and estimates the bytes that would be used by copies.
+        """
+        uses: dict[int, list] = {}
+        pending = list(documents)
+        while pending:
+            data = pending.pop()
+            if isinstance(data, (str, FrozenDict)):
+                seen = uses.get(id(data))
+                if seen is not None:
+                    seen[1] += 1
+                    continue
+                uses[id(data)] = [data, 1]
+            if isinstance(data, dict):
+                pending.extend(data)
+                pending.extend(data.values())
+            elif isinstance(data, list):
+                pending.extend(data)
+        shared = [(value, count) for value, count in uses.values() if count > 1]
+        return {
+            "shared_strings": sum(isinstance(value, str) for value, __ in shared),
+            "shared_dicts": sum(isinstance(value, dict) for value, __ in shared),
+            "bytes_saved": sum(
+                sys.getsizeof(value) * (count - 1) for value, count in shared
+            ),
+        }
@@ -0,0 +1,213 @@
+"""
+A character's inventory: the items they carry, in the order they got them,
+indexed by equipment category, with a slot for the armor and the shield they
+wear. Adding, removing and equipping items costs the same however many items
+there are.
+"""
+from collections.abc import Sequence
+from typing import Callable, Iterable, Iterator, Optional, Union, overload
+
+from .equipment import _Item
+
+
+def is_shield(item: _Item) -> bool:
+    return item.equipment_category["index"] == "armor" and item.armor_category == "Shield"
+
+
+def is_armor(item: _Item) -> bool:
+    """True for body armor; shields are worn in their own slot"""
+    return item.equipment_category["index"] == "armor" and item.armor_category != "Shield"
+
+
+class Inventory(Sequence):
+    """
+    A sequence of items which also works like the list it replaces: `append`,
+    `extend`, `remove`, `pop` and `del` don't equip or unequip anything except
+    that removing a worn item empties its slot. It compares equal to a list of
+    the same items.
+
+    `changed(slots)` is called after every change, with whether the armor or
+    shield slot changed.
+    """
+
+    def __init__(
+        self,
+        items: Iterable[_Item] = (),
+        changed: Optional[Callable[[bool], None]] = None,
+    ):
+        # by id, so that equal items are still separate entries
+        self._items: dict[int, _Item] = {}
+        self._categories: dict[str, dict[int, _Item]] = {}
+        # the stack of each SRD item which `add(..., stack=True)` adds to
+        self._stacks: dict[str, _Item] = {}
+        self._list: Optional[list[_Item]] = None
+        self.armor: Optional[_Item] = None
+        self.shield: Optional[_Item] = None
+        self._changed = changed
+        for item in items:
+            self.add(item)
+
+    def __getstate__(self) -> dict:
+        # the indexes are keyed by id, so copies and pickles rebuild them
+        return {
+            "items": list(self),
+            "stacks": list(self._stacks.values()),
+            "armor": self.armor,
+            "shield": self.shield,
+            "changed": self._changed,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(state["items"])
+        self._stacks = {item.index: item for item in state["stacks"]}
+        self.armor = state["armor"]
+        self.shield = state["shield"]
+        self._changed = state["changed"]
+
+    def _notify(self, slots: bool = False) -> None:
+        self._list = None
+        if self._changed is not None:
+            self._changed(slots)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[_Item]:
+        return iter(self._items.values())
+
+    def __contains__(self, item: object) -> bool:
+        return id(item) in self._items
+
+    @overload
+    def __getitem__(self, i: int) -> _Item: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> list[_Item]: ...
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[_Item, list[_Item]]:
+        if self._list is None:
+            self._list = list(self._items.values())
+        return self._list[i]
+
+    def __delitem__(self, i: Union[int, slice]) -> None:
+        for item in self[i] if isinstance(i, slice) else [self[i]]:
+            self.remove(item)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Inventory):
+            return (
+                list(self) == list(other)
+                and self.armor == other.armor
+                and self.shield == other.shield
+            )
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __iadd__(self, items: Iterable[_Item]) -> "Inventory":
+        self.extend(items)
+        return self
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+    def category(self, index: str) -> list[_Item]:
+        """The items in an equipment category, e.g. "weapon" or "armor" """
+        return list(self._categories.get(index, {}).values())
+
+    def add(self, item: _Item, stack: bool = False) -> _Item:
+        """
+        Adds `item`, and returns it. With `stack`, an unchanged SRD item is
+        added to the quantity of one already here instead, which is returned.
+        """
+        if stack and item.own_fields() == {}:
+            stacked = self._stacks.get(item.index)
+            # the stack only takes copies while it's still an unchanged SRD item
+            if stacked is not None and stacked.own_fields() == {}:
+                stacked.quantity += item.quantity
+                self._notify()
+                return stacked
+            self._stacks[item.index] = item
+        key = id(item)
+        if key in self._items:
+            return item
+        self._items[key] = item
+        category = item.equipment_category["index"]
+        self._categories.setdefault(category, {})[key] = item
+        self._notify()
+        return item
+
+    append = add
+
+    def extend(self, items: Iterable[_Item]) -> None:
+        for item in list(items):
+            self.add(item)
+
+    def remove(self, item: _Item) -> None:
+        key = id(item)
+        if key not in self._items:
+            raise ValueError(f"{item.name} is not in the inventory")
+        del self._items[key]
+        category = self._categories[item.equipment_category["index"]]
+        del category[key]
+        if self._stacks.get(item.index) is item:
+            del self._stacks[item.index]
+        slots = False
+        if self.armor is item:
+            self.armor = None
+            slots = True
+        elif self.shield is item:
+            self.shield = None
+            slots = True
+        self._notify(slots)
+
+    def pop(self, i: int = -1) -> _Item:
+        item = self[i]
+        self.remove(item)
+        return item
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._categories.clear()
+        self._stacks.clear()
+        self.armor = self.shield = None
+        self._notify(slots=True)
+
+    def equip(self, item: _Item) -> Optional[_Item]:
+        """
+        Wears armor or a shield, adding it if it isn't here yet. Returns the
+        item it replaces in that slot, which stays in the inventory.
+        """
+        if is_shield(item):
+            replaced, self.shield = self.shield, item
+        elif is_armor(item):
+            replaced, self.armor = self.armor, item
+        else:
+            raise ValueError(f"{item.name} is not armor or a shield")
+        if item not in self:
+            self.add(item)
+        self._notify(slots=True)
+        return replaced
+
+    def unequip(self, item: _Item) -> None:
+        """Takes off armor or a shield, which stays in the inventory"""
+        if self.armor is item:
+            self.armor = None
+        elif self.shield is item:
+            self.shield = None
+        else:
+            return
+        self._notify(slots=True)
+
+    def armor_class(self, dexterity_modifier: int) -> int:
+        """The armor class given by the worn armor and shield"""
+        armor = self.armor
+        if armor is None:
+            armor_class = 10 + dexterity_modifier
+        else:
+            armor_class = armor.armor_class["base"]
+            if armor.armor_class["dex_bonus"]:
+                armor_class += dexterity_modifier
+        if self.shield is not None:
+            armor_class += self.shield.armor_class["base"]
+        return armor_class
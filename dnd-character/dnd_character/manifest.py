@@ -0,0 +1,159 @@
+"""
+Records a content hash, size and fetch time for every URI in the JSON cache,
+so the cache can be checked for damage and revalidated against the API.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from os import path, stat
+from typing import Any, Iterator, Optional
+
+from .snapshot import is_document, iter_json_cache, uri_to_filename
+from .writer import write_json_atomic
+
+LOG = logging.getLogger(__package__)
+
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def encode(data: Any) -> bytes:
+    """The bytes of a cached JSON file, as written by `write_json_atomic`"""
+    return json.dumps(data).encode()
+
+
+def content_hash(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+class Manifest:
+    """
+    Manifest entries look like:
+        {"sha256": str, "size": int, "fetched": float, "etag": Optional[str]}
+    where `fetched` is a unix timestamp. Changes are kept in memory until `save`.
+    """
+
+    def __init__(self, filepath: str, entries: Optional[dict[str, dict]] = None):
+        self.filepath = filepath
+        self.entries: dict[str, dict] = {} if entries is None else entries
+        self.changed: set[str] = set()
+        self._lock = threading.Lock()
+
+    def __contains__(self, uri: str) -> bool:
+        return uri in self.entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.entries))
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, uri: str) -> Optional[dict]:
+        return self.entries.get(uri)
+
+    def touch(self, uri: str) -> None:
+        """Mark an unchanged entry as fetched now"""
+        with self._lock:
+            self.entries[uri]["fetched"] = time.time()
+            self.changed.add(uri)
+
+    def record(
+        self,
+        uri: str,
+        data: Any,
+        *,
+        fetched: Optional[float] = None,
+        etag: Optional[str] = None,
+    ) -> bool:
+        """
+        Record the current content of `uri`. Returns True if it differs from
+        what was recorded before.
+        """
+        content = encode(data)
+        digest = content_hash(content)
+        with self._lock:
+            old = self.entries.get(uri)
+            self.entries[uri] = {
+                "sha256": digest,
+                "size": len(content),
+                "fetched": time.time() if fetched is None else fetched,
+                "etag": etag,
+            }
+            self.changed.add(uri)
+        return old is None or old["sha256"] != digest
+
+    def save(self) -> None:
+        """
+        Merge our changes into the manifest on disk and replace it atomically.
+        Re-reading first keeps entries recorded by other processes meanwhile.
+        """
+        with self._lock:
+            if not self.changed:
+                return
+            on_disk = load_manifest(self.filepath).entries
+            on_disk.update({uri: self.entries[uri] for uri in self.changed})
+            self.entries.update(on_disk)
+            write_json_atomic(
+                self.filepath,
+                {"version": MANIFEST_VERSION, "entries": on_disk},
+                overwrite=True,
+            )
+            self.changed.clear()
+
+    def check(self, cache_dir: str, quick: bool = True) -> list[str]:
+        """
+        Returns URIs whose cached file is missing or doesn't match the manifest.
+        The quick check only compares file sizes; otherwise files are hashed.
+        """
+        damaged = []
+        for uri, entry in list(self.entries.items()):
+            fp = f"{cache_dir}/{uri_to_filename(uri)}"
+            try:
+                if quick:
+                    ok = stat(fp).st_size == entry["size"]
+                else:
+                    with open(fp, "rb") as f:
+                        ok = content_hash(f.read()) == entry["sha256"]
+            except FileNotFoundError:
+                ok = False
+            if not ok:
+                damaged.append(uri)
+        return damaged
+
+
+def load_manifest(filepath: str) -> Manifest:
+    """Returns the manifest at `filepath`, or an empty one if it is missing"""
+    if not path.exists(filepath):
+        return Manifest(filepath)
+    try:
+        with open(filepath, "r") as f:
+            data = json.load(f)
+    except json.decoder.JSONDecodeError as e:
+        LOG.error(f"Ignoring SRD manifest: {str(e)}")
+        return Manifest(filepath)
+    if data.get("version") != MANIFEST_VERSION:
+        LOG.error(f"Ignoring SRD manifest with version {data.get('version')}")
+        return Manifest(filepath)
+    # manifests written before other files were kept out of the document
+    # namespace recorded e.g. the manifest itself as /manifest
+    entries = {uri: entry for uri, entry in data["entries"].items() if is_document(uri)}
+    return Manifest(filepath, entries)
+
+
+def build_manifest(cache_dir: str, output: str, version: str = "") -> int:
+    """
+    Writes a manifest for every JSON file in `cache_dir`, using each file's
+    modification time as its fetch time. Returns the number of entries.
+    """
+    manifest = Manifest(output)
+    for uri, fp in iter_json_cache(cache_dir):
+        with open(fp, "r") as f:
+            manifest.record(uri, json.load(f), fetched=path.getmtime(fp))
+    write_json_atomic(
+        output,
+        {"version": MANIFEST_VERSION, "entries": manifest.entries},
+        overwrite=True,
+    )
+    return len(manifest)
@@ -1,19 +1,40 @@
-from uuid import uuid4
-from typing import Optional, Union
-from dataclasses import dataclass, asdict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Union
 from .SRD import SRD_endpoints, SRD
+from .columns import Columns, cached_table, feet
+from .flyweight import SRDObject
+from .bitset import BitsetIndex
+from .stat_blocks import load_stat_blocks
+
+if TYPE_CHECKING:
+    from .columns import ColumnTable
 
 
 SRD_monsters = {
     result["index"]: SRD(result["url"])
     for result in SRD(SRD_endpoints["monsters"])["results"]
 }
+# the campaign's own monsters, compiled from runPack/guides; SRD monsters win
+# if an index is used by both
+SRD_monsters.update(
+    (index, monster)
+    for index, monster in load_stat_blocks().items()
+    if index not in SRD_monsters
+)
+
+
+class _Monster(SRDObject):
+    """
+    Monsters made by `Monster(index)` share the SRD's stat block; each only
+    stores its own uid, current hit points and conditions, so spawning many
+    of the same monster is cheap.
+    """
 
+    __slots__ = ("current_hit_points", "conditions")
+    documents = SRD_monsters
 
-@dataclass(kw_only=True)
-class _Monster:
     index: str
-    uid: str = uuid4().hex
+    uid: str
     type: str
     subtype: Optional[str] = None
     desc: Optional[str] = None
@@ -48,12 +69,107 @@ class _Monster:
     actions: list[dict]
     reactions: Optional[list[dict]] = None
     forms: Optional[list[dict[str, str]]] = None
+    current_hit_points: int
+    conditions: list[str]
 
-    def __iter__(self):
-        me = asdict(self)
-        for k, v in me.items():
-            yield k, v
+    def __init__(
+        self,
+        srd=None,
+        /,
+        *,
+        current_hit_points: Optional[int] = None,
+        conditions: Optional[list[str]] = None,
+        **fields,
+    ):
+        super().__init__(srd, **fields)
+        self.current_hit_points = (
+            self.hit_points if current_hit_points is None else current_hit_points
+        )
+        self.conditions = [] if conditions is None else list(conditions)
 
 
 def Monster(index: str) -> _Monster:
-    return _Monster(**SRD_monsters[index])
+    return _Monster(SRD_monsters[index])
+
+
+def _monster_values(monster: dict) -> dict[str, list]:
+    """The values of each indexed field for one SRD monster document"""
+    return {
+        "cr": [monster["challenge_rating"]],
+        "xp": [monster["xp"]],
+        "type": [monster["type"]],
+        "subtype": [] if monster.get("subtype") is None else [monster["subtype"]],
+        "size": [monster["size"]],
+        "alignment": [monster["alignment"]],
+        "damage_immunities": monster["damage_immunities"],
+        "damage_resistances": monster["damage_resistances"],
+        "damage_vulnerabilities": monster["damage_vulnerabilities"],
+        "condition_immunities": [
+            condition["index"] for condition in monster["condition_immunities"]
+        ],
+    }
+
+
+class MonsterIndex(BitsetIndex):
+    """
+    The SRD monsters indexed the same way as the spells, e.g.
+
+        monsters.where(type="undead", cr__gte=2, cr__lte=4)
+
+    Iterating a result yields a new _Monster for each match.
+    """
+
+    noun = "monsters"
+    fields = (
+        "cr",
+        "xp",
+        "type",
+        "subtype",
+        "size",
+        "alignment",
+        "damage_immunities",
+        "damage_resistances",
+        "damage_vulnerabilities",
+        "condition_immunities",
+    )
+    values = staticmethod(_monster_values)
+
+    def __init__(self, documents):
+        super().__init__(documents, SRD_monsters)
+
+    def get(self, name: str) -> _Monster:
+        return Monster(name)
+
+
+monsters = MonsterIndex(lambda: SRD_monsters)
+
+
+MONSTER_COLUMNS: Columns = {
+    "name": ("str", lambda m: m["name"]),
+    "size": ("category", lambda m: m["size"]),
+    "type": ("category", lambda m: m["type"]),
+    "subtype": ("category", lambda m: m.get("subtype")),
+    "alignment": ("category", lambda m: m["alignment"]),
+    "armor_class": ("int16", lambda m: m["armor_class"][0]["value"]),
+    "hit_points": ("int16", lambda m: m["hit_points"]),
+    "strength": ("int8", lambda m: m["strength"]),
+    "dexterity": ("int8", lambda m: m["dexterity"]),
+    "constitution": ("int8", lambda m: m["constitution"]),
+    "intelligence": ("int8", lambda m: m["intelligence"]),
+    "wisdom": ("int8", lambda m: m["wisdom"]),
+    "charisma": ("int8", lambda m: m["charisma"]),
+    "challenge_rating": ("float32", lambda m: m["challenge_rating"]),
+    "xp": ("int32", lambda m: m["xp"]),
+    "walk_speed": ("int16", lambda m: feet(m["speed"].get("walk"))),
+    "fly_speed": ("int16", lambda m: feet(m["speed"].get("fly"))),
+    "passive_perception": ("int8", lambda m: m["senses"]["passive_perception"]),
+}
+
+
+@lru_cache(maxsize=None)
+def monster_table() -> "ColumnTable":
+    """
+    The SRD monsters as NumPy arrays, one column per field in MONSTER_COLUMNS.
+    Needs numpy.
+    """
+    return cached_table("monsters", SRD_monsters, MONSTER_COLUMNS)
@@ -0,0 +1,61 @@
+"""
+Command line tool to build and verify the packed SRD snapshot or SQLite database,
+and the manifest of content hashes for the JSON cache.
+"""
+import argparse
+from dnd_character import __version__
+from dnd_character.SRD import JSON_CACHE
+from dnd_character.database import DATABASE_FILENAME, build_database, open_database
+from dnd_character.manifest import MANIFEST_FILENAME, build_manifest, load_manifest
+from dnd_character.snapshot import (
+    SNAPSHOT_FILENAME,
+    build_snapshot,
+    open_snapshot,
+    verify_store,
+)
+
+FORMATS = {
+    "snapshot": (SNAPSHOT_FILENAME, build_snapshot, open_snapshot),
+    "sqlite": (DATABASE_FILENAME, build_database, open_database),
+    "manifest": (MANIFEST_FILENAME, build_manifest, load_manifest),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m dnd_character.pack",
+        description="pack the SRD json_cache into a single file",
+    )
+    parser.add_argument("action", choices=["build", "verify"])
+    parser.add_argument(
+        "-f",
+        "--format",
+        help="memory-mapped snapshot, SQLite database or manifest of content hashes",
+        default="snapshot",
+        choices=list(FORMATS),
+    )
+    parser.add_argument("-o", "--output", help="output file path")
+    args = parser.parse_args()
+    filename, build, open_store = FORMATS[args.format]
+    output = args.output or f"{JSON_CACHE}/{filename}"
+
+    if args.action == "build":
+        count = build(JSON_CACHE, output, version=__version__)
+        print(f"Wrote {count} records to {output}")
+    elif args.action == "verify":
+        store = open_store(output)
+        if store is None:
+            raise SystemExit(f"No usable {args.format} at {output}")
+        if args.format == "manifest":
+            mismatched = store.check(JSON_CACHE, quick=False)
+        else:
+            mismatched = verify_store(store, JSON_CACHE)
+        for uri in mismatched:
+            print(f"Mismatch: {uri}")
+        print(f"{len(store) - len(mismatched)}/{len(store)} records match")
+        if mismatched:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
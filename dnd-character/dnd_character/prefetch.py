@@ -0,0 +1,233 @@
+"""
+Fills the JSON cache by walking the SRD API's endpoint graph from `/api/`.
+Uncached URIs are fetched concurrently over a pooled HTTP session.
+
+    python -m dnd_character.prefetch [--root /api/] [--jobs 8]
+
+With --revalidate, every cached URI is requested again instead and only
+the entries whose content changed are rewritten.
+"""
+import argparse
+import logging
+import time
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from dataclasses import dataclass, field
+from os import path
+from typing import Iterator, Optional
+
+from .SRD import (
+    SRD,
+    SRD_API,
+    SRD_TIMEOUT,
+    DecoratedAPICallable,
+    JsonData,
+    http_session,
+)
+
+LOG = logging.getLogger(__package__)
+
+
+@dataclass
+class PrefetchReport:
+    fetched: int = 0
+    cached: int = 0
+    failed: list[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """URIs fetched per second"""
+        return self.fetched / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"Fetched {self.fetched} URIs in {self.seconds:.2f}s ({self.rate:.1f}/s), "
+            f"{self.cached} already cached, {len(self.failed)} failed"
+        )
+
+
+@dataclass
+class RevalidateReport:
+    checked: int = 0
+    changed: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"Revalidated {self.checked} URIs in {self.seconds:.2f}s, "
+            f"{len(self.changed)} changed, {len(self.failed)} failed"
+        )
+
+
+def linked_uris(data: JsonData) -> Iterator[str]:
+    """Yields every API endpoint referenced anywhere in a JSON document"""
+    if isinstance(data, dict):
+        for value in data.values():
+            yield from linked_uris(value)
+    elif isinstance(data, list):
+        for value in data:
+            yield from linked_uris(value)
+    elif (
+        isinstance(data, str)
+        and data.startswith("/api/")
+        and not path.splitext(data)[1]
+    ):
+        # file extensions are images, not JSON
+        yield data
+
+
+def prefetch(
+    root: str = "/api/",
+    *,
+    jobs: int = 8,
+    api: str = SRD_API,
+    srd: DecoratedAPICallable = SRD,
+    limit: Optional[int] = None,
+) -> PrefetchReport:
+    """
+    Walks every endpoint reachable from `root`, fetching the ones `srd` has not
+    cached yet on a pool of `jobs` threads. Worker threads only do HTTP; results
+    are saved into the cache from the calling thread. Stops after fetching
+    `limit` URIs if given.
+    """
+    session = http_session(jobs)
+    report = PrefetchReport()
+    seen = {root}
+    pending = deque([root])
+    start = time.perf_counter()
+
+    def fetch(uri: str) -> tuple[JsonData, Optional[str]]:
+        response = session.get(f"{api}{uri}", timeout=SRD_TIMEOUT)
+        response.raise_for_status()
+        return response.json(), response.headers.get("ETag")
+
+    def visit(data: JsonData) -> None:
+        for uri in linked_uris(data):
+            if uri not in seen:
+                seen.add(uri)
+                pending.append(uri)
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        running = {}
+        while pending or running:
+            while pending:
+                uri = pending.popleft()
+                if srd.is_cached(uri):
+                    report.cached += 1
+                    visit(srd(uri))
+                elif limit is None or report.fetched + len(running) < limit:
+                    running[pool.submit(fetch, uri)] = uri
+            if not running:
+                break
+            done, __ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                uri = running.pop(future)
+                try:
+                    data, etag = future.result()
+                except Exception as e:
+                    LOG.error(f"Prefetch failed for {uri}: {str(e)}")
+                    report.failed.append(uri)
+                    continue
+                # the ETag lets `revalidate` skip unchanged entries
+                srd.save(uri, data, etag=etag)
+                report.fetched += 1
+                visit(data)
+
+    srd.flush()
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def revalidate(
+    *,
+    jobs: int = 8,
+    api: str = SRD_API,
+    srd: DecoratedAPICallable = SRD,
+) -> RevalidateReport:
+    """
+    Requests every URI in the JSON cache again and rewrites only the ones
+    whose content changed from the cached file. URIs with an ETag in the
+    manifest are requested conditionally, so unchanged entries cost a 304
+    with no body.
+    """
+    session = http_session(jobs)
+    report = RevalidateReport()
+    manifest = srd.manifest
+    uris = sorted(set(srd.index).union(manifest or ()))
+    start = time.perf_counter()
+
+    def fetch(uri: str) -> tuple[Optional[JsonData], Optional[str]]:
+        entry = manifest.get(uri) if manifest is not None else None
+        headers = {}
+        if entry is not None and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        response = session.get(f"{api}{uri}", headers=headers, timeout=SRD_TIMEOUT)
+        if response.status_code == 304:
+            return None, entry["etag"]
+        response.raise_for_status()
+        return response.json(), response.headers.get("ETag")
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        running = {pool.submit(fetch, uri): uri for uri in uris}
+        for future in as_completed(running):
+            uri = running[future]
+            try:
+                data, etag = future.result()
+            except Exception as e:
+                LOG.error(f"Revalidation failed for {uri}: {str(e)}")
+                report.failed.append(uri)
+                continue
+            report.checked += 1
+            if data is None:
+                manifest.touch(uri)
+            elif srd.read_file(uri) == data:
+                if manifest is not None:
+                    manifest.record(uri, data, etag=etag)
+            else:
+                srd.save(uri, data, etag=etag, overwrite=True)
+                report.changed.append(uri)
+
+    srd.flush()
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m dnd_character.prefetch",
+        description="download every uncached SRD endpoint into the json_cache",
+    )
+    parser.add_argument("--root", help="endpoint to start from", default="/api/")
+    parser.add_argument(
+        "-j", "--jobs", help="concurrent requests", type=int, default=8
+    )
+    parser.add_argument("--api", help="API base URL", default=SRD_API)
+    parser.add_argument("--limit", help="stop after N fetches", type=int)
+    parser.add_argument(
+        "--revalidate",
+        help="refetch cached URIs and rewrite the ones that changed",
+        default=False,
+        action="store_true",
+    )
+    args = parser.parse_args()
+
+    if args.revalidate:
+        report = revalidate(jobs=args.jobs, api=args.api)
+        for uri in report.changed:
+            print(f"Changed: {uri}")
+    else:
+        report = prefetch(args.root, jobs=args.jobs, api=args.api, limit=args.limit)
+    print(report)
+    for uri in report.failed:
+        print(f"Failed: {uri}")
+
+
+if __name__ == "__main__":
+    main()
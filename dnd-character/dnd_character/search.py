@@ -0,0 +1,365 @@
+"""
+Offline full-text search over SRD spells, monsters, equipment and rules,
+ranked with BM25. The index is built from the JSON cache once and saved
+next to it, so later processes load it without touching the SRD. It is
+rebuilt when the cached SRD files, homebrew layers or stat blocks change.
+
+    python -m dnd_character.search "what does shield do"
+"""
+import argparse
+import hashlib
+import heapq
+import logging
+import marshal
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from os import environ, path, remove, replace, stat
+from typing import Iterator, Optional
+
+from .SRD import JSON_CACHE, SRD
+from .manifest import content_hash, encode
+from .stat_blocks import stat_block_files
+
+LOG = logging.getLogger(__package__)
+
+SEARCH_INDEX = environ.get("SRD_SEARCH_INDEX", f"{JSON_CACHE}/search.index")
+INDEX_VERSION = 1
+
+# BM25 parameters, and how many times a title counts towards term frequency
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 3
+
+# dice such as 2d6 or 1d8+2, then words which may contain ' or -
+TOKEN_RE = re.compile(r"\d*d\d+(?:[+-]\d+)?|[a-z0-9]+(?:['’-][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i if in into "
+    "is it its me my of on or so that the their them then there these they this "
+    "to was what when where which who will with you your".split()
+)
+# abbreviations players use, and British spellings, mapped to the SRD's words
+ALIASES = {
+    "hp": ("hit", "point"),
+    "ac": ("armor", "class"),
+    "aoo": ("opportunity", "attack"),
+    "str": ("strength",),
+    "dex": ("dexterity",),
+    "con": ("constitution",),
+    "int": ("intelligence",),
+    "wis": ("wisdom",),
+    "cha": ("charisma",),
+    "armour": ("armor",),
+}
+
+
+def stem(word: str) -> str:
+    """Cheap plural folding: spells -> spell, abilities -> ability"""
+    if len(word) <= 3 or word[-1] != "s" or word[-2] in "su" or word[-2:] == "is":
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("ches", "shes", "xes", "sses")):
+        return word[:-2]
+    return word[:-1]
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token[0].isdigit() and "d" in token:
+            tokens.append(token)
+            continue
+        token = token.replace("’", "'")
+        if token.endswith("'s"):
+            token = token[:-2]
+        token = token.replace("'", "")
+        if token in STOPWORDS:
+            continue
+        if token in ALIASES:
+            tokens.extend(ALIASES[token])
+            continue
+        if "-" in token:
+            # keep half-orc as a whole and as its parts
+            tokens.extend(stem(part) for part in token.split("-") if part)
+        tokens.append(stem(token))
+    return tokens
+
+
+@dataclass(frozen=True, slots=True)
+class SearchResult:
+    kind: str
+    index: str
+    title: str
+    text: str
+    score: float
+    # the document's full title appears in the query
+    exact: bool
+
+
+def _join(*parts: object) -> str:
+    lines = []
+    for part in parts:
+        if isinstance(part, list):
+            lines.extend(str(item) for item in part)
+        elif part:
+            lines.append(str(part))
+    return "\n".join(lines)
+
+
+def _actions(actions: Optional[list[dict]]) -> list[str]:
+    return [f"{action['name']}. {action.get('desc', '')}" for action in actions or []]
+
+
+def srd_documents() -> Iterator[tuple[str, str, str, str]]:
+    """Yields (kind, index, title, text) for every searchable SRD document"""
+    from .SRD import SRD_rules
+    from .equipment import SRD_equipment
+    from .monsters import SRD_monsters
+    from .spellcasting import SRD_spells
+
+    for index, spell in SRD_spells.items():
+        yield "spell", index, spell["name"], _join(
+            f"Level {spell['level']} {spell['school']['name']} spell",
+            f"Casting time: {spell['casting_time']}. Range: {spell['range']}. "
+            f"Duration: {spell['duration']}.",
+            spell["desc"],
+            spell.get("higher_level"),
+        )
+    for index, monster in SRD_monsters.items():
+        yield "monster", index, monster["name"], _join(
+            f"{monster['size']} {monster['type']}, {monster['alignment']}",
+            f"Challenge {monster['challenge_rating']} ({monster['xp']} XP)",
+            _actions(monster.get("special_abilities")),
+            _actions(monster.get("actions")),
+            _actions(monster.get("legendary_actions")),
+            _actions(monster.get("reactions")),
+        )
+    for index, item in SRD_equipment.items():
+        yield "equipment", index, item["name"], _join(
+            item["equipment_category"]["name"],
+            item.get("desc"),
+            item.get("special"),
+            [prop["name"] for prop in item.get("properties", [])],
+        )
+    for category, subsections in SRD_rules.items():
+        for name, desc in subsections.items():
+            yield "rule", f"{category}/{name}", name, desc
+
+
+def content_key() -> str:
+    """
+    Identifies the documents an index is built from: the manifest's hash of
+    each cached SRD file (or its size and mtime if it has no entry), each
+    homebrew document and the size and mtime of each stat block file.
+    """
+    digest = hashlib.sha256(str(INDEX_VERSION).encode())
+    manifest = SRD.manifest
+    for uri, filepath in sorted(SRD.index.items()):
+        entry = None if manifest is None else manifest.get(uri)
+        if entry is None:
+            try:
+                info = stat(filepath)
+            except OSError:
+                continue
+            key = f"{info.st_size} {info.st_mtime_ns}"
+        else:
+            key = entry["sha256"]
+        digest.update(f"{uri} {key}\n".encode())
+    overlay = SRD.overlay
+    if overlay is not None:
+        for uri in sorted(overlay.sources):
+            document = content_hash(encode(overlay.documents[uri]))
+            digest.update(f"{uri} {document}\n".encode())
+    for filepath in stat_block_files():
+        info = stat(filepath)
+        digest.update(
+            f"{path.basename(filepath)} {info.st_size} {info.st_mtime_ns}\n".encode()
+        )
+    return digest.hexdigest()
+
+
+class SearchIndex:
+    def __init__(self, data: dict):
+        self.kinds: list[str] = data["kinds"]
+        self.indexes: list[str] = data["indexes"]
+        self.titles: list[str] = data["titles"]
+        self.texts: list[str] = data["texts"]
+        self.postings: dict[str, tuple[list[int], list[int]]] = data["postings"]
+        self.norms: list[float] = data["norms"]
+        self.idf: dict[str, float] = data["idf"]
+        # identifies the documents this was built from, see `content_key`
+        self.key: Optional[str] = data.get("key")
+        self.title_keys = [" ".join(tokenize(title)) for title in self.titles]
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    @classmethod
+    def build(
+        cls, documents: Iterator[tuple[str, str, str, str]], key: Optional[str] = None
+    ) -> "SearchIndex":
+        kinds, indexes, titles, texts, lengths = [], [], [], [], []
+        postings: dict[str, tuple[list[int], list[int]]] = defaultdict(
+            lambda: ([], [])
+        )
+        for doc, (kind, index, title, text) in enumerate(documents):
+            tokens = tokenize(title) * TITLE_WEIGHT + tokenize(text)
+            for token, tf in Counter(tokens).items():
+                postings[token][0].append(doc)
+                postings[token][1].append(tf)
+            kinds.append(kind)
+            indexes.append(index)
+            titles.append(title)
+            texts.append(text)
+            lengths.append(len(tokens))
+
+        count = len(titles)
+        average = sum(lengths) / count if count else 0
+        return cls(
+            {
+                "key": key,
+                "kinds": kinds,
+                "indexes": indexes,
+                "titles": titles,
+                "texts": texts,
+                "postings": dict(postings),
+                "norms": [K1 * (1 - B + B * length / average) for length in lengths],
+                "idf": {
+                    token: math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+                    for token, (docs, __) in postings.items()
+                },
+            }
+        )
+
+    def search(
+        self, query: str, limit: int = 5, kind: Optional[str] = None
+    ) -> list[SearchResult]:
+        """
+        The `limit` best matches for `query`, optionally only of one `kind`.
+        Exact matches, whose whole title appears in the query, are ranked first.
+        """
+        tokens = tokenize(query)
+        scores: dict[int, float] = defaultdict(float)
+        for token in set(tokens):
+            if token not in self.postings:
+                continue
+            idf = self.idf[token]
+            docs, tfs = self.postings[token]
+            for doc, tf in zip(docs, tfs):
+                scores[doc] += idf * tf * (K1 + 1) / (tf + self.norms[doc])
+        if kind is not None:
+            scores = {doc: s for doc, s in scores.items() if self.kinds[doc] == kind}
+
+        query_key = f" {' '.join(tokens)} "
+
+        def exact(doc: int) -> bool:
+            return f" {self.title_keys[doc]} " in query_key
+
+        # documents named outright in the query come first, however they score
+        return [
+            SearchResult(
+                kind=self.kinds[doc],
+                index=self.indexes[doc],
+                title=self.titles[doc],
+                text=self.texts[doc],
+                score=score,
+                exact=exact(doc),
+            )
+            for doc, score in heapq.nlargest(
+                limit, scores.items(), key=lambda item: (exact(item[0]), item[1])
+            )
+        ]
+
+    def save(self, filepath: str) -> None:
+        data = {
+            "version": INDEX_VERSION,
+            "key": self.key,
+            "kinds": self.kinds,
+            "indexes": self.indexes,
+            "titles": self.titles,
+            "texts": self.texts,
+            "postings": self.postings,
+            "norms": self.norms,
+            "idf": self.idf,
+        }
+        tmp = f"{filepath}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                marshal.dump(data, f)
+            replace(tmp, filepath)
+        finally:
+            if path.exists(tmp):
+                remove(tmp)
+
+    @classmethod
+    def load(cls, filepath: str, key: Optional[str] = None) -> Optional["SearchIndex"]:
+        """
+        Returns the saved index, or None if it is missing or out of date: from
+        an older version, or built from documents other than those `key` identifies
+        """
+        if not path.exists(filepath):
+            return None
+        try:
+            with open(filepath, "rb") as f:
+                data = marshal.load(f)
+        except (EOFError, ValueError, TypeError) as e:
+            LOG.error(f"Ignoring search index: {str(e)}")
+            return None
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            return None
+        if key is not None and data.get("key") != key:
+            LOG.info("Search index is out of date")
+            return None
+        return cls(data)
+
+
+_index: Optional[SearchIndex] = None
+
+
+def get_index(rebuild: bool = False) -> SearchIndex:
+    """The search index, loaded from disk or built from the SRD and saved"""
+    global _index
+    if _index is None or rebuild:
+        key = content_key()
+        _index = None if rebuild else SearchIndex.load(SEARCH_INDEX, key)
+        if _index is None:
+            _index = SearchIndex.build(srd_documents(), key)
+            try:
+                _index.save(SEARCH_INDEX)
+            except OSError as e:
+                LOG.error(f"Couldn't save search index: {str(e)}")
+    return _index
+
+
+def search(query: str, limit: int = 5, kind: Optional[str] = None) -> list[SearchResult]:
+    """Search SRD spells, monsters, equipment and rules with BM25"""
+    return get_index().search(query, limit=limit, kind=kind)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m dnd_character.search",
+        description="search SRD spells, monsters, equipment and rules offline",
+    )
+    parser.add_argument("query", nargs="?")
+    parser.add_argument("-n", "--limit", type=int, default=5)
+    parser.add_argument(
+        "-k", "--kind", choices=["spell", "monster", "equipment", "rule"]
+    )
+    parser.add_argument(
+        "--rebuild", help="rebuild the saved index", action="store_true"
+    )
+    args = parser.parse_args()
+
+    index = get_index(rebuild=args.rebuild)
+    if args.rebuild:
+        print(f"Indexed {len(index)} documents in {SEARCH_INDEX}")
+    if args.query:
+        for result in index.search(args.query, limit=args.limit, kind=args.kind):
+            print(f"{result.score:6.2f}  {result.kind:<9} {result.title}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Saves characters with a fixed schema, as plain dicts or as compact bytes.
+
+Spells, items and class features from the SRD are saved as their index;
+only custom ones, and changes made to SRD items, are saved in full.
+Loading a character reuses the SRD's documents instead of resolving its
+class again.
+
+The bytes are a MessagePack array of SCHEMA_VERSION followed by the value of
+each field in FIELDS, in the same form as `character_to_dict` gives them,
+except that the uid is 16 raw bytes.
+
+Version 2 added `equipped`; characters saved as version 1 can still be loaded.
+"""
+from typing import TYPE_CHECKING, Any, Optional, Union
+from uuid import UUID
+
+from .binary import packb, unpackb
+from .equipment import _Item
+from .inventory import Inventory
+from .spellcasting import SPELLS, _SPELL
+from .SRD import SRD
+from .templates import LEVEL_TEMPLATES
+
+if TYPE_CHECKING:
+    from .character import Character
+
+SCHEMA_VERSION = 2
+
+# Every saved field. Each is an argument of Character() and, except for level,
+# a key of dict(character); but equipped is the positions in the inventory of
+# the armor and shield worn.
+FIELDS = (
+    "uid",
+    "name",
+    "age",
+    "gender",
+    "description",
+    "background",
+    "personality",
+    "ideals",
+    "bonds",
+    "flaws",
+    "species",
+    "speed",
+    "alignment",
+    "class_name",
+    "class_index",
+    "level",
+    "experience",
+    "prof_bonus",
+    "ability_score_bonus",
+    "class_features",
+    "class_features_enabled",
+    "strength",
+    "dexterity",
+    "constitution",
+    "wisdom",
+    "intelligence",
+    "charisma",
+    "hd",
+    "max_hd",
+    "current_hd",
+    "max_hp",
+    "current_hp",
+    "temp_hp",
+    "proficiencies",
+    "saving_throws",
+    "spellcasting_stat",
+    "spell_slots",
+    "skills_strength",
+    "skills_dexterity",
+    "skills_wisdom",
+    "skills_intelligence",
+    "skills_charisma",
+    "wealth",
+    "wealth_detailed",
+    "armor_class",
+    "inventory",
+    "cantrips_known",
+    "spells_known",
+    "spells_prepared",
+    "player_options",
+    "death_saves",
+    "death_fails",
+    "exhaustion",
+    "dead",
+    "conditions",
+    "equipped",
+)
+# the fields of each older version which can still be loaded
+VERSION_FIELDS = {1: FIELDS[:-1], 2: FIELDS}
+SPELL_FIELDS = ("cantrips_known", "spells_known", "spells_prepared")
+RESTORED_FIELDS = (
+    "prof_bonus",
+    "ability_score_bonus",
+    "spell_slots",
+    "class_features",
+    "class_features_enabled",
+)
+# derived stats which are saved, and only restored if they were set to
+# something other than what they're worked out to be
+DERIVED_FIELDS = ("armor_class", "max_hp")
+
+
+class SchemaError(Exception):
+    pass
+
+
+def _save_spell(spell: _SPELL) -> Union[str, dict]:
+    if spell.index in SPELLS and SPELLS[spell.index] == spell:
+        return spell.index
+    return dict(spell)
+
+
+def _load_spell(value: Union[str, dict]) -> _SPELL:
+    if isinstance(value, str):
+        return SPELLS[value]
+    return _SPELL(**value)
+
+
+def _save_item(item: _Item) -> dict:
+    """`index` and `quantity` of an SRD item, along with any fields changed"""
+    own = item.own_fields()
+    if own is None:
+        return dict(item)
+    return {"index": item.index, "uid": item.uid, "quantity": item.quantity, **own}
+
+
+def _class_feature_documents(class_index: str) -> dict[str, Any]:
+    if class_index not in LEVEL_TEMPLATES:
+        return {}
+    return dict(LEVEL_TEMPLATES[class_index][-1].features)
+
+
+def _save_class_features(
+    class_features: dict[str, Any], class_index: str
+) -> list[Union[str, dict]]:
+    """The index of each of the class's own features, or else the whole document"""
+    srd = _class_feature_documents(class_index)
+    return [
+        index if srd.get(index) is feature or srd.get(index) == feature else feature
+        for index, feature in class_features.items()
+    ]
+
+
+def _load_class_features(
+    class_features: list[Union[str, dict]], class_index: str
+) -> dict[str, Any]:
+    srd = _class_feature_documents(class_index)
+    features = {}
+    for feature in class_features:
+        if isinstance(feature, str):
+            features[feature] = srd.get(feature) or SRD(f"/api/features/{feature}")
+        else:
+            features[feature["index"]] = feature
+    return features
+
+
+def _equipped(inventory: Inventory) -> list[int]:
+    return [
+        position
+        for position, item in enumerate(inventory)
+        if item is inventory.armor or item is inventory.shield
+    ]
+
+
+def character_to_dict(character: "Character") -> dict[str, Any]:
+    data = {}
+    for field in FIELDS[:-1]:
+        data[field] = getattr(character, field)
+    data["uid"] = str(character.uid)
+    data["experience"] = int(character.experience)
+    data["class_features"] = _save_class_features(
+        character.class_features, character.class_index
+    )
+    data["inventory"] = [_save_item(item) for item in character.inventory]
+    data["equipped"] = _equipped(character.inventory)
+    for field in SPELL_FIELDS:
+        data[field] = [_save_spell(spell) for spell in data[field]]
+    return {"version": SCHEMA_VERSION, **data}
+
+
+def character_from_dict(
+    data: dict[str, Any], cls: Optional[type["Character"]] = None
+) -> "Character":
+    """Loads a character saved by `character_to_dict`, as `cls` or else Character"""
+    from .character import Character
+    from .experience import level_at_experience
+
+    version = data.get("version")
+    if version not in VERSION_FIELDS:
+        raise SchemaError(f"Unsupported character schema version {version}")
+    missing = [field for field in VERSION_FIELDS[version] if field not in data]
+    if missing:
+        raise SchemaError(f"Character is missing {', '.join(missing)}")
+
+    kwargs = {field: data[field] for field in VERSION_FIELDS[version]}
+    class_index = kwargs["class_index"]
+    kwargs["class_features"] = _load_class_features(
+        kwargs["class_features"], class_index
+    )
+    for field in SPELL_FIELDS:
+        kwargs[field] = [_load_spell(spell) for spell in kwargs[field]]
+    inventory = [_Item(**item) for item in kwargs.pop("inventory")]
+    if version == 1:
+        # before equipped was saved, the armor and shield carried were worn
+        equipped = [
+            position
+            for position, item in enumerate(inventory)
+            if item.equipment_category["index"] == "armor"
+        ]
+    else:
+        equipped = kwargs.pop("equipped")
+    if kwargs["level"] == level_at_experience(kwargs["experience"]):
+        # only give a level which doesn't follow from the experience points
+        del kwargs["level"]
+    character = (Character if cls is None else cls)(**kwargs)
+    # Character() applies the class's level, which would undo any changes made
+    # to these since; and the inventory is restored as it was, instead of being
+    # given one item at a time like new items
+    character.inventory.clear()
+    for item in inventory:
+        character.inventory.add(item)
+    for position in equipped:
+        character.inventory.equip(inventory[position])
+    for field in RESTORED_FIELDS:
+        setattr(character, field, kwargs[field])
+    for field in DERIVED_FIELDS:
+        delattr(character, field)
+        if getattr(character, field) != kwargs[field]:
+            setattr(character, field, kwargs[field])
+    character.mark_clean()
+    return character
+
+
+def character_to_bytes(character: "Character") -> bytes:
+    data = character_to_dict(character)
+    data["uid"] = UUID(data["uid"]).bytes
+    return packb([SCHEMA_VERSION, *(data[field] for field in FIELDS)])
+
+
+def character_from_bytes(
+    encoded: bytes, cls: Optional[type["Character"]] = None
+) -> "Character":
+    try:
+        version, *values = unpackb(encoded)
+    except (ValueError, TypeError) as e:
+        raise SchemaError(f"Not a saved character: {str(e)}")
+    fields = VERSION_FIELDS.get(version)
+    if fields is None or len(values) != len(fields):
+        raise SchemaError(f"Unsupported character schema version {version}")
+    data = dict(zip(fields, values))
+    data["uid"] = str(UUID(bytes=data["uid"]))
+    return character_from_dict({"version": version, **data}, cls)
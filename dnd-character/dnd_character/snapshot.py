@@ -0,0 +1,200 @@
+"""
+Packs the JSON cache into a single versioned file which is read with mmap.
+
+File layout:
+    header   magic, format version, Python major and minor version and
+             marshal version it was built with, length of the offset table
+    table    marshal-encoded {"version": str, "records": {uri: (offset, length)},
+                              "digests": {uri: sha256 as in the manifest}}
+    records  marshal-encoded JSON documents, offsets relative to end of table
+
+Build with `python -m dnd_character.pack build`
+marshal's format depends on the Python version, so a snapshot built by
+another version is stale: `open_snapshot` rebuilds it if it can.
+"""
+import json
+import logging
+import marshal
+import mmap
+import struct
+import sys
+from os import path, remove, replace, walk
+from typing import Iterator, Optional, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .database import SRDDatabase
+
+LOG = logging.getLogger(__package__)
+
+MAGIC = b"DNDSRD"
+FORMAT_VERSION = 3
+HEADER = struct.Struct("<6sHBBHQ")
+# what marshal's output depends on
+INTERPRETER = (*sys.version_info[:2], marshal.version)
+SNAPSHOT_FILENAME = "srd.snapshot"
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class StaleSnapshotError(SnapshotError):
+    """The snapshot is from another format or Python version; rebuild it"""
+
+
+def uri_to_filename(uri: str) -> str:
+    return f"{uri[1:].replace('/', '_')}.json"
+
+
+def is_document(uri: str) -> bool:
+    """True for SRD API URIs, as opposed to other files kept in the JSON cache"""
+    return uri.startswith("/api/")
+
+
+def iter_json_cache(cache_dir: str) -> Iterator[tuple[str, str]]:
+    """
+    Yields (uri, filepath) for each JSON document in `cache_dir`. Other JSON
+    files kept there, such as the manifest, are skipped.
+    """
+    for dirname, __, files in walk(cache_dir):
+        for fp in files:
+            if not fp.startswith("api_") or path.splitext(fp)[1] != ".json":
+                continue
+            yield f"/{fp.replace('_', '/')[:-5]}", f"{dirname}/{fp}"
+
+
+def build_snapshot(cache_dir: str, output: str, version: str = "") -> int:
+    """
+    Writes every JSON document in `cache_dir` into a snapshot at `output`.
+    The file is written next to `output` first and renamed into place.
+    Returns the number of records written.
+    """
+    from .manifest import content_hash, encode
+
+    records, digests = {}, {}
+    body = bytearray()
+    for uri, fp in sorted(iter_json_cache(cache_dir)):
+        with open(fp, "r") as f:
+            data = json.load(f)
+        encoded = marshal.dumps(data)
+        records[uri] = (len(body), len(encoded))
+        digests[uri] = content_hash(encode(data))
+        body += encoded
+
+    table = marshal.dumps({"version": version, "records": records, "digests": digests})
+    tmp = f"{output}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, *INTERPRETER, len(table)))
+            f.write(table)
+            f.write(body)
+        replace(tmp, output)
+    finally:
+        if path.exists(tmp):
+            remove(tmp)
+    return len(records)
+
+
+class Snapshot:
+    """
+    Read-only view of a snapshot file. Only the offset table is decoded on open;
+    records are unmarshalled from the memory map when requested.
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        with open(filepath, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, format_version, *interpreter, table_size = HEADER.unpack_from(
+                self._mmap, 0
+            )
+        except struct.error as e:
+            self.close()
+            raise SnapshotError(f"{filepath} is truncated") from e
+        if magic != MAGIC:
+            self.close()
+            raise SnapshotError(f"{filepath} is not an SRD snapshot")
+        if format_version != FORMAT_VERSION:
+            self.close()
+            raise StaleSnapshotError(
+                f"{filepath} has format version {format_version}, expected {FORMAT_VERSION}"
+            )
+        if tuple(interpreter) != INTERPRETER:
+            self.close()
+            major, minor, marshal_version = interpreter
+            raise StaleSnapshotError(
+                f"{filepath} was built by Python {major}.{minor} "
+                f"with marshal version {marshal_version}"
+            )
+        table = marshal.loads(self._mmap[HEADER.size : HEADER.size + table_size])
+        self.version: str = table["version"]
+        self.records: dict[str, tuple[int, int]] = table["records"]
+        # the manifest's hash of each record's content when this was built
+        self.digests: dict[str, str] = table["digests"]
+        self._body = HEADER.size + table_size
+
+    def __contains__(self, uri: str) -> bool:
+        return uri in self.records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.records)
+
+    def get(self, uri: str) -> Optional[dict]:
+        try:
+            offset, length = self.records[uri]
+        except KeyError:
+            return None
+        start = self._body + offset
+        return marshal.loads(self._mmap[start : start + length])
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+def open_snapshot(
+    filepath: str, cache_dir: Optional[str] = None
+) -> Optional[Snapshot]:
+    """
+    Returns a Snapshot, or None if the file is missing or unusable. A stale
+    snapshot is rebuilt from the JSON documents in `cache_dir`, if given.
+    """
+    if not path.exists(filepath):
+        return None
+    try:
+        return Snapshot(filepath)
+    except StaleSnapshotError as e:
+        if cache_dir is None or next(iter_json_cache(cache_dir), None) is None:
+            LOG.error(f"Ignoring SRD snapshot: {str(e)}")
+            return None
+        LOG.warning(f"Rebuilding SRD snapshot: {str(e)}")
+    except (SnapshotError, ValueError, EOFError) as e:
+        LOG.error(f"Ignoring SRD snapshot: {str(e)}")
+        return None
+    try:
+        build_snapshot(cache_dir, filepath)
+        return Snapshot(filepath)
+    except (OSError, SnapshotError, ValueError) as e:
+        LOG.error(f"Couldn't rebuild SRD snapshot: {str(e)}")
+        return None
+
+
+def verify_store(
+    store: Union["Snapshot", "SRDDatabase"], cache_dir: str
+) -> list[str]:
+    """
+    Compares a snapshot or database against the JSON files it was built from.
+    Returns the URIs which are missing from either side or whose data differs.
+    """
+    mismatched = []
+    seen = set()
+    for uri, fp in iter_json_cache(cache_dir):
+        seen.add(uri)
+        with open(fp, "r") as f:
+            if store.get(uri) != json.load(f):
+                mismatched.append(uri)
+    mismatched.extend(uri for uri in store if uri not in seen)
+    return sorted(mismatched)
@@ -0,0 +1,65 @@
+"""
+An inverted index over the SRD spells, for composable queries such as:
+
+    spells.where(cls="wizard", level__lte=3, ritual=True)
+
+Every spell has a position in the index. Each indexed value maps to an int
+used as a bitset of the spells having that value, so a query is a handful
+of bitwise ANDs and ORs no matter how many spells there are.
+"""
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Mapping
+
+from .bitset import BitSet, BitsetIndex
+
+if TYPE_CHECKING:
+    from .spellcasting import _SPELL
+
+
+def _spell_values(spell: dict) -> dict[str, Iterable[Any]]:
+    """The values of each indexed field for one SRD spell document"""
+    damage_type = (spell.get("damage") or {}).get("damage_type")
+    return {
+        "cls": [classs["index"] for classs in spell["classes"]],
+        "subclass": [subclass["index"] for subclass in spell["subclasses"]],
+        "level": [spell["level"]],
+        "school": [spell["school"]["index"]],
+        "ritual": [spell["ritual"]],
+        "concentration": [spell["concentration"]],
+        "casting_time": [spell["casting_time"]],
+        "damage_type": [] if damage_type is None else [damage_type["index"]],
+    }
+
+
+FIELDS = (
+    "cls",
+    "subclass",
+    "level",
+    "school",
+    "ritual",
+    "concentration",
+    "casting_time",
+    "damage_type",
+)
+
+
+class SpellIndex(BitsetIndex):
+    """
+    Built on first use from the SRD spell documents. `spells` maps spell
+    indexes to _SPELL objects and is used to return results.
+    """
+
+    noun = "spells"
+    fields = FIELDS
+    values = staticmethod(_spell_values)
+
+    def __init__(
+        self,
+        documents: Callable[[], Mapping[str, dict]],
+        spells: Mapping[str, "_SPELL"],
+    ):
+        super().__init__(documents, spells)
+        self.spells = spells
+
+
+# query results were SpellSets before other documents were indexed too
+SpellSet = BitSet
@@ -1,12 +1,16 @@
 from typing import Union, Optional
 from dataclasses import dataclass, asdict
-from .SRD import SRD, SRD_endpoints, SRD_classes
+from functools import partial
+from .SRD import SRD, SRD_endpoints, SRD_classes, LazyMapping
+from .spell_index import SpellIndex
 
 
-SRD_spells = {
-    spell["index"]: SRD(spell["url"])
-    for spell in SRD(SRD_endpoints["spells"])["results"]
-}
+SRD_spells = LazyMapping(
+    lambda: {
+        spell["index"]: partial(SRD, spell["url"])
+        for spell in SRD(SRD_endpoints["spells"])["results"]
+    }
+)
 
 
 @dataclass(kw_only=True, frozen=True, slots=True)
@@ -39,28 +43,30 @@ class _SPELL:
             yield k, v
 
 
-SPELLS: dict[str, _SPELL] = {
-    index: _SPELL(**spell) for index, spell in SRD_spells.items()
-}
+# each _SPELL is built the first time it is looked up
+SPELLS: LazyMapping = LazyMapping(
+    lambda: {
+        index: lambda index=index: _SPELL(**SRD_spells[index])
+        for index in SRD_spells
+    }
+)
 
 
-spell_names_by_level = {
-    i: [key for key, val in SRD_spells.items() if val["level"] == i] for i in range(10)
-}
+# Query spells by class, subclass, level, school, ritual, concentration,
+# casting_time or damage_type, e.g. spells.where(cls="wizard", level__lte=3)
+spells = SpellIndex(lambda: SRD_spells, SPELLS)
 
-spell_names_by_class = {
-    i: [
-        key
-        for key, val in SRD_spells.items()
-        if i in (cindex["index"] for cindex in val["classes"])
-    ]
-    for i in SRD_classes.keys()
-}
+
+spell_names_by_level = LazyMapping(
+    lambda: {i: lambda i=i: spells.where(level=i).names() for i in range(10)}
+)
+
+spell_names_by_class = LazyMapping(
+    lambda: {i: lambda i=i: spells.where(cls=i).names() for i in SRD_classes.keys()}
+)
 
 
 def spells_for_class_level(classs: str, level: int) -> set:
     if level > 9 or level < 0:
         raise ValueError("Spell levels only go from 0-9")
-    return set(spell_names_by_class[classs]).intersection(
-        set(spell_names_by_level[level])
-    )
+    return set(spells.where(cls=classs, level=level).names())
@@ -0,0 +1,466 @@
+"""
+Compiles the campaign's custom monsters, kept as CSV stat blocks in
+runPack/guides, into records shaped like SRD monster documents so they
+can be used by `Monster(index)` and the monster index.
+
+The compiled records are cached in the JSON cache under the SHA-256 of each
+CSV file, so a file is only parsed again after it changes. A file whose size
+and modification time match the cache isn't hashed again either.
+
+    python -m dnd_character.stat_blocks
+"""
+import csv
+import hashlib
+import json
+import logging
+import re
+from glob import glob
+from os import environ, path, stat
+from typing import Any, Optional
+
+from .SRD import JSON_CACHE
+from .writer import write_json_atomic
+
+LOG = logging.getLogger(__package__)
+
+STAT_BLOCKS = environ.get(
+    "STAT_BLOCKS",
+    path.normpath(
+        f"{path.dirname(path.abspath(__file__))}/../../runPack/guides"
+    ),
+)
+STAT_BLOCKS_CACHE = f"{JSON_CACHE}/stat_blocks.json"
+# change when the compiled records change, so that cached ones are rebuilt
+STAT_BLOCKS_VERSION = 1
+
+ABILITIES = {
+    "STR": "strength",
+    "DEX": "dexterity",
+    "CON": "constitution",
+    "INT": "intelligence",
+    "WIS": "wisdom",
+    "CHA": "charisma",
+}
+DAMAGE_TYPES = (
+    "acid bludgeoning cold fire force lightning necrotic piercing poison "
+    "psychic radiant slashing thunder".split()
+)
+SIZES = ("Tiny", "Small", "Medium", "Large", "Huge", "Gargantuan")
+
+# Dungeon Master's Guide: XP by challenge rating, and the hit points, armor
+# class, attack bonus and damage per round expected at each challenge rating
+CHALLENGE_RATINGS = (0, 0.125, 0.25, 0.5, *range(1, 31))
+XP_BY_CR = (
+    10, 25, 50, 100, 200, 450, 700, 1100, 1800, 2300, 2900, 3900, 5000,
+    5900, 7200, 8400, 10000, 11500, 13000, 15000, 18000, 20000, 22000, 25000,
+    33000, 41000, 50000, 62000, 75000, 90000, 105000, 120000, 135000, 155000,
+)  # fmt: skip
+MAX_HIT_POINTS = (
+    6, 35, 49, 70, *range(85, 356, 15), *range(400, 851, 45),
+)  # fmt: skip
+MAX_DAMAGE = (1, 3, 5, 8, *range(14, 123, 6), *range(140, 321, 18))
+ARMOR_CLASS = (13, 13, 13, 13, 13, 13, 13, 14, 15, 15, 15, 16, 16, 17, 17, 17,
+               18, 18, 18, 18, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19,
+               19, 19)  # fmt: skip
+ATTACK_BONUS = (3, 3, 3, 3, 3, 3, 4, 5, 6, 6, 6, 7, 7, 7, 8, 8, 8, 8, 8, 9,
+                10, 10, 10, 10, 11, 11, 11, 12, 12, 12, 13, 13, 13, 14)  # fmt: skip
+
+EMPTY = {"", "-", "—", "none"}
+
+# "Name (Recharge 5–6): description", but not "Hit: 21 (4d8 + 3)" inside one
+ENTRY_RE = re.compile(
+    r"(?:^|(?<=[.!?]) )(?!(?:Hit|Miss|Can cast|Spells include):)([A-Z][^.:]{0,60}?):\s",
+    re.MULTILINE,
+)
+# "3 per round: " before a list of legendary actions
+COUNT_RE = re.compile(r"^\d+ per \w+:\s*")
+ATTACK_RE = re.compile(r"([+-]\d+)(?: to hit)?,")
+DICE_RE = re.compile(r"(\d+d\d+(?:\s*[+-]\s*\d+)?)")
+DAMAGE_RE = re.compile(
+    r"(\d+d\d+(?:\s*[+-]\s*\d+)?)\)?\s+(" + "|".join(DAMAGE_TYPES) + ")",
+    re.IGNORECASE,
+)
+DC_RE = re.compile(r"DC (\d+) (STR|DEX|CON|INT|WIS|CHA)", re.IGNORECASE)
+RECHARGE_RE = re.compile(r"Recharge (\d)(?:[–-]6)?")
+BONUS_RE = re.compile(r"([A-Za-z][A-Za-z ]*?) ([+-]\d+)")
+
+
+def slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+
+
+def reference(kind: str, name: str, index: Optional[str] = None) -> dict:
+    index = slug(name) if index is None else index
+    return {"index": index, "name": name, "url": f"/api/{kind}/{index}"}
+
+
+def _split(text: str, separator: str = ",") -> list[str]:
+    """Split outside of parentheses, dropping empty and placeholder values"""
+    parts, depth, current = [], 0, ""
+    for char in text:
+        depth += char == "("
+        depth -= char == ")"
+        if char == separator and depth == 0:
+            parts.append(current)
+            current = ""
+        else:
+            current += char
+    parts.append(current)
+    return [part.strip() for part in parts if part.strip().lower() not in EMPTY]
+
+
+def parse_type(text: str) -> dict[str, Any]:
+    """ "Medium Humanoid (Human), Chaotic Evil" """
+    kind, __, alignment = text.partition("),")
+    if alignment:
+        kind += ")"
+    else:
+        kind, __, alignment = text.partition(",")
+    size, __, kind = kind.strip().partition(" ")
+    subtype = None
+    if "(" in kind:
+        kind, __, subtype = kind.partition("(")
+        subtype = subtype.rstrip(")").strip().lower()
+    return {
+        "size": size if size in SIZES else "Medium",
+        "type": kind.strip().lower(),
+        "subtype": subtype,
+        "alignment": alignment.strip().lower() or "unaligned",
+    }
+
+
+def parse_speed(text: str) -> dict[str, Any]:
+    """ "0 ft., fly 60 ft. (hover)" """
+    speed: dict[str, Any] = {}
+    for part in _split(text):
+        hover = "hover" in part.lower()
+        match = re.match(r"(?:([a-z]+) )?(\d+) ?ft", part.strip(), re.IGNORECASE)
+        if match is None:
+            continue
+        mode = (match.group(1) or "walk").lower()
+        speed[mode] = f"{match.group(2)} ft."
+        if hover:
+            speed["hover"] = True
+    return speed
+
+
+def parse_abilities(text: str) -> dict[str, int]:
+    """ "STR 14, DEX 10, ..." """
+    scores = {}
+    for name, value in re.findall(r"(STR|DEX|CON|INT|WIS|CHA)\s+(\d+)", text):
+        scores[ABILITIES[name]] = int(value)
+    return {ability: scores.get(ability, 10) for ability in ABILITIES.values()}
+
+
+def parse_proficiencies(saves: str, skills: str) -> list[dict]:
+    proficiencies = []
+    for name, bonus in BONUS_RE.findall(saves):
+        ability = name.strip().upper()[:3]
+        proficiencies.append(
+            {
+                "value": int(bonus),
+                "proficiency": reference(
+                    "proficiencies",
+                    f"Saving Throw: {ability}",
+                    f"saving-throw-{ability.lower()}",
+                ),
+            }
+        )
+    for name, bonus in BONUS_RE.findall(skills):
+        name = name.strip()
+        proficiencies.append(
+            {
+                "value": int(bonus),
+                "proficiency": reference(
+                    "proficiencies", f"Skill: {name}", f"skill-{slug(name)}"
+                ),
+            }
+        )
+    return proficiencies
+
+
+def parse_damage_list(text: str) -> list[str]:
+    """ "Acid, Fire; Bludgeoning, Piercing, and Slashing from Nonmagical Attacks" """
+    damage = []
+    for part in _split(text, ";"):
+        if " from " in part or "nonmagical" in part.lower():
+            damage.append(part.lower())
+        else:
+            damage.extend(
+                item.removeprefix("and ").lower() for item in _split(part)
+            )
+    return damage
+
+
+def parse_conditions(text: str) -> list[dict]:
+    return [
+        reference("conditions", name.split("(")[0].strip())
+        for name in _split(text)
+    ]
+
+
+def parse_senses(text: str) -> dict[str, Any]:
+    """ "Darkvision 60 ft., Passive Perception 15" """
+    senses: dict[str, Any] = {}
+    for name, value in re.findall(r"([A-Za-z ]+?) (\d+)(?: ?ft)?", text):
+        name = name.strip(" ,.").lower().replace(" ", "_")
+        if name == "passive_perception":
+            senses[name] = int(value)
+        else:
+            senses[name] = f"{value} ft."
+    return senses
+
+
+def parse_entries(text: str) -> list[dict[str, Any]]:
+    """
+    Split free text like "Lurching Swipe: +5 to hit, 1d10+2 bludgeoning
+    damage. Infectious Bite: DC 13 CON save..." into named entries, with
+    attack bonus, damage, saving throw DC and recharge pulled out of each.
+    """
+    entries = []
+    text = COUNT_RE.sub("", text.strip())
+    if text.lower() in EMPTY:
+        return entries
+    named: list[tuple[str, str]] = []
+    starts = list(ENTRY_RE.finditer(text))
+    if not starts or starts[0].start() > 0:
+        # a comma separated list such as "Cut the Feed, Overstimulate" or
+        # "Manifest Mind (cast from avatar), Rigged Vote (Recharge 5–6): ..."
+        end = starts[0].start() if starts else len(text)
+        for part in _split(text[:end]):
+            name, __, desc = part.partition(":")
+            if not desc and name.endswith(")"):
+                name, __, desc = name[:-1].partition("(")
+            named.append((name.strip(), desc.strip()))
+    for i, match in enumerate(starts):
+        end = starts[i + 1].start() if i + 1 < len(starts) else len(text)
+        named.append((match.group(1).strip(" •"), text[match.end() : end].strip()))
+
+    for name, desc in named:
+        entry: dict[str, Any] = {"name": name, "desc": desc}
+
+        attack = ATTACK_RE.search(desc)
+        if attack is not None:
+            entry["attack_bonus"] = int(attack.group(1))
+        damage = [
+            {
+                "damage_type": reference(
+                    "damage-types", damage_type.capitalize(), damage_type.lower()
+                ),
+                "damage_dice": dice.replace(" ", ""),
+            }
+            for dice, damage_type in DAMAGE_RE.findall(desc)
+        ]
+        if not damage and attack is not None:
+            dice = DICE_RE.search(desc)
+            if dice is not None:
+                damage = [{"damage_dice": dice.group(1).replace(" ", "")}]
+        if damage:
+            entry["damage"] = damage
+        dc = DC_RE.search(desc)
+        if dc is not None:
+            ability = dc.group(2).upper()
+            entry["dc"] = {
+                "dc_type": reference("ability-scores", ability, ability.lower()),
+                "dc_value": int(dc.group(1)),
+                "success_type": "half" if "half" in desc.lower() else "none",
+            }
+        recharge = RECHARGE_RE.search(name)
+        if recharge is not None:
+            entry["usage"] = {
+                "type": "recharge on roll",
+                "dice": "1d6",
+                "min_value": int(recharge.group(1)),
+            }
+        entries.append(entry)
+    return entries
+
+
+def average_damage(dice: str) -> float:
+    """13.5 from "2d8+4" """
+    match = re.fullmatch(r"(\d+)d(\d+)([+-]\d+)?", dice)
+    if match is None:
+        return 0
+    count, sides, bonus = match.groups()
+    return int(count) * (int(sides) + 1) / 2 + int(bonus or 0)
+
+
+def estimate_challenge_rating(
+    hit_points: int, armor_class: int, actions: list[dict]
+) -> float:
+    """
+    The Dungeon Master's Guide method: the average of a defensive rating from
+    hit points and armor class and an offensive rating from the most damaging
+    action and its attack bonus or save DC
+    """
+
+    def step(value: float, table: tuple) -> int:
+        for i, limit in enumerate(table):
+            if value <= limit:
+                return i
+        return len(table) - 1
+
+    defensive = step(hit_points, MAX_HIT_POINTS)
+    defensive += int((armor_class - ARMOR_CLASS[defensive]) / 2)
+
+    best, bonus = 0.0, None
+    for action in actions:
+        damage = sum(
+            average_damage(part["damage_dice"]) for part in action.get("damage", [])
+        )
+        if "attack_bonus" in action and "each" in action["desc"]:
+            damage *= 2
+        if damage > best:
+            best = damage
+            bonus = action.get("attack_bonus")
+            if bonus is None and "dc" in action:
+                # a save DC counts like an attack bonus 8 lower
+                bonus = action["dc"]["dc_value"] - 8
+    offensive = step(best, MAX_DAMAGE)
+    if bonus is not None:
+        offensive += int((bonus - ATTACK_BONUS[offensive]) / 2)
+
+    if best == 0:
+        # e.g. a spellcaster whose spells aren't written out as actions
+        offensive = defensive
+    rating = (max(defensive, 0) + max(offensive, 0)) // 2
+    return CHALLENGE_RATINGS[min(rating, len(CHALLENGE_RATINGS) - 1)]
+
+
+def eval_fraction(text: str) -> float:
+    """0.25 from "1/4" """
+    numerator, __, denominator = text.partition("/")
+    return float(numerator) / float(denominator or 1)
+
+
+def compile_row(row: dict[str, str]) -> dict[str, Any]:
+    """One CSV row as a dict shaped like an SRD monster document"""
+
+    def get(column: str) -> str:
+        return (row.get(column) or "").strip()
+
+    name = get("Name")
+    index = slug(name.split(",")[0])
+    hit_points = int(get("HP"))
+    armor_class = int(get("AC"))
+
+    entries = parse_entries(get("Abilities")) + parse_entries(get("Actions"))
+    actions, special_abilities, reactions = [], [], []
+    for entry in entries:
+        if "reaction" in entry["name"].lower():
+            reactions.append(entry)
+        elif "attack_bonus" in entry or "damage" in entry or "dc" in entry:
+            actions.append({**entry, "actions": []})
+        else:
+            special_abilities.append(entry)
+    legendary_actions = parse_entries(get("Legendary Actions"))
+
+    challenge_rating = get("Challenge") or get("CR")
+    if challenge_rating:
+        cr = float(eval_fraction(challenge_rating.split()[0]))
+    else:
+        cr = estimate_challenge_rating(hit_points, armor_class, actions)
+
+    abilities = parse_abilities(get("Stats"))
+    senses = parse_senses(get("Senses"))
+    senses.setdefault("passive_perception", 10 + (abilities["wisdom"] - 10) // 2)
+
+    return {
+        "index": index,
+        "name": name,
+        "url": f"/homebrew/monsters/{index}",
+        **parse_type(get("Type")),
+        "armor_class": [{"type": "natural", "value": armor_class}],
+        "hit_points": hit_points,
+        "hit_dice": "",
+        "hit_points_roll": "",
+        "speed": parse_speed(get("Speed")),
+        **abilities,
+        "proficiencies": parse_proficiencies(
+            get("Saving Throws"), get("Skills")
+        ),
+        "damage_vulnerabilities": parse_damage_list(get("Damage Vulnerabilities")),
+        "damage_resistances": parse_damage_list(get("Damage Resistances")),
+        "damage_immunities": parse_damage_list(get("Damage Immunities")),
+        "condition_immunities": parse_conditions(get("Condition Immunities")),
+        "senses": senses,
+        "languages": "" if get("Languages").lower() in EMPTY else get("Languages"),
+        "challenge_rating": cr,
+        "xp": XP_BY_CR[CHALLENGE_RATINGS.index(cr)] if cr in CHALLENGE_RATINGS else 0,
+        "special_abilities": special_abilities,
+        "legendary_actions": legendary_actions,
+        "actions": actions,
+        "reactions": reactions or None,
+    }
+
+
+def compile_file(filepath: str) -> list[dict[str, Any]]:
+    with open(filepath, newline="", encoding="utf-8") as f:
+        return [compile_row(row) for row in csv.DictReader(f) if row.get("Name")]
+
+
+def stat_block_files(directory: str = STAT_BLOCKS) -> list[str]:
+    return sorted(glob(f"{directory}/*Stat_Block*.csv"))
+
+
+def load_stat_blocks(directory: str = STAT_BLOCKS) -> dict[str, dict[str, Any]]:
+    """
+    Every compiled monster in `directory`, by index. Files whose hash matches
+    the cache aren't parsed again, and files whose size and mtime match it
+    aren't read at all; the cache is rewritten if any changed.
+    """
+    if not directory or not path.isdir(directory):
+        return {}
+    try:
+        with open(STAT_BLOCKS_CACHE) as f:
+            cache = json.load(f)
+        if cache.get("version") != STAT_BLOCKS_VERSION:
+            cache = {}
+    except (OSError, ValueError):
+        cache = {}
+    files: dict[str, dict] = cache.get("files", {})
+
+    compiled, changed = {}, False
+    for filepath in stat_block_files(directory):
+        filename = path.basename(filepath)
+        info = stat(filepath)
+        entry = files.get(filename)
+        if (
+            entry is None
+            or entry.get("size") != info.st_size
+            or entry.get("mtime_ns") != info.st_mtime_ns
+        ):
+            with open(filepath, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            if entry is None or entry["sha256"] != digest:
+                try:
+                    entry = {"sha256": digest, "monsters": compile_file(filepath)}
+                except (ValueError, KeyError) as e:
+                    LOG.error(f"Couldn't compile stat blocks in {filename}: {str(e)}")
+                    continue
+            entry.update(size=info.st_size, mtime_ns=info.st_mtime_ns)
+            files[filename] = entry
+            changed = True
+        for monster in entry["monsters"]:
+            compiled[monster["index"]] = monster
+
+    if changed:
+        try:
+            write_json_atomic(
+                STAT_BLOCKS_CACHE,
+                {"version": STAT_BLOCKS_VERSION, "files": files},
+                overwrite=True,
+            )
+        except OSError as e:
+            LOG.error(f"Couldn't save compiled stat blocks: {str(e)}")
+    return compiled
+
+
+if __name__ == "__main__":
+    for monster in load_stat_blocks().values():
+        attacks = sum("attack_bonus" in action for action in monster["actions"])
+        print(
+            f"{monster['index']:<32} CR {monster['challenge_rating']:<6g}"
+            f"AC {monster['armor_class'][0]['value']:<3} HP {monster['hit_points']:<4}"
+            f"{attacks} attacks"
+        )
@@ -0,0 +1,180 @@
+"""
+Precompiled class templates, so that building a Character merges ready-made
+data instead of resolving SRD references for every proficiency, equipment
+option and class feature.
+
+A ClassTemplate holds what a class gives at every level; its `levels` hold
+the cumulative result of a class's level progression at each level 1-20.
+Templates are compiled once per class, on first use, and never changed.
+"""
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING, Any, Mapping, Optional
+
+from .SRD import SRD, SRD_class_levels, LazyMapping, JsonData
+from .interning import FrozenDict
+
+if TYPE_CHECKING:
+    from .classes import _CLASS
+
+MAX_LEVEL = 20
+
+
+@dataclass(frozen=True, slots=True)
+class LevelTemplate:
+    """
+    The class's progression from level 1 up to this level. None means no
+    level so far sets that value, so a character keeps its own.
+    """
+
+    ability_score_bonus: Optional[int] = None
+    prof_bonus: Optional[int] = None
+    # (index, SRD document) of every class feature, in the order gained
+    features: tuple[tuple[str, JsonData], ...] = ()
+    spell_slots: Optional[Mapping[str, int]] = None
+
+
+@dataclass(frozen=True, slots=True)
+class ClassTemplate:
+    classs: "_CLASS"
+    # (index, {"name": ..., "type": ...}) of each proficiency
+    proficiencies: tuple[tuple[str, Mapping[str, str]], ...]
+    saving_throws: tuple[str, ...]
+    # (equipment index, quantity)
+    starting_equipment: tuple[tuple[str, int], ...]
+    starting_equipment_options: tuple[str, ...]
+    # levels[n] is the template for level n; levels[0] gives nothing
+    levels: tuple[LevelTemplate, ...]
+
+
+def compile_levels(class_levels: list[JsonData]) -> tuple[LevelTemplate, ...]:
+    """
+    A LevelTemplate for each level from 0 to 20. Like the SRD data, each level
+    applies every entry of `class_levels` up to the first one above it.
+    """
+    templates = [LevelTemplate()]
+    for level in range(1, MAX_LEVEL + 1):
+        ability_score_bonus = prof_bonus = spell_slots = None
+        features: dict[str, JsonData] = {}
+        for data in class_levels:
+            if data["level"] > level:
+                break
+            ability_score_bonus = data.get(
+                "ability_score_bonuses", ability_score_bonus
+            )
+            prof_bonus = data.get("prof_bonus", prof_bonus)
+            for feat in data["features"]:
+                features[feat["index"]] = SRD(feat["url"])
+            spell_slots = data.get("spellcasting", spell_slots)
+        templates.append(
+            LevelTemplate(
+                ability_score_bonus=ability_score_bonus,
+                prof_bonus=prof_bonus,
+                features=tuple(features.items()),
+                spell_slots=(
+                    None if spell_slots is None else FrozenDict(spell_slots)
+                ),
+            )
+        )
+    return tuple(templates)
+
+
+def _choices_string(option: dict[str, dict[str, str]]) -> str:
+    choices = SRD(option["equipment_category"]["url"])["equipment"]
+    choices_names = [c["name"] for c in choices]
+    return "{} (choice from {})".format(
+        option["equipment_category"]["name"], ", ".join(choices_names)
+    )
+
+
+def _starting_equipment_options(classs: "_CLASS") -> tuple[str, ...]:
+    """Describes each of the class's starting equipment choices in words"""
+    result = []
+    for item_option in classs.starting_equipment_options:
+        options = []
+        opts = item_option["from"]
+        if "options" not in opts.keys():
+            result.append(_choices_string(opts))
+            continue
+
+        for opt in opts["options"]:
+            opt_type = opt["option_type"]
+            if opt_type == "counted_reference":
+                options.append("{} x {}".format(opt["count"], opt["of"]["name"]))
+            elif opt_type == "choice":
+                how_many = opt["choice"]["choose"]
+                choices = _choices_string(opt["choice"]["from"])
+                options.append("{} x {}".format(how_many, choices))
+            elif opt_type == "multiple":
+                try:
+                    combo = [
+                        str(c["count"]) + " " + c["of"]["name"] for c in opt["items"]
+                    ]
+                    result.append("{}".format(", ".join(combo)))
+                except KeyError:
+                    # shield or martial weapon
+                    martial_weapons = _choices_string(
+                        opt["items"][0]["choice"]["from"]
+                    )
+                    shield = opt["items"][1]["of"]["name"]
+                    result.append(
+                        "choose 1 from {} or a {}".format(martial_weapons, shield)
+                    )
+                    continue
+
+        result.append("choose from {}".format(", ".join(options)))
+    return tuple(result)
+
+
+def compile_class(classs: "_CLASS") -> ClassTemplate:
+    proficiencies = []
+    for proficiency in classs.proficiencies:
+        data = SRD(proficiency["url"])
+        proficiencies.append(
+            (
+                proficiency["index"],
+                FrozenDict(name=data["name"], type=data["type"]),
+            )
+        )
+    return ClassTemplate(
+        classs=classs,
+        proficiencies=tuple(proficiencies),
+        saving_throws=tuple(
+            saving_throw["name"] for saving_throw in classs.saving_throws
+        ),
+        starting_equipment=tuple(
+            (item["equipment"]["index"], item["quantity"])
+            for item in classs.starting_equipment
+        ),
+        starting_equipment_options=_starting_equipment_options(classs),
+        levels=LEVEL_TEMPLATES[classs.index],
+    )
+
+
+def __level_templates() -> dict[str, Any]:
+    return {
+        index: lambda index=index: compile_levels(SRD_class_levels[index])
+        for index in SRD_class_levels
+    }
+
+
+def __class_templates() -> dict[str, Any]:
+    from .classes import CLASSES
+
+    return {index: partial(compile_class, CLASSES[index]) for index in CLASSES}
+
+
+LEVEL_TEMPLATES = LazyMapping(__level_templates)
+CLASS_TEMPLATES = LazyMapping(__class_templates)
+
+
+def class_template(classs: "_CLASS") -> ClassTemplate:
+    """
+    The compiled template for `classs`. Classes other than the ones in
+    CLASSES, e.g. modified copies, are compiled each time.
+    """
+    if classs.index in CLASS_TEMPLATES:
+        template = CLASS_TEMPLATES[classs.index]
+        if template.classs is classs:
+            return template
+    return compile_class(classs)
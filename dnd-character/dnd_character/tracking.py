@@ -0,0 +1,132 @@
+"""
+Change tracking for Character: the fields changed since it was last saved,
+and a fingerprint of its content, which is updated field by field as they change.
+
+Fields are seen to change when they are assigned, and when a dict or list
+assigned to a field is changed in place. Values inside those, such as an
+item in the inventory or a class feature's document, aren't watched: after
+changing one in place, call `character.mark_dirty(field)`.
+"""
+from collections.abc import Sequence
+from dataclasses import fields, is_dataclass
+from functools import lru_cache
+from typing import Any, Callable
+
+from .flyweight import SRDObject
+
+
+class TrackedDict(dict):
+    """A dict which calls `changed()` after every change to it"""
+
+    __slots__ = ("changed",)
+
+    def __init__(self, data: Any, changed: Callable[[], None]):
+        super().__init__(data)
+        self.changed = changed
+
+    def __reduce__(self) -> tuple:
+        # rebuilt in one go, so that copies don't call `changed` for each item
+        return (type(self), (type(self).__mro__[1](self), self.changed))
+
+
+class TrackedList(list):
+    """A list which calls `changed()` after every change to it"""
+
+    __slots__ = ("changed",)
+
+    def __init__(self, data: Any, changed: Callable[[], None]):
+        super().__init__(data)
+        self.changed = changed
+
+    def __reduce__(self) -> tuple:
+        # rebuilt in one go, so that copies don't call `changed` for each item
+        return (type(self), (type(self).__mro__[1](self), self.changed))
+
+
+def _tracked(method: Callable) -> Callable:
+    def change(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self.changed()
+        return result
+
+    change.__name__ = method.__name__
+    return change
+
+
+for _name in (
+    "__setitem__",
+    "__delitem__",
+    "__ior__",
+    "clear",
+    "pop",
+    "popitem",
+    "setdefault",
+    "update",
+):
+    setattr(TrackedDict, _name, _tracked(getattr(dict, _name)))
+
+for _name in (
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+    "append",
+    "clear",
+    "extend",
+    "insert",
+    "pop",
+    "remove",
+    "reverse",
+    "sort",
+):
+    setattr(TrackedList, _name, _tracked(getattr(list, _name)))
+
+
+TRACKED_TYPES = frozenset((dict, list, TrackedDict, TrackedList))
+
+
+def track(value: Any, changed: Callable[[], None]) -> Any:
+    """
+    `value`, or a tracked copy of it if it's a dict or list. Read-only
+    FrozenDicts don't need tracking.
+    """
+    kind = type(value)
+    if kind is dict or kind is TrackedDict:
+        return TrackedDict(value, changed)
+    if kind is list or kind is TrackedList:
+        return TrackedList(value, changed)
+    return value
+
+
+def content_hash(value: Any) -> int:
+    """
+    A hash of `value`'s content, for values which are equal if their content
+    is: like ==, the order of a dict's keys doesn't matter.
+    """
+    if isinstance(value, dict):
+        return hash(frozenset((key, content_hash(item)) for key, item in value.items()))
+    if isinstance(value, Sequence) and not isinstance(value, str):
+        # lists, tuples and Inventories
+        return hash(tuple(content_hash(item) for item in value))
+    if isinstance(value, SRDObject):
+        return hash(tuple(content_hash(getattr(value, name)) for name in value.fields))
+    if is_dataclass(value):
+        return hash(
+            tuple(content_hash(getattr(value, field.name)) for field in fields(value))
+        )
+    try:
+        return hash(value)
+    except TypeError:
+        # e.g. an Experience, which compares equal to its experience points
+        return hash(int(value)) if hasattr(value, "__int__") else hash(repr(value))
+
+
+@lru_cache(maxsize=None)
+def property_names(cls: type) -> frozenset[str]:
+    """Names of the properties of `cls`, which set other attributes instead"""
+    return frozenset(
+        name
+        for klass in cls.__mro__
+        for name, value in vars(klass).items()
+        if isinstance(value, property)
+    )
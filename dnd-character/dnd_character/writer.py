@@ -0,0 +1,107 @@
+"""
+Writes new JSON cache entries from a background thread so a cache miss
+doesn't block the caller on disk. Each file is written under a temporary
+name and renamed into place, so other processes never see a partial file.
+"""
+import atexit
+import json
+import logging
+import threading
+from os import chmod, fdopen, path, remove, replace, umask
+from queue import Empty, Queue
+from tempfile import mkstemp
+from typing import Any, Optional
+
+LOG = logging.getLogger(__package__)
+
+# umask can only be read by setting it, so read it once, before any threads
+UMASK = umask(0)
+umask(UMASK)
+
+
+def write_json_atomic(fp: str, data: Any, overwrite: bool = False) -> bool:
+    """
+    Write `data` to `fp` unless the file already exists, e.g. because another
+    process cached the same URI first. Returns True if the file was written.
+    """
+    if not overwrite and path.exists(fp):
+        return False
+    fd, tmp = mkstemp(dir=path.dirname(fp), prefix=".", suffix=".tmp")
+    try:
+        with fdopen(fd, "w") as f:
+            f.write(json.dumps(data))
+        # mkstemp makes the file private; give it the mode open() would
+        chmod(tmp, 0o666 & ~UMASK)
+        replace(tmp, fp)
+    except BaseException:
+        remove(tmp)
+        raise
+    return True
+
+
+class JsonWriter:
+    """
+    Queue of JSON files waiting to be written. A daemon thread writes them in
+    batches of up to `batch_size`, and anything left is flushed at exit.
+    Data stays readable from `pending` until its file has been written.
+    A file is queued once however often it's put before being written; the
+    latest data put is what gets written.
+    """
+
+    def __init__(self, batch_size: int = 64):
+        self.batch_size = batch_size
+        self.pending: dict[str, Any] = {}
+        self.overwrite: set[str] = set()
+        self.queued: set[str] = set()
+        self.written = 0
+        self._queue: Queue[str] = Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        atexit.register(self.flush)
+
+    def put(self, fp: str, data: Any, overwrite: bool = False) -> None:
+        with self._lock:
+            if fp in self.pending and not overwrite:
+                return
+            self.pending[fp] = data
+            if overwrite:
+                self.overwrite.add(fp)
+            if fp in self.queued:
+                return
+            self.queued.add(fp)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="srd-json-writer", daemon=True
+                )
+                self._thread.start()
+        self._queue.put(fp)
+
+    def flush(self) -> None:
+        """Block until every queued file has been written"""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            for fp in batch:
+                with self._lock:
+                    # a put from now on queues the file again
+                    self.queued.discard(fp)
+                    data = self.pending[fp]
+                    overwrite = fp in self.overwrite
+                try:
+                    if write_json_atomic(fp, data, overwrite=overwrite):
+                        self.written += 1
+                except Exception as e:
+                    LOG.error(f"Failed to write {path.basename(fp)}: {str(e)}")
+                finally:
+                    with self._lock:
+                        if fp not in self.queued:
+                            self.pending.pop(fp, None)
+                            self.overwrite.discard(fp)
+                    self._queue.task_done()
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from dnd_character.cache import LRUCache, SizeBoundedCache, make_cache
+
+
+def size(value):
+    return len(json.dumps(value))
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache["a"], cache["b"] = 1, 2
+    cache["a"]
+    cache["c"] = 3
+    assert list(cache) == ["a", "c"]
+    assert cache.evictions == 1
+
+
+def test_size_bounded_accounting():
+    cache = SizeBoundedCache(max_bytes=100)
+    cache["a"] = {"name": "a" * 20}
+    cache["b"] = {"name": "b" * 20}
+    assert cache.total_bytes == 2 * size({"name": "a" * 20})
+    cache["a"] = [1]
+    assert cache.total_bytes == size([1]) + size({"name": "b" * 20})
+    assert cache.pop("b") == {"name": "b" * 20}
+    assert cache.total_bytes == size([1])
+    assert cache.pop("missing", None) is None
+    with pytest.raises(KeyError):
+        cache.pop("missing")
+    del cache["a"]
+    assert cache.total_bytes == 0 and cache.sizes == {}
+    cache["c"] = [2]
+    cache.clear()
+    assert cache.total_bytes == 0 and cache.sizes == {}
+
+
+def test_size_bounded_evicts_by_size():
+    cache = SizeBoundedCache(max_bytes=50)
+    for key in "abcd":
+        cache[key] = "x" * 20
+    assert list(cache) == ["c", "d"]
+    assert cache.total_bytes == sum(cache.sizes.values()) <= 50
+    # popped entries free their space, so nothing is evicted early
+    cache.pop("c")
+    cache["e"] = "x" * 20
+    assert list(cache) == ["d", "e"]
+
+
+def test_make_cache():
+    assert isinstance(make_cache("bytes:10"), SizeBoundedCache)
+    assert make_cache("lru:3").maxsize == 3
+    with pytest.raises(ValueError):
+        make_cache("fifo:3")
@@ -0,0 +1,14 @@
+import sys
+
+import pytest
+
+from dnd_character.__main__ import main
+
+
+@pytest.mark.parametrize("args", [["-n", "0"], ["-n", "-1"], ["-j", "0"], ["-j", "x"]])
+def test_counts_must_be_positive(monkeypatch, capsys, args):
+    monkeypatch.setattr(sys, "argv", ["dnd-character", "-c", "wizard", *args])
+    with pytest.raises(SystemExit) as exit:
+        main()
+    assert exit.value.code == 2
+    assert "must be a positive integer" in capsys.readouterr().err
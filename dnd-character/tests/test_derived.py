@@ -0,0 +1,98 @@
+import pytest
+
+from dnd_character.character import Character
+from dnd_character.classes import CLASSES
+from dnd_character.derived import DerivedStat
+from dnd_character.equipment import Item
+
+STATS = {
+    name: value
+    for klass in reversed(Character.__mro__)
+    for name, value in vars(klass).items()
+    if isinstance(value, DerivedStat)
+}
+
+
+def make_character() -> Character:
+    character = Character(classs=CLASSES["wizard"], level=3, name="Raistlin")
+    for name in STATS:
+        getattr(character, name)
+    character.mark_clean()
+    return character
+
+
+def set_level(character):
+    character.level = 5
+
+
+def give_armor(character):
+    character.give_item(Item("chain-mail"))
+
+
+def learn_perception(character):
+    character.skills_wisdom["perception"] = True
+
+
+CHANGES = {
+    "strength": lambda character: setattr(character, "strength", 18),
+    "dexterity": lambda character: setattr(character, "dexterity", 18),
+    "constitution": lambda character: setattr(character, "constitution", 18),
+    "wisdom": lambda character: setattr(character, "wisdom", 18),
+    "intelligence": lambda character: setattr(character, "intelligence", 18),
+    "charisma": lambda character: setattr(character, "charisma", 18),
+    "level": set_level,
+    "inventory": give_armor,
+    "proficiency": learn_perception,
+    "prof_bonus": lambda character: setattr(character, "prof_bonus", 6),
+}
+
+
+@pytest.mark.parametrize("change", CHANGES)
+def test_change_invalidates_only_dependents(change):
+    character = make_character()
+    CHANGES[change](character)
+    changed = character.dirty_fields
+    assert changed
+    cached = set(character._derived)
+    for name, stat in STATS.items():
+        depends = bool(changed.intersection(stat.inputs))
+        assert (name not in cached) == depends, name
+        # a stat whose inputs are missing a field it uses would be out of date
+        assert getattr(character, name) == stat.fget(character), name
+
+
+def test_expected_dependents():
+    character = make_character()
+    character.wisdom = 20
+    assert set(STATS) - set(character._derived) == {
+        "wisdom_modifier",
+        "skill_bonuses",
+        "saving_throw_bonuses",
+        "passive_perception",
+        "spell_save_dc",
+    }
+    assert character.passive_perception == 15
+    assert character.skill_bonuses["insight"] == 5
+
+    learn_perception(character)
+    assert character.passive_perception == 15 + character.prof_bonus
+
+    character = make_character()
+    give_armor(character)
+    assert set(STATS) - set(character._derived) == {"armor_class"}
+    assert character.armor_class == 16
+
+
+@pytest.mark.parametrize("stat,value", [("armor_class", 25), ("max_hp", 99)])
+def test_overrides_survive_unrelated_changes(stat, value):
+    character = make_character()
+    setattr(character, stat, value)
+    for change, function in CHANGES.items():
+        # changing an input, e.g. equipping armor, works the value out again
+        if change not in STATS[stat].inputs and change != "inventory":
+            function(character)
+            assert getattr(character, stat) == value, change
+    character.give_item(Item("torch"))
+    assert getattr(character, stat) == value
+    delattr(character, stat)
+    assert getattr(character, stat) == STATS[stat].fget(character)
@@ -0,0 +1,128 @@
+import pytest
+
+from dnd_character.bitset import BitSet
+from dnd_character.encounters import (
+    DEADLY_CEILING,
+    DIFFICULTIES,
+    adjusted_xp,
+    build_encounters,
+    encounter_difficulty,
+    encounter_multiplier,
+    party_thresholds,
+)
+from dnd_character.monsters import SRD_monsters, _Monster, monsters
+from dnd_character.spell_index import SpellSet
+from dnd_character.spellcasting import spells
+
+
+def test_monster_filters():
+    undead = monsters.where(type="undead", cr__gte=2, cr__lte=4)
+    assert isinstance(undead, BitSet)
+    assert "ghast" in undead and "zombie" not in undead
+    for name in undead.names():
+        monster = SRD_monsters[name]
+        assert monster["type"] == "undead"
+        assert 2 <= monster["challenge_rating"] <= 4
+    assert all(isinstance(monster, _Monster) for monster in undead)
+
+
+def test_monster_list_fields():
+    fire = monsters.where(damage_immunities="fire")
+    assert "fire-giant" in fire
+    poisoned = monsters.where(condition_immunities="poisoned")
+    assert "zombie" in poisoned
+    assert set((fire & poisoned).names()) == set(fire.names()) & set(poisoned.names())
+    assert set((fire | poisoned).names()) == set(fire.names()) | set(poisoned.names())
+    assert not (fire - poisoned) & poisoned
+
+
+def test_monster_comparisons():
+    everything = monsters.where()
+    assert len(everything) == len(SRD_monsters)
+    low = monsters.where(cr__lt=1)
+    assert low == monsters.where(cr__in={0, 0.125, 0.25, 0.5})
+    assert monsters.where(cr__ne=0) == everything - monsters.where(cr=0)
+    assert monsters.where(xp__gt=1000) & low == monsters.where(type="nothing")
+    with pytest.raises(ValueError):
+        monsters.where(level=3)
+    with pytest.raises(ValueError):
+        monsters.where(cr__between=1)
+
+
+def test_spell_index_still_works():
+    result = spells.where(cls="wizard", level=3)
+    assert isinstance(result, SpellSet)
+    assert "fireball" in result
+
+
+def test_thresholds_and_multipliers():
+    assert party_thresholds([3, 3, 4, 5]) == {
+        "easy": 525,
+        "medium": 1050,
+        "hard": 1575,
+        "deadly": 2400,
+    }
+    assert encounter_multiplier(0) == 0
+    assert [encounter_multiplier(count) for count in (1, 2, 3, 7, 11, 15)] == [
+        1,
+        1.5,
+        2,
+        2.5,
+        3,
+        4,
+    ]
+    assert encounter_multiplier(1, party_size=2) == 1.5
+    assert encounter_multiplier(15, party_size=6) == 3
+    assert adjusted_xp([50, 50, 50]) == 300
+    assert encounter_difficulty(1100, [3, 3, 4, 5]) == "medium"
+    assert encounter_difficulty(100, [3, 3, 4, 5]) is None
+
+
+@pytest.mark.parametrize("difficulty", DIFFICULTIES)
+def test_encounters_fit_the_budget(difficulty):
+    levels = [3, 3, 4, 5]
+    thresholds = party_thresholds(levels)
+    step = DIFFICULTIES.index(difficulty)
+    low = thresholds[difficulty]
+    high = (
+        thresholds[DIFFICULTIES[step + 1]]
+        if step + 1 < len(DIFFICULTIES)
+        else low * DEADLY_CEILING
+    )
+    encounters = build_encounters(levels, difficulty, limit=20, seed=1)
+    assert len(encounters) == 20
+    assert len({tuple(encounter.monsters.items()) for encounter in encounters}) == 20
+    for encounter in encounters:
+        assert 1 <= len(encounter.monsters) <= 2
+        assert sum(encounter.monsters.values()) <= 8
+        xps = [
+            SRD_monsters[name]["xp"]
+            for name, count in encounter.monsters.items()
+            for __ in range(count)
+        ]
+        assert encounter.xp == sum(xps)
+        assert encounter.adjusted_xp == adjusted_xp(xps, len(levels))
+        assert low <= encounter.adjusted_xp < high
+        assert encounter_difficulty(encounter.adjusted_xp, levels) == difficulty
+
+
+def test_encounters_use_candidates():
+    undead = monsters.where(type="undead")
+    encounters = build_encounters(
+        [5, 5, 5, 5], "hard", candidates=undead, max_kinds=1, seed=2
+    )
+    assert encounters
+    for encounter in encounters:
+        (name,) = encounter.monsters
+        assert name in undead
+    assert build_encounters([5, 5, 5, 5], "hard", seed=2) == build_encounters(
+        [5, 5, 5, 5], "hard", seed=2
+    )
+
+
+def test_encounters_without_candidates():
+    assert build_encounters([20] * 4, "deadly", candidates=["zombie"]) == []
+    with pytest.raises(ValueError):
+        build_encounters([1], "trivial")
+    with pytest.raises(ValueError):
+        build_encounters([1], max_kinds=3)
@@ -0,0 +1,54 @@
+import gc
+import json
+
+import pytest
+
+from dnd_character.SRD import DecoratedAPICallable
+from dnd_character.cache import LRUCache
+from dnd_character.interning import FrozenDict, Interner
+
+REFERENCE = {"index": "wizard", "name": "Wizard", "url": "/api/classes/wizard"}
+
+
+def document(index: str) -> dict:
+    return {"index": index, "classes": [dict(REFERENCE)], "desc": ["A spell."]}
+
+
+@pytest.fixture
+def srd(tmp_path):
+    def live(uri):
+        return json.loads(json.dumps(document(uri.rsplit("/", 1)[-1])))
+
+    srd = DecoratedAPICallable(live, cache=LRUCache(2), cache_dir=str(tmp_path))
+    srd.interner = Interner()
+    return srd
+
+
+def test_documents_share_objects(srd):
+    first, second = srd("/api/spells/light"), srd("/api/spells/mending")
+    assert isinstance(first["classes"][0], FrozenDict)
+    assert first["classes"][0] is second["classes"][0]
+    assert first["desc"][0] is second["desc"][0]
+    with pytest.raises(TypeError):
+        first["classes"][0]["name"] = "Sorcerer"
+
+
+def test_evicted_documents_are_not_kept(srd):
+    srd("/api/spells/light")
+    srd("/api/spells/mending")
+    assert len(srd.interner.leaves) == 1
+    srd.cache.clear()
+    gc.collect()
+    assert len(srd.interner.leaves) == 0
+
+
+def test_stats_count_each_object_once(srd):
+    for _ in range(3):
+        for index in ("light", "mending", "shield"):
+            srd(f"/api/spells/{index}")
+    stats = srd.stats_dict()
+    assert stats["evictions"] > 0
+    interned = stats["interned"]
+    assert interned["shared_dicts"] == 1
+    assert interned == Interner.stats_dict(list(srd.cache.values()))
+    assert 0 < interned["bytes_saved"] < 1000
@@ -0,0 +1,39 @@
+from dnd_character.equipment import Item
+from dnd_character.inventory import Inventory
+
+
+def test_stack_unchanged_items():
+    inventory = Inventory()
+    torch = inventory.add(Item("torch"), stack=True)
+    assert inventory.add(Item("torch"), stack=True) is torch
+    assert torch.quantity == 2
+    assert len(inventory) == 1
+
+
+def test_changed_stack_takes_no_more_copies():
+    inventory = Inventory()
+    torch = inventory.add(Item("torch"), stack=True)
+    torch.name = "Everburning Torch"
+    second = inventory.add(Item("torch"), stack=True)
+    assert second is not torch
+    assert inventory.add(Item("torch"), stack=True) is second
+    assert torch.quantity == 1
+    assert second.quantity == 2
+    assert list(inventory) == [torch, second]
+
+
+def test_list_methods():
+    torch, rope, shield = Item("torch"), Item("rope-hempen-50-feet"), Item("shield")
+    inventory = Inventory([torch])
+    inventory += [rope]
+    inventory.extend([shield])
+    inventory.equip(shield)
+    assert inventory == [torch, rope, shield]
+    assert inventory.index(rope) == 1
+    assert inventory.pop() is shield
+    assert inventory.shield is None
+    del inventory[0]
+    assert inventory == [rope]
+    assert inventory.pop(0) is rope
+    assert inventory == Inventory()
+    assert inventory != [rope]
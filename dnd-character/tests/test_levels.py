@@ -0,0 +1,49 @@
+import pytest
+
+from dnd_character.character import Character
+from dnd_character.classes import CLASSES
+
+FIELDS = (
+    "level",
+    "prof_bonus",
+    "ability_score_bonus",
+    "hd",
+    "max_hp",
+    "class_features_enabled",
+    "spell_slots",
+)
+
+
+ABILITIES = dict(
+    strength=10, dexterity=12, constitution=14, wisdom=13, intelligence=15, charisma=8
+)
+
+
+def make_character(classs: str, level: int) -> Character:
+    return Character(classs=CLASSES[classs], level=level, **ABILITIES)
+
+
+def state(character: Character) -> dict:
+    return {
+        "class_features": list(character.class_features),
+        **{field: getattr(character, field) for field in FIELDS},
+    }
+
+
+@pytest.mark.parametrize("classs", sorted(CLASSES))
+def test_level_down_matches_new_character(classs):
+    for level in range(1, 20):
+        character = make_character(classs, 20)
+        character.level = level
+        fresh = make_character(classs, level)
+        assert state(character) == state(fresh), level
+
+
+@pytest.mark.parametrize("classs", sorted(CLASSES))
+def test_level_up_and_down_one_at_a_time(classs):
+    character = make_character(classs, 1)
+    levels = [*range(2, 21), *range(19, 0, -1)]
+    for level in levels:
+        character.level = level
+        fresh = make_character(classs, level)
+        assert state(character) == state(fresh), level
@@ -0,0 +1,237 @@
+import json
+import threading
+from collections import Counter
+from hashlib import sha256
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from dnd_character.SRD import DecoratedAPICallable
+from dnd_character.manifest import MANIFEST_FILENAME, Manifest, load_manifest
+from dnd_character.prefetch import linked_uris, prefetch, revalidate
+from dnd_character.snapshot import uri_to_filename
+
+FIXTURES = {
+    "/api/": {"spells": "/api/spells", "monsters": "/api/monsters"},
+    "/api/spells": {
+        "count": 2,
+        "results": [
+            {"index": "light", "url": "/api/spells/light"},
+            {"index": "missing", "url": "/api/spells/missing"},
+        ],
+    },
+    "/api/spells/light": {
+        "index": "light",
+        "name": "Light",
+        "level": 0,
+        "school": {"index": "evocation", "url": "/api/magic-schools/evocation"},
+        "ritual": False,
+        "concentration": False,
+        "classes": [{"index": "wizard", "url": "/api/classes/wizard"}],
+        "image": "/api/images/light.png",
+    },
+    "/api/monsters": {
+        "count": 1,
+        "results": [{"index": "zombie", "url": "/api/monsters/zombie"}],
+    },
+    "/api/monsters/zombie": {
+        "index": "zombie",
+        "name": "Zombie",
+        "challenge_rating": 0.25,
+        "type": "undead",
+        "size": "Medium",
+        "hit_points": 22,
+    },
+    "/api/magic-schools/evocation": {"index": "evocation", "name": "Evocation"},
+    "/api/classes/wizard": {"index": "wizard", "name": "Wizard"},
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.requests[self.path] += 1
+        if self.path in server.stalled and server.requests[self.path] == 1:
+            # never answers, until the test is over
+            server.release.wait(10)
+            return
+        if self.path in server.flaky and server.requests[self.path] == 1:
+            self.send_response(503)
+            self.end_headers()
+            return
+        if self.path not in server.fixtures:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = json.dumps(server.fixtures[self.path]).encode()
+        etag = f'"{sha256(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            server.not_modified += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.fixtures = json.loads(json.dumps(FIXTURES))
+    server.flaky = {"/api/monsters/zombie"}
+    server.stalled = set()
+    server.release = threading.Event()
+    server.requests = Counter()
+    server.not_modified = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.api = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.release.set()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def srd(tmp_path):
+    def live(uri):
+        raise AssertionError(f"unexpected live request for {uri}")
+
+    cache_dir = tmp_path / "json_cache"
+    cache_dir.mkdir()
+    srd = DecoratedAPICallable(live, cache_dir=str(cache_dir))
+    # kept in the cache directory, as the SRD's own manifest is
+    srd.manifest = Manifest(str(cache_dir / MANIFEST_FILENAME))
+    return srd
+
+
+def cached_file(srd, uri):
+    with open(f"{srd.cache_dir}/{uri_to_filename(uri)}") as f:
+        return json.load(f)
+
+
+def test_linked_uris_skip_images():
+    assert sorted(linked_uris(FIXTURES["/api/spells/light"])) == [
+        "/api/classes/wizard",
+        "/api/magic-schools/evocation",
+    ]
+    assert sorted(linked_uris(FIXTURES["/api/"])) == ["/api/monsters", "/api/spells"]
+
+
+def test_prefetch(server, srd):
+    report = prefetch(jobs=4, api=server.api, srd=srd)
+    assert report.fetched == 7
+    assert report.failed == ["/api/spells/missing"]
+    assert report.rate > 0
+    for uri, data in FIXTURES.items():
+        assert cached_file(srd, uri) == data
+        assert srd(uri) == data
+        assert uri in srd.manifest
+    # the 503 was retried, the 404 wasn't
+    assert server.requests["/api/monsters/zombie"] == 2
+    assert server.requests["/api/spells/missing"] == 1
+    assert "/api/images/light.png" not in server.requests
+
+    manifest = load_manifest(srd.manifest.filepath)
+    assert set(manifest) == set(FIXTURES)
+    assert manifest.check(srd.cache_dir, quick=False) == []
+
+    again = prefetch(jobs=4, api=server.api, srd=srd)
+    assert again.fetched == 0
+    assert again.cached == 7
+
+
+def test_prefetch_stalled_request_times_out(server, srd, monkeypatch):
+    monkeypatch.setattr("dnd_character.prefetch.SRD_TIMEOUT", 0.2)
+    server.stalled = {"/api/spells/light"}
+    report = prefetch(jobs=4, api=server.api, srd=srd)
+    # the stalled request timed out and was retried
+    assert report.fetched == 7
+    assert server.requests["/api/spells/light"] == 2
+    assert report.seconds < 5
+
+
+def test_prefetch_limit(server, srd):
+    report = prefetch(jobs=1, api=server.api, srd=srd, limit=2)
+    assert report.fetched == 2
+    assert len(srd.index) == 2
+
+
+def test_revalidate(server, srd):
+    prefetch(jobs=4, api=server.api, srd=srd)
+    server.fixtures["/api/monsters/zombie"]["hit_points"] = 30
+
+    report = revalidate(jobs=4, api=server.api, srd=srd)
+    assert report.changed == ["/api/monsters/zombie"]
+    assert report.failed == []
+    assert report.checked == 7
+    # unchanged entries were requested with their ETag
+    assert server.not_modified == 6
+    assert cached_file(srd, "/api/monsters/zombie")["hit_points"] == 30
+    assert srd("/api/monsters/zombie")["hit_points"] == 30
+
+
+def test_revalidate_failure(server, srd):
+    prefetch(jobs=4, api=server.api, srd=srd)
+    del server.fixtures["/api/spells/light"]
+    report = revalidate(jobs=4, api=server.api, srd=srd)
+    assert report.failed == ["/api/spells/light"]
+    assert cached_file(srd, "/api/spells/light") == FIXTURES["/api/spells/light"]
+
+
+@pytest.mark.parametrize("store", ["snapshot", "sqlite"])
+def test_revalidate_skips_stale_store(server, srd, tmp_path, store):
+    from dnd_character.database import build_database, open_database
+    from dnd_character.snapshot import build_snapshot, open_snapshot
+
+    prefetch(jobs=4, api=server.api, srd=srd)
+    build, open_store = {
+        "snapshot": (build_snapshot, open_snapshot),
+        "sqlite": (build_database, open_database),
+    }[store]
+    filepath = str(tmp_path / f"srd.{store}")
+    build(srd.cache_dir, filepath)
+    srd.stores = [open_store(filepath)]
+    # the manifest isn't a document
+    assert set(srd.stores[0].digests) == set(FIXTURES)
+    srd.cache.clear()
+    assert srd.in_store(srd.stores[0], "/api/monsters/zombie")
+
+    server.fixtures["/api/monsters/zombie"]["hit_points"] = 30
+    report = revalidate(jobs=4, api=server.api, srd=srd)
+    assert report.changed == ["/api/monsters/zombie"]
+    srd.cache.clear()
+    # the store's copy is out of date, so the JSON file is read instead
+    assert not srd.in_store(srd.stores[0], "/api/monsters/zombie")
+    assert srd("/api/monsters/zombie")["hit_points"] == 30
+    assert srd.in_store(srd.stores[0], "/api/spells/light")
+    srd.stores[0].close()
+
+
+def test_stale_snapshot_rebuilt(server, srd, tmp_path, caplog):
+    from dnd_character import snapshot
+
+    prefetch(jobs=4, api=server.api, srd=srd)
+    filepath = str(tmp_path / "srd.snapshot")
+    snapshot.build_snapshot(srd.cache_dir, filepath)
+    # as if built by another Python
+    with open(filepath, "r+b") as f:
+        header = bytearray(f.read(snapshot.HEADER.size))
+        header[9] += 1
+        f.seek(0)
+        f.write(header)
+    with pytest.raises(snapshot.StaleSnapshotError):
+        snapshot.Snapshot(filepath)
+    assert snapshot.open_snapshot(filepath) is None
+
+    rebuilt = snapshot.open_snapshot(filepath, srd.cache_dir)
+    assert "Rebuilding SRD snapshot" in caplog.text
+    assert rebuilt.get("/api/monsters/zombie") == FIXTURES["/api/monsters/zombie"]
+    rebuilt.close()
@@ -0,0 +1,35 @@
+import pytest
+
+from dnd_character.search import SearchIndex, srd_documents
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SearchIndex.build(srd_documents())
+
+
+def test_exact_title_ranked_first():
+    index = SearchIndex.build(
+        [
+            ("spell", "shield", "Shield", "An invisible barrier of magical force."),
+            ("spell", "fire-shield", "Fire Shield", "Shield shield shield of flame."),
+            ("spell", "shield-of-faith", "Shield of Faith", "A shield shield."),
+        ]
+    )
+    results = index.search("what does shield do", limit=1)
+    assert [(result.index, result.exact) for result in results] == [("shield", True)]
+
+
+def test_question_names_srd_entry(index):
+    results = index.search("what does Shield do", limit=3)
+    exact = [(result.kind, result.index) for result in results if result.exact]
+    assert ("spell", "shield") in exact
+    assert ("equipment", "shield") in exact
+    assert all(result.exact for result in results[: len(exact)])
+
+
+def test_no_exact_match(index):
+    results = index.search("how long can I hold my breath", limit=3)
+    assert len(results) == 3
+    assert not any(result.exact for result in results)
+    assert results[0].score >= results[-1].score
@@ -0,0 +1,194 @@
+import pytest
+from uuid import UUID
+
+from dnd_character.binary import packb, pure_packb, pure_unpackb
+from dnd_character.character import Character
+from dnd_character.classes import CLASSES
+from dnd_character.equipment import Item
+from dnd_character.serialization import (
+    FIELDS,
+    SCHEMA_VERSION,
+    VERSION_FIELDS,
+    SchemaError,
+    character_to_dict,
+)
+from dnd_character.spellcasting import SPELLS
+
+
+def make_character(classs: str, level: int) -> Character:
+    character = Character(
+        classs=CLASSES[classs],
+        level=level,
+        name="Sturm",
+        cantrips_known=[SPELLS["light"]],
+        spells_known=[SPELLS["fireball"]],
+    )
+    character.give_item(Item("shield"))
+    for _ in range(3):
+        character.give_item(Item("torch"), stack=True)
+    stinger = Item("longsword")
+    stinger.name = "Stinger"
+    stinger.quantity = 2
+    character.give_item(stinger)
+    character.current_hp = 3
+    character.temp_hp = 2
+    character.conditions["prone"] = True
+    character.death_saves = 1
+    character.spell_slots["spell_slots_level_1"] = 0
+    character.class_features_enabled[0] = False
+    character.class_features["homebrew-thing"] = {
+        "index": "homebrew-thing",
+        "name": "Homebrew Thing",
+        "desc": [],
+    }
+    character.class_features_enabled.append(True)
+    character.prof_bonus = 9
+    return character
+
+
+def assert_same(loaded: Character, character: Character) -> None:
+    assert dict(loaded) == dict(character)
+    assert loaded == character
+    assert loaded.level == character.level
+    assert loaded.inventory.shield.index == "shield"
+    assert loaded.armor_class == character.armor_class
+    assert not loaded.is_dirty
+
+
+CASES = [(classs, level) for classs in sorted(CLASSES) for level in (1, 5, 20)]
+
+
+@pytest.mark.parametrize("classs,level", CASES)
+def test_dict_round_trip(classs, level):
+    character = make_character(classs, level)
+    assert_same(Character.from_dict(character.to_dict()), character)
+
+
+@pytest.mark.parametrize("classs,level", CASES)
+def test_bytes_round_trip(classs, level):
+    character = make_character(classs, level)
+    assert_same(Character.from_bytes(character.to_bytes()), character)
+
+
+def test_items_and_spells_saved_by_index():
+    data = make_character("fighter", 3).to_dict()
+    assert data["cantrips_known"] == ["light"]
+    assert data["spells_known"] == ["fireball"]
+    torch = next(item for item in data["inventory"] if item["index"] == "torch")
+    assert torch["quantity"] == 3
+    stinger = next(item for item in data["inventory"] if item.get("name") == "Stinger")
+    assert stinger["index"] == "longsword" and stinger["quantity"] == 2
+
+
+def test_overrides_survive():
+    character = make_character("wizard", 5)
+    character.max_hp = 99
+    character.armor_class = 25
+    loaded = Character.from_bytes(character.to_bytes())
+    assert loaded.max_hp == 99
+    assert loaded.armor_class == 25
+    assert loaded.prof_bonus == 9
+    assert loaded.spell_slots["spell_slots_level_1"] == 0
+
+
+def test_custom_level():
+    character = Character(classs=CLASSES["wizard"], level=5, experience=100)
+    loaded = Character.from_bytes(character.to_bytes())
+    assert loaded.level == 5
+
+
+def version_1(character: Character) -> dict:
+    data = character_to_dict(character)
+    del data["equipped"]
+    data["version"] = 1
+    return data
+
+
+def test_load_version_1_dict():
+    character = make_character("paladin", 3)
+    loaded = Character.from_dict(version_1(character))
+    assert loaded.inventory.shield.index == "shield"
+    assert loaded.armor_class == character.armor_class
+    assert dict(loaded) == dict(character)
+
+
+def test_load_version_1_bytes():
+    character = make_character("paladin", 3)
+    data = version_1(character)
+    data["uid"] = UUID(data["uid"]).bytes
+    encoded = packb([1, *(data[field] for field in VERSION_FIELDS[1])])
+    loaded = Character.from_bytes(encoded)
+    assert dict(loaded) == dict(character)
+
+
+def test_schema_errors():
+    data = make_character("fighter", 1).to_dict()
+    with pytest.raises(SchemaError):
+        Character.from_dict({**data, "version": SCHEMA_VERSION + 1})
+    del data["name"]
+    with pytest.raises(SchemaError):
+        Character.from_dict(data)
+    with pytest.raises(SchemaError):
+        Character.from_bytes(packb([SCHEMA_VERSION, "too short"]))
+    with pytest.raises(SchemaError):
+        Character.from_bytes(b"\xdc")
+
+
+VALUES = [
+    None,
+    True,
+    False,
+    0,
+    127,
+    128,
+    -1,
+    -32,
+    -33,
+    255,
+    256,
+    65536,
+    -129,
+    -(2**31) - 1,
+    2**63,
+    -(2**63),
+    1.5,
+    "",
+    "a" * 31,
+    "b" * 32,
+    "ü" * 300,
+    b"",
+    b"\x00" * 300,
+    list(range(15)),
+    list(range(16)),
+    list(range(70000)),
+    {str(key): key for key in range(16)},
+    {"nested": [{"a": [1, 2, {"b": None}]}], "x": -0.25},
+]
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_pure_python_round_trip(value):
+    assert pure_unpackb(pure_packb(value)) == value
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_pure_python_matches_msgpack(value):
+    msgpack = pytest.importorskip("msgpack")
+    encoded = pure_packb(value)
+    assert encoded == msgpack.packb(value, use_bin_type=True)
+    assert msgpack.unpackb(encoded, raw=False, strict_map_key=False) == value
+    assert pure_unpackb(msgpack.packb(value, use_bin_type=True)) == value
+
+
+def test_pure_python_rejects_bad_data():
+    with pytest.raises(ValueError):
+        pure_unpackb(pure_packb([1, 2, 3])[:-1])
+    with pytest.raises(ValueError):
+        pure_unpackb(pure_packb(1) + b"\x01")
+    with pytest.raises(TypeError):
+        pure_packb(object())
+
+
+def test_every_field_saved():
+    data = make_character("bard", 2).to_dict()
+    assert set(data) == {"version", *FIELDS}
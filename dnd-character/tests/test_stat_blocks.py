@@ -0,0 +1,32 @@
+import shutil
+
+from dnd_character import stat_blocks
+from dnd_character.snapshot import iter_json_cache
+
+
+def test_compiled_cache(tmp_path, monkeypatch):
+    source = stat_blocks.stat_block_files()[0]
+    directory = tmp_path / "guides"
+    directory.mkdir()
+    csv = directory / "Test_Stat_Blocks.csv"
+    shutil.copy(source, csv)
+    cache = tmp_path / "json_cache"
+    cache.mkdir()
+    monkeypatch.setattr(stat_blocks, "STAT_BLOCKS_CACHE", str(cache / "stat_blocks.json"))
+
+    compiled = stat_blocks.load_stat_blocks(str(directory))
+    assert compiled
+    # the compiled cache isn't an SRD document
+    assert list(iter_json_cache(str(cache))) == []
+
+    hashed = []
+    sha256 = stat_blocks.hashlib.sha256
+    monkeypatch.setattr(
+        stat_blocks.hashlib, "sha256", lambda data: hashed.append(1) or sha256(data)
+    )
+    assert stat_blocks.load_stat_blocks(str(directory)) == compiled
+    assert hashed == []
+
+    csv.write_bytes(csv.read_bytes() + b"\n")
+    assert stat_blocks.load_stat_blocks(str(directory)) == compiled
+    assert hashed == [1]
@@ -0,0 +1,90 @@
+import pytest
+
+from dnd_character.character import Character
+from dnd_character.classes import CLASSES
+from dnd_character.equipment import Item
+
+
+@pytest.fixture
+def character():
+    return Character(classs=CLASSES["fighter"], level=3, name="Tanis")
+
+
+def test_new_character_is_clean(character):
+    assert not character.is_dirty
+    assert character.dirty_fields == frozenset()
+
+
+def test_assignment_marks_dirty(character):
+    before = character.fingerprint
+    character.current_hp -= 1
+    assert character.dirty_fields == {"current_hp"}
+    assert character.fingerprint != before
+
+
+def test_tracked_dict_changes(character):
+    before = character.fingerprint
+    prone = character.conditions.get("prone")
+    character.conditions["prone"] = True
+    assert "conditions" in character.dirty_fields
+    assert character.fingerprint != before
+    character.conditions["prone"] = prone
+    assert character.fingerprint == before
+
+
+def test_tracked_list_changes(character):
+    before = character.fingerprint
+    character.class_features_enabled.append(False)
+    assert "class_features_enabled" in character.dirty_fields
+    assert character.fingerprint != before
+    character.class_features_enabled.pop()
+    assert character.fingerprint == before
+
+
+def test_assigned_containers_are_tracked(character):
+    character.conditions = {}
+    character.mark_clean()
+    character.conditions["blinded"] = True
+    assert character.dirty_fields == {"conditions"}
+
+
+def test_inventory_changes(character):
+    before = character.fingerprint
+    character.give_item(Item("torch"))
+    assert "inventory" in character.dirty_fields
+    assert character.fingerprint != before
+
+
+def test_mark_clean(character):
+    character.current_hp = 1
+    fingerprint = character.fingerprint
+    character.mark_clean()
+    assert not character.is_dirty
+    assert character.fingerprint == fingerprint
+    character.mark_dirty("inventory")
+    assert character.dirty_fields == {"inventory"}
+
+
+def test_dirty_fields_is_a_copy(character):
+    character.current_hp = 1
+    with pytest.raises(AttributeError):
+        character.dirty_fields.clear()
+    assert character.is_dirty
+
+
+def test_equal(character):
+    other = Character.from_dict(character.to_dict())
+    assert other == character
+    assert character == dict(character)
+    other.conditions["prone"] = True
+    assert other != character
+    assert character != "Tanis"
+
+
+def test_equal_when_fingerprints_collide(character):
+    other = Character.from_dict(character.to_dict())
+    # hash(-1) == hash(-2)
+    character.age = -1
+    other.age = -2
+    assert character.fingerprint == other.fingerprint
+    assert character != other
@@ -0,0 +1,40 @@
+import json
+import logging
+
+from dnd_character.writer import UMASK, JsonWriter, write_json_atomic
+
+
+def read(fp):
+    with open(fp) as f:
+        return json.load(f)
+
+
+def test_overwrite_pending_file_queued_once(tmp_path, caplog):
+    fp = str(tmp_path / "spells_light.json")
+    writer = JsonWriter()
+    with caplog.at_level(logging.ERROR):
+        for hit_points in range(20):
+            writer.put(fp, {"hit_points": hit_points}, overwrite=True)
+        writer.flush()
+    assert caplog.records == []
+    assert read(fp) == {"hit_points": 19}
+    assert writer.pending == {}
+    assert writer.queued == set()
+
+
+def test_existing_file_kept_without_overwrite(tmp_path):
+    fp = str(tmp_path / "spells_light.json")
+    writer = JsonWriter()
+    writer.put(fp, {"name": "Light"})
+    writer.flush()
+    writer.put(fp, {"name": "Dark"})
+    writer.flush()
+    assert read(fp) == {"name": "Light"}
+    assert writer.written == 1
+
+
+def test_files_get_default_mode(tmp_path):
+    fp = tmp_path / "spells_light.json"
+    write_json_atomic(str(fp), {"name": "Light"})
+    write_json_atomic(str(fp), {"name": "Light"}, overwrite=True)
+    assert fp.stat().st_mode & 0o777 == 0o666 & ~UMASK
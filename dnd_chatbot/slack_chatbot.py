@@ -34,7 +34,8 @@ try:
     )
     from dnd_character.character import Character as BaseCharacter # Base class for type hints
     from dnd_character.experience import experience_at_level, level_at_experience
-    from dnd_character.SRD import SRD # To potentially look up race/background details if needed
+    from dnd_character.SRD import SRD, warm as warm_srd # To potentially look up race/background details if needed
+    from dnd_character.search import get_index as get_srd_search_index, search as search_srd
 except ImportError as e:
     logging.error(f"Failed to import modules: {e}. Ensure rag_retriever.py, pdf_character_parser.py and dnd-character library are present/installed.")
     sys.exit(1)
@@ -190,12 +191,18 @@ def handle_message(message_text, user_id):
     #      character_summary = f"Character Creation Stage: {status}"
 
 
-    # 1. Retrieve context using RAG
-    retrieved_context = rag_retriever.query_index(message_text)
-    if "Error:" in retrieved_context:
-        logger.error(f"RAG retrieval failed: {retrieved_context}")
-        return "Sorry, I had trouble consulting my references." # Return error message for Slack
-    logger.info("Retrieved context from RAG index.")
+    # 1. Retrieve context, first from the offline SRD index when the message names
+    # a spell, monster, item or rule outright, which skips the embedding call
+    srd_matches = [result for result in search_srd(message_text, limit=3) if result.exact]
+    if srd_matches:
+        retrieved_context = "\n\n".join(f"{result.title} ({result.kind})\n{result.text}" for result in srd_matches)
+        logger.info(f"Retrieved context from SRD search: {[result.title for result in srd_matches]}")
+    else:
+        retrieved_context = rag_retriever.query_index(message_text)
+        if "Error:" in retrieved_context:
+            logger.error(f"RAG retrieval failed: {retrieved_context}")
+            return "Sorry, I had trouble consulting my references." # Return error message for Slack
+        logger.info("Retrieved context from RAG index.")
     logger.debug(f"Context: {retrieved_context[:200]}...")
 
     # 2. Construct dynamic system prompt with lore
@@ -515,6 +522,9 @@ def handle_message_events(body: Dict[str, Any], say: Say, logger: Logger, client
             save_player_profiles()
             say(text="Debug profiles reset. All player profiles have been cleared.")
             return
+        elif message_text_lower == "debug srd stats":
+            say(text=f"```{SRD.stats_report()}```")
+            return
 
         # New riddle-answer handling state: if user is awaiting to solve riddle.
         if profile.get("creation_status") == "awaiting_riddle_answer":
@@ -872,6 +882,9 @@ def scan_and_initiate_users(client: WebClient, logger: Logger):
 # --- Start the App ---
 if __name__ == "__main__":
     logger.info("Entering main execution block...") # Added logging
+    # Load the lazy SRD tables now rather than during the first player's request
+    warm_srd()
+    get_srd_search_index()
     # Reminder about index building
     if not os.path.exists(rag_retriever.FAISS_INDEX_PATH):
         logger.warning(f"FAISS index not found at {rag_retriever.FAISS_INDEX_PATH}. Ensure build_index.py has been run.")